@@ -0,0 +1,183 @@
+import json
+import logging
+import time
+from flask import request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from log_pipeline import ACCESS_LOGGER
+
+logger = logging.getLogger(ACCESS_LOGGER)
+
+# WSGI environ key holding the fields collected for the access record of a request
+ENVIRON_KEY = 'api.access'
+
+def annotate(**fields):
+    """
+    Adds fields (e.g. the authenticated user) to the access record of the current request.
+    Does nothing outside a request or when the access log middleware is not installed.
+    
+    @param fields: Field names and values
+    @return: None
+    """
+    if has_request_context():
+        record = request.environ.get(ENVIRON_KEY)
+        if record is not None:
+            record.update(fields)
+
+def add_timing(phase, seconds):
+    """
+    Adds time spent in a phase of the current request ('auth', 'handler', 'serialize', 'compress').
+    Repeated calls for the same phase are summed.
+    
+    @param phase: Name of the phase
+    @param seconds: Duration in seconds
+    @return: None
+    """
+    if has_request_context():
+        timings = request.environ.get(ENVIRON_KEY, {}).get('_timings')
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that reports the time spent serializing response bodies.
+    """
+
+    def dumps(self, obj, **kwargs):
+        """
+        @param obj: Object to serialize
+        @return: JSON string
+        """
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            add_timing('serialize', time.perf_counter() - started)
+
+def _ms(seconds):
+    """
+    @param seconds: Duration in seconds, or None
+    @return: Duration in milliseconds rounded to 0.01, or None
+    """
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+class _CountingBody:
+    """
+    Wraps a WSGI response iterable to count the bytes sent and emit the access record once it is closed.
+    """
+
+    def __init__(self, body, on_close):
+        """
+        @param body: Response iterable returned by the application
+        @param on_close: Callable taking the number of bytes sent
+        """
+        self._body = body
+        self._on_close = on_close
+        self.bytes = 0
+
+    def __iter__(self):
+        """
+        @return: Iterator over the response chunks
+        """
+        for chunk in self._body:
+            self.bytes += len(chunk)
+            yield chunk
+
+    def close(self):
+        """
+        Closes the wrapped iterable and emits the access record.
+        
+        @return: None
+        """
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._on_close(self.bytes)
+
+class AccessLogMiddleware:
+    """
+    WSGI middleware writing one JSON line per request to the access logger.
+    
+    Each record has the method, path, Flask endpoint, user, status, response
+    size and timings in milliseconds: total (until the last byte is handed to
+    the server), auth (credential or token check), data (endpoint body minus
+    serialization and compression), serialize (JSON encoding) and compress
+    (compression of buffered bodies; streamed bodies are compressed while sent). Phases a request did not go
+    through are null. The query string is not logged because it may carry
+    access codes.
+    """
+
+    def __init__(self, app):
+        """
+        @param app: Flask application to wrap
+        """
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._mark_endpoint)
+
+    @staticmethod
+    def _mark_endpoint():
+        """
+        before_request hook storing the matched endpoint name in the access record.
+        
+        @return: None
+        """
+        annotate(endpoint=request.endpoint)
+
+    def __call__(self, environ, start_response):
+        """
+        WSGI entry point: runs the application and logs the request once its response is closed.
+        
+        @param environ: WSGI environment
+        @param start_response: WSGI start_response callable
+        @return: Response iterable
+        """
+        started = time.perf_counter()
+        record = {'endpoint': None, 'user': None, '_timings': {}}
+        environ[ENVIRON_KEY] = record
+        status = {}
+
+        def capture_start_response(status_line, headers, exc_info=None):
+            status['code'] = int(status_line.split(' ', 1)[0])
+            return start_response(status_line, headers, exc_info)
+
+        def emit(sent_bytes):
+            timings = record.pop('_timings')
+            handler = timings.get('handler')
+            serialize = timings.get('serialize')
+            compress = timings.get('compress')
+            data = max(handler - (serialize or 0.0) - (compress or 0.0), 0.0) if handler is not None else None
+            entry = {
+                'ts': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'method': environ.get('REQUEST_METHOD'),
+                'path': environ.get('PATH_INFO'),
+                'endpoint': record.get('endpoint'),
+                'user': record.get('user'),
+                'status': status.get('code'),
+                'bytes': sent_bytes,
+                'total_ms': _ms(time.perf_counter() - started),
+                'auth_ms': _ms(timings.get('auth')),
+                'data_ms': _ms(data),
+                'serialize_ms': _ms(serialize),
+                'compress_ms': _ms(compress),
+                'ip': environ.get('REMOTE_ADDR')
+            }
+            logger.info(json.dumps(entry))
+
+        try:
+            body = self.wsgi_app(environ, capture_start_response)
+        except Exception:
+            status.setdefault('code', 500)
+            emit(0)
+            raise
+        return _CountingBody(body, emit)
+
+def install_access_log(app):
+    """
+    Wraps a Flask application with the access log middleware.
+    
+    @param app: Flask application
+    @return: None
+    """
+    app.wsgi_app = AccessLogMiddleware(app)
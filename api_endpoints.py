@@ -1,22 +1,341 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app, make_response, g
+from werkzeug.test import EnvironBuilder
 from datetime import datetime, timedelta
 import random
 import logging
+import time
+import hashlib
+import base64
+import json
 from functools import wraps
-from auth import authenticate_user
-from db_utils import (
-    get_user_by_id,
-    get_staff_by_id,
-    get_status_by_id,
-    get_category_by_id,
-    get_tickets_by_staff,
-    get_comments_by_ticket,
-    get_logs_by_ticket,
-    get_departments_from_db
-)
+from auth import authenticate_user, create_session, verify_session, revoke_session
+from db_utils import get_pool_stats
+from access_log import annotate, add_timing
+from constants import (TICKETS_PAGE_SIZE, MAX_PAGE_SIZE, MAX_BATCH_IDS, MAX_BATCH_REQUESTS, TIMELINE_MAX_BUCKETS,
+                       REPORTED_QUANTILES)
+from json_stream import stream_mode, stream_response
+from response_cache import variant_key
+from response_compression import negotiate_encoding, compress_response
+from data_backend import TICKET_FIELDS, TICKET_DETAIL_FIELDS, STAFF_FIELDS
+from timeline_buckets import GRANULARITIES, bucket_edges, bucket_label
+from ticket_forecast import risk_factors, resolution_trend
 
 logger = logging.getLogger(__name__)
 
+def _bearer_token():
+    """
+    Extracts the session token from the Authorization header of the current request.
+    
+    @return: Token string, or None if no bearer token was sent
+    """
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
+
+# Query parameters that identify the caller rather than the requested data
+_CREDENTIAL_PARAMS = ('login', 'code')
+
+# Query parameters that switch /api/v1/tickets to paged output
+_TICKET_PAGE_PARAMS = ('limit', 'after', 'status', 'category', 'created_from', 'created_to', 'closed_from', 'closed_to')
+
+def _encode_cursor(values):
+    """
+    Encodes keyset values as an opaque cursor string.
+    
+    @param values: List of JSON-serializable values; datetimes are stored in ISO format
+    @return: URL-safe cursor string
+    """
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor, size):
+    """
+    Decodes a cursor produced by _encode_cursor().
+    
+    @param cursor: Cursor string from the request
+    @param size: Expected number of values
+    @return: List of values
+    @raise ValueError: If the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+def _cursor_arg(name, *types):
+    """
+    Reads and decodes a cursor query parameter.
+    
+    @param name: Name of the parameter
+    @param types: Converter of each cursor value (e.g. datetime.fromisoformat, int)
+    @return: Tuple of converted values, or None if the parameter is absent or empty
+    @raise ValueError: If the cursor is malformed
+    """
+    cursor = request.args.get(name)
+    if not cursor:
+        return None
+    values = _decode_cursor(cursor, len(types))
+    try:
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def _int_arg(name, default=None, minimum=1, maximum=MAX_PAGE_SIZE):
+    """
+    Reads a bounded integer query parameter.
+    
+    @param name: Name of the parameter
+    @param default: Value returned if the parameter is absent
+    @param minimum: Smallest accepted value
+    @param maximum: Largest accepted value
+    @return: Integer value or the default
+    @raise ValueError: If the value is not an integer within the bounds
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid parameter: {name}")
+    if number < minimum or number > maximum:
+        raise ValueError(f"Parameter {name} must be between {minimum} and {maximum}")
+    return number
+
+def _id_set_arg(name):
+    """
+    Reads a comma-separated list of IDs (e.g. status=1,2).
+    
+    @param name: Name of the parameter
+    @return: Set of integers, or None if the parameter is absent
+    @raise ValueError: If an element is not an integer
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return {int(part) for part in value.split(',') if part.strip()}
+    except ValueError:
+        raise ValueError(f"Invalid parameter: {name}")
+
+def _id_list_arg(name, maximum):
+    """
+    Reads a comma-separated list of IDs keeping the given order (e.g. ids=5,3,9).
+    
+    @param name: Name of the parameter
+    @param maximum: Largest accepted number of IDs
+    @return: List of distinct integers, or None if the parameter is absent
+    @raise ValueError: If an element is not an integer or there are too many IDs
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+    except ValueError:
+        raise ValueError(f"Invalid parameter: {name}")
+    if len(ids) > maximum:
+        raise ValueError(f"Parameter {name} accepts at most {maximum} IDs")
+    return ids
+
+def _date_range_arg(prefix=None):
+    """
+    Reads an inclusive date range given as <prefix>_from / <prefix>_to (YYYY-MM-DD).
+    
+    @param prefix: Parameter prefix, e.g. 'created', or None for plain from / to
+    @return: Tuple (inclusive start datetime or None, exclusive end datetime or None)
+    @raise ValueError: If a date is malformed
+    """
+    bounds = []
+    for suffix, shift in (('from', 0), ('to', 1)):
+        name = f"{prefix}_{suffix}" if prefix else suffix
+        value = request.args.get(name)
+        if value is None:
+            bounds.append(None)
+            continue
+        try:
+            bounds.append(datetime.strptime(value, '%Y-%m-%d') + timedelta(days=shift))
+        except ValueError:
+            raise ValueError(f"Invalid parameter: {name} (expected YYYY-MM-DD)")
+    return bounds[0], bounds[1]
+
+def _fields_arg(allowed):
+    """
+    Reads the comma-separated list of output fields (e.g. fields=ticket_id,subject).
+    
+    @param allowed: Tuple of field names the endpoint can return
+    @return: Set of field names, or None if the parameter is absent (all fields)
+    @raise ValueError: If a field is unknown
+    """
+    value = request.args.get('fields')
+    if value is None:
+        return None
+    fields = {part.strip() for part in value.split(',') if part.strip()}
+    unknown = sorted(fields.difference(allowed))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def _hours_text(hours):
+    """
+    @param hours: Duration in hours, or None
+    @return: Duration formatted like "2.1 hours", or 'No data'
+    """
+    return f"{hours:.1f} hours" if hours is not None else 'No data'
+
+def _request_key(user, version):
+    """
+    Computes the key identifying the current request's response.
+    
+    The key covers the data version, the user's identity and access rights, the
+    path and the query parameters (without credentials), the Accept header
+    (JSON or NDJSON representation) and today's date, because endpoints such as
+    /timeline are relative to the current day. It is used as the strong ETag
+    and as the response cache key.
+    
+    @param user: Authenticated user dictionary
+    @param version: Data version of the backend, or None if not tracked
+    @return: Hex digest string
+    """
+    query = sorted((k, v) for k, v in request.args.items(multi=True) if k not in _CREDENTIAL_PARAMS)
+    key = repr((version, user.get('login'), user['staff_id'], user['role'], sorted(user['departments']),
+                request.path, query, request.headers.get('Accept'), datetime.now().date().isoformat()))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+def _call_endpoint(f, user, *args, **kwargs):
+    """
+    Runs an endpoint function and records its duration for the access log.
+    
+    Answers 304 Not Modified without running the endpoint when If-None-Match
+    holds the current ETag, and serves the body from the response cache when
+    an entry for the same request key and negotiated content coding is present.
+    Successful responses are compressed if the client accepts it, carry the
+    ETag (if the backend tracks a data version; compressed representations get
+    their own tag) and are stored in the cache, compressed variants next to the
+    identity body.
+    
+    @param f: The Flask route function
+    @param user: Authenticated user dictionary
+    @return: The endpoint's response
+    """
+    started = time.perf_counter()
+    try:
+        data_version = current_app.extensions.get('data_version')
+        version = data_version() if data_version else None
+        key = _request_key(user, version)
+        encoding = negotiate_encoding()
+        # Without a data version a matching tag would not prove the data is unchanged
+        etag = key if version is not None else None
+        tags = (etag, variant_key(etag, encoding)) if etag is not None else ()
+        matched = next((tag for tag in tags if request.if_none_match.contains_weak(tag)), None)
+        if matched is not None:
+            logger.debug(f"Not modified: {request.path} for user {user['name']}")
+            response = current_app.response_class(status=304)
+            response.vary.add('Accept-Encoding')
+            response.set_etag(matched)
+        else:
+            response = _cached_or_fresh(f, key, version, encoding, *args, **kwargs)
+            if response.status_code != 200 or etag is None:
+                return response
+            response.set_etag(variant_key(etag, response.headers.get('Content-Encoding')))
+        # Per-user content: clients may keep it but must revalidate
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    finally:
+        add_timing('handler', time.perf_counter() - started)
+
+def _cached_or_fresh(f, key, version, encoding, *args, **kwargs):
+    """
+    Returns the response for a request key from the response cache or by running the endpoint.
+    
+    The cache is looked up first for the negotiated content coding, then for
+    the identity body (which is compressed and stored as the new variant). On a
+    miss the endpoint runs and both the identity body and the compressed variant
+    are stored.
+    
+    @param f: The Flask route function
+    @param key: Request key
+    @param version: Data version of the backend, or None if not tracked
+    @param encoding: Negotiated content coding, or None
+    @return: Compressed (if accepted and worth it) response
+    """
+    cache = current_app.extensions.get('response_cache')
+    ttl = cache.ttl_for(request.endpoint) if cache is not None else 0
+    if ttl <= 0:
+        return compress_response(make_response(f(*args, **kwargs)), encoding)
+    cached = cache.get(variant_key(key, encoding), version)
+    if cached is not None:
+        body, mimetype, content_encoding = cached
+        response = current_app.response_class(body, mimetype=mimetype)
+        if content_encoding is not None:
+            response.headers['Content-Encoding'] = content_encoding
+        response.vary.add('Accept-Encoding')
+        return response
+    cached = cache.get(key, version) if encoding is not None else None
+    if cached is not None:
+        body, mimetype, _ = cached
+        response = current_app.response_class(body, mimetype=mimetype)
+    else:
+        response = make_response(f(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return compress_response(response, encoding)
+        cache.put(key, version, response.get_data(), response.mimetype, ttl)
+        if encoding is None:
+            return compress_response(response, encoding)
+    compress_response(response, encoding)
+    # Stored even when left uncompressed (below the size threshold), so the next lookup hits the variant directly
+    cache.put(variant_key(key, encoding), version, response.get_data(), response.mimetype, ttl,
+              response.headers.get('Content-Encoding'))
+    return response
+
+def _shared(lookup, *args):
+    """
+    Runs a backend lookup once per /api/v1/batch call.
+    
+    Inside a batch the result is kept for the following sub-requests (they
+    share the application context and with it flask.g); outside a batch the
+    lookup simply runs. Callers must not modify the returned value.
+    
+    @param lookup: Bound backend method
+    @param args: Hashable arguments of the lookup
+    @return: Result of the lookup
+    """
+    memo = g.get('batch_memo')
+    if memo is None:
+        return lookup(*args)
+    key = (lookup.__name__, args)
+    if key not in memo:
+        memo[key] = lookup(*args)
+    return memo[key]
+
+def _run_subrequest(path, user):
+    """
+    Runs one sub-request of /api/v1/batch for an already authenticated user.
+    
+    The path is routed like a regular request in its own request context, so
+    the endpoint sees its query parameters and goes through the ETag and
+    response cache logic of require_auth, but not through authentication.
+    
+    @param path: Path with optional query string, e.g. /api/v1/timeline?days=7
+    @param user: Authenticated user dictionary
+    @return: Dictionary with the path, the HTTP status and the decoded JSON body
+    """
+    environ = EnvironBuilder(path=path, method='GET', headers={'Accept': 'application/json'},
+                             environ_base={'REMOTE_ADDR': request.remote_addr}).get_environ()
+    with current_app.request_context(environ):
+        view = current_app.view_functions.get(request.endpoint) if request.routing_exception is None else None
+        # Only endpoints behind require_auth can run without their own authentication
+        if view is None or not hasattr(view, '__wrapped__') or request.endpoint == 'get_batch':
+            return {'path': path, 'status': 404, 'body': {'error': 'Endpoint not available in batch'}}
+        request.user = user
+        response = _call_endpoint(view.__wrapped__, user, **request.view_args)
+        return {'path': path, 'status': response.status_code, 'body': response.get_json(silent=True)}
+
 def require_auth(f):
     """
     Decorator to require authentication for API endpoints.
@@ -28,13 +347,25 @@ def require_auth(f):
     def decorated_function(*args, **kwargs):
         try:
             client_ip = request.remote_addr
-            user_agent = request.headers.get('User-Agent', 'Unknown')
-            logger.info(f"Request {request.path} from {client_ip} - {user_agent}")
             
             if request.method != 'GET':
                 logger.warning(f"Attempted non-GET request from {client_ip}")
                 return jsonify({'error': 'Only GET requests are allowed'}), 405
             
+            auth_started = time.perf_counter()
+            # Session token issued by /api/v1/login: no access code hashing per request
+            token = _bearer_token()
+            if token:
+                user = verify_session(token)
+                add_timing('auth', time.perf_counter() - auth_started)
+                if not user:
+                    logger.warning(f"Invalid or expired session token from {client_ip}")
+                    return jsonify({'error': 'Invalid or expired session token'}), 401
+                request.user = user
+                annotate(user=user.get('login'))
+                logger.debug(f"Session of {user['name']} authenticated for access to {request.path}")
+                return _call_endpoint(f, user, *args, **kwargs)
+            
             login = request.args.get('login')
             code = request.args.get('code')
             
@@ -47,13 +378,15 @@ def require_auth(f):
                 return jsonify({'error': 'Invalid authentication parameters'}), 400
             
             auth_success, user = authenticate_user(login, code)
+            add_timing('auth', time.perf_counter() - auth_started)
             if not auth_success:
                 logger.warning(f"Failed authentication for user {login} from {client_ip}")
                 return jsonify({'error': 'Invalid credentials'}), 401
             
             request.user = user
+            annotate(user=user.get('login'))
             logger.debug(f"User {login} authenticated for access to {request.path}")
-            return f(*args, **kwargs)
+            return _call_endpoint(f, user, *args, **kwargs)
         
         except Exception as e:
             logger.error(f"Error in authentication decorator: {e}")
@@ -61,21 +394,66 @@ def require_auth(f):
     
     return decorated_function
 
-def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEGORIES, TEST_TICKETS, TEST_COMMENTS, TEST_LOGS):
+def create_endpoints(app, backend, monitors=None, response_cache=None):
     """
     Defines and registers all API endpoints with the Flask app.
     
     @param app: The Flask application instance to register endpoints with
-    @param TEST_USERS: List of users loaded from the database
-    @param TEST_STAFF: List of staff members loaded from the database
-    @param TICKET_STATUSES: List of ticket statuses loaded from the database
-    @param PROBLEM_CATEGORIES: List of problem categories loaded from the database
-    @param TEST_TICKETS: List of tickets loaded from the database
-    @param TEST_COMMENTS: List of comments loaded from the database
-    @param TEST_LOGS: List of logs loaded from the database
+    @param backend: MemoryBackend or SqlBackend answering the data queries (see data_backend.py)
+    @param monitors: Optional mapping of name to a zero-argument callable returning
+                     statistics that are reported by the health endpoint
+    @param response_cache: Optional ResponseCache used by require_auth for the endpoint responses
     @return: None (registers endpoints directly to the app)
     """
+    monitors = monitors or {}
+    # Used by require_auth to derive ETags; None from the backend disables them
+    app.extensions['data_version'] = backend.data_version
+    app.extensions['response_cache'] = response_cache
     
+    @app.route('/api/v1/login', methods=['POST'])
+    def login():
+        """
+        API endpoint exchanging login and code (JSON or form body) for a session token.
+        
+        @return: JSON response containing the token and its lifetime in seconds
+        """
+        try:
+            client_ip = request.remote_addr
+            body = request.get_json(silent=True) or request.form
+            login_name = body.get('login')
+            code = body.get('code')
+            if not login_name or not code:
+                logger.warning(f"Missing credentials in login request from {client_ip}")
+                return jsonify({'error': 'Login and code parameters required'}), 401
+            if not isinstance(login_name, str) or not isinstance(code, str) or len(login_name) > 50 or len(code) > 100:
+                logger.warning(f"Invalid login parameters from {client_ip}")
+                return jsonify({'error': 'Invalid authentication parameters'}), 400
+            
+            auth_success, user = authenticate_user(login_name, code)
+            if not auth_success:
+                logger.warning(f"Failed login for user {login_name} from {client_ip}")
+                return jsonify({'error': 'Invalid credentials'}), 401
+            
+            token, expires_in = create_session(user)
+            logger.info(f"Session issued for user {user['name']} from {client_ip}")
+            return jsonify({'token': token, 'token_type': 'Bearer', 'expires_in': expires_in})
+        except Exception as e:
+            logger.error(f"Error during login: {e}")
+            return jsonify({'error': 'Internal server error during authentication'}), 500
+
+    @app.route('/api/v1/logout', methods=['POST'])
+    def logout():
+        """
+        API endpoint revoking the session token sent in the Authorization header.
+        
+        @return: JSON response confirming the logout
+        """
+        token = _bearer_token()
+        if not token or not revoke_session(token):
+            return jsonify({'error': 'Invalid or expired session token'}), 401
+        logger.info(f"Session revoked from {request.remote_addr}")
+        return jsonify({'status': 'logged_out'})
+
     @app.route('/api/v1/profile', methods=['GET'])
     @require_auth
     def get_profile():
@@ -86,14 +464,14 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         try:
             user = request.user
-            staff_tickets = get_tickets_by_staff(user['staff_id'], TEST_TICKETS) if TEST_TICKETS else []
+            staff_counts = _shared(backend.staff_counts, user['staff_id'])
             profile_data = {
                 'staff_id': user['staff_id'],
                 'name': user['name'],
                 'role': user['role'],
                 'departments_access': user['departments'],
-                'assigned_tickets_count': len(staff_tickets),
-                'active_tickets_count': len([t for t in staff_tickets if t.get('status_id') in [1, 2, 3]])
+                'assigned_tickets_count': staff_counts['assigned'],
+                'active_tickets_count': staff_counts['active']
             }
             logger.info(f"Profile for user {user['name']} sent successfully")
             return jsonify(profile_data)
@@ -111,25 +489,17 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         try:
             user = request.user
-            all_departments = get_departments_from_db()
-            if not all_departments:
-                logger.error("Could not fetch departments from DB")
-                return jsonify({'error': 'Error fetching data from database'}), 500
-            
             # Filter departments the user has access to
-            accessible_departments = [dept for dept in all_departments if dept in user['departments']]
+            accessible_departments = [dept for dept in backend.departments() if dept in user['departments']]
+            # Ticket counters and active staff of each department
+            breakdown = backend.department_breakdown(accessible_departments)
             departments_data = []
             for dept in accessible_departments:
-                # Count tickets associated with staff from this department
-                dept_staff_ids = [s['staff_id'] for s in TEST_STAFF if s.get('department') == dept]
-                dept_tickets = [t for t in TEST_TICKETS if t.get('assigned_staff_id') in dept_staff_ids]
-                active_dept_tickets = [t for t in dept_tickets if t.get('status_id') in [1, 2, 3]]
-                active_staff_count = len([s for s in TEST_STAFF if s.get('department') == dept and s.get('is_active')])
                 departments_data.append({
                     'name': dept,
-                    'ticket_count': len(dept_tickets),
-                    'active_tickets': len(active_dept_tickets),
-                    'staff_count': active_staff_count
+                    'ticket_count': breakdown[dept]['assigned'],
+                    'active_tickets': breakdown[dept]['active'],
+                    'staff_count': breakdown[dept]['staff_count']
                 })
             logger.info(f"Data for {len(departments_data)} departments sent for user {user['name']}")
             return jsonify(departments_data)
@@ -147,23 +517,56 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         try:
             user = request.user
-            staff_id = user['staff_id']
-            # Get tickets assigned to the staff member
-            staff_tickets = get_tickets_by_staff(staff_id, TEST_TICKETS) if TEST_TICKETS else []
-            # Enrich data
-            enriched_tickets = []
-            for ticket in staff_tickets:
-                enriched_ticket = ticket.copy()
-                status_name = get_status_by_id(ticket['status_id'], TICKET_STATUSES) if TICKET_STATUSES else None
-                category_name = get_category_by_id(ticket['category_id'], PROBLEM_CATEGORIES) if PROBLEM_CATEGORIES else None
-                user_name = get_user_by_id(ticket['user_id'], TEST_USERS) if TEST_USERS else None
-                enriched_ticket['status_name'] = status_name['status_name'] if status_name else 'Unknown'
-                enriched_ticket['category_name'] = category_name['category_name'] if category_name else 'Unknown'
-                enriched_ticket['user_name'] = user_name['full_name'] if user_name else 'Unknown'
-                enriched_ticket['comments_count'] = len(get_comments_by_ticket(ticket['ticket_id'], TEST_COMMENTS)) if TEST_COMMENTS else 0
-                enriched_tickets.append(enriched_ticket)
-            logger.info(f"Sent {len(enriched_tickets)} tickets for user {user['name']}")
-            return jsonify(enriched_tickets)
+            detail = request.args.get('detail') in ('1', 'true')
+            try:
+                fields = _fields_arg(TICKET_DETAIL_FIELDS if detail else TICKET_FIELDS)
+                ticket_ids = _id_list_arg('ids', MAX_BATCH_IDS)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if ticket_ids is not None:
+                # Several tickets (or their details) in one request instead of one request per ticket;
+                # the IDs are needed to report the missing ones even if the client did not ask for them
+                tickets = backend.tickets_by_ids(user['staff_id'], ticket_ids, detail=detail,
+                                                 fields=fields | {'ticket_id'} if fields is not None else None)
+                found = {ticket['ticket_id'] for ticket in tickets}
+                if fields is not None and 'ticket_id' not in fields:
+                    for ticket in tickets:
+                        del ticket['ticket_id']
+                logger.info(f"Sent {len(tickets)} of {len(ticket_ids)} requested tickets for user {user['name']}")
+                return jsonify({
+                    'tickets': tickets,
+                    'missing': [ticket_id for ticket_id in ticket_ids if ticket_id not in found]
+                })
+            if not any(name in request.args for name in _TICKET_PAGE_PARAMS):
+                mode = stream_mode()
+                if mode:
+                    logger.info(f"Streaming tickets ({mode}) for user {user['name']}")
+                    return stream_response(backend.iter_staff_tickets(user['staff_id'], fields), mode)
+                # Get tickets assigned to the staff member, enriched with names and comment counts
+                enriched_tickets = backend.staff_tickets(user['staff_id'], fields)
+                logger.info(f"Sent {len(enriched_tickets)} tickets for user {user['name']}")
+                return jsonify(enriched_tickets)
+            
+            try:
+                limit = _int_arg('limit', default=TICKETS_PAGE_SIZE)
+                after = _cursor_arg('after', datetime.fromisoformat, int)
+                created_from, created_to = _date_range_arg('created')
+                closed_from, closed_to = _date_range_arg('closed')
+                statuses = _id_set_arg('status')
+                categories = _id_set_arg('category')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            tickets, next_key = backend.ticket_page(
+                user['staff_id'], limit, after=after, statuses=statuses, categories=categories,
+                created_from=created_from, created_to=created_to, closed_from=closed_from, closed_to=closed_to,
+                fields=fields
+            )
+            logger.info(f"Sent a page of {len(tickets)} tickets for user {user['name']}")
+            return jsonify({
+                'tickets': tickets,
+                'next_after': _encode_cursor(next_key) if next_key is not None else None
+            })
         except Exception as e:
             logger.error(f"Error retrieving tickets: {e}")
             return jsonify({'error': 'Internal server error'}), 500
@@ -179,37 +582,32 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         try:
             user = request.user
-            ticket = next((t for t in TEST_TICKETS if t.get('ticket_id') == ticket_id), None)
-            if not ticket:
+            try:
+                fields = _fields_arg(TICKET_DETAIL_FIELDS)
+                pages = {}
+                for part in ('comments', 'logs'):
+                    pages[f"{part}_limit"] = _int_arg(f"{part}_limit")
+                    after = _cursor_arg(f"{part}_after", int)
+                    pages[f"{part}_after"] = after[0] if after else None
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            # The access check needs the assignee even if the client did not ask for it
+            enriched_ticket = backend.ticket_detail(
+                ticket_id, **pages, fields=fields | {'assigned_staff_id'} if fields is not None else None
+            )
+            if not enriched_ticket:
                 return jsonify({'error': 'Ticket not found'}), 404
             
             # Check access to the ticket
-            if ticket.get('assigned_staff_id') != user['staff_id']:
+            if enriched_ticket.get('assigned_staff_id') != user['staff_id']:
                 return jsonify({'error': 'Access to ticket forbidden'}), 403
+            if fields is not None and 'assigned_staff_id' not in fields:
+                del enriched_ticket['assigned_staff_id']
             
-            # Enrich ticket data
-            enriched_ticket = ticket.copy()
-            status_info = get_status_by_id(ticket['status_id'], TICKET_STATUSES) if TICKET_STATUSES else None
-            category_info = get_category_by_id(ticket['category_id'], PROBLEM_CATEGORIES) if PROBLEM_CATEGORIES else None
-            user_info = get_user_by_id(ticket['user_id'], TEST_USERS) if TEST_USERS else None
-            staff_info = get_staff_by_id(ticket['assigned_staff_id'], TEST_STAFF) if TEST_STAFF else None
-            enriched_ticket['status_name'] = status_info['status_name'] if status_info else 'Unknown'
-            enriched_ticket['category_name'] = category_info['category_name'] if category_info else 'Unknown'
-            enriched_ticket['user_name'] = user_info['full_name'] if user_info else 'Unknown'
-            enriched_ticket['assigned_staff_name'] = staff_info['full_name'] if staff_info else 'Unknown'
-            
-            # Add comments
-            enriched_ticket['comments'] = get_comments_by_ticket(ticket_id, TEST_COMMENTS) if TEST_COMMENTS else []
-            for comment in enriched_ticket['comments']:
-                if comment.get('author_type') == 'user':
-                    author_info = get_user_by_id(comment['author_id'], TEST_USERS) if TEST_USERS else None
-                    comment['author_name'] = author_info['full_name'] if author_info else 'Unknown'
-                else:
-                    author_info = get_staff_by_id(comment['author_id'], TEST_STAFF) if TEST_STAFF else None
-                    comment['author_name'] = author_info['full_name'] if author_info else 'Unknown'
-            
-            # Add logs
-            enriched_ticket['logs'] = get_logs_by_ticket(ticket_id, TEST_LOGS) if TEST_LOGS else []
+            for field in ('comments_next_after', 'logs_next_after'):
+                if enriched_ticket.get(field) is not None:
+                    enriched_ticket[field] = _encode_cursor([enriched_ticket[field]])
             logger.info(f"Detail information for ticket {ticket_id} sent to user {user['name']}")
             return jsonify(enriched_ticket)
         except Exception as e:
@@ -226,15 +624,17 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         try:
             user = request.user
+            try:
+                fields = _fields_arg(STAFF_FIELDS)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             # Get only active staff from departments the user has access to
-            accessible_departments = user['departments']
-            active_staff = [s for s in TEST_STAFF if s.get('is_active') and any(dept in accessible_departments for dept in [s.get('department', '')])]
-            # Add ticket statistics for each staff member
-            for staff_member in active_staff:
-                staff_tickets = get_tickets_by_staff(staff_member['staff_id'], TEST_TICKETS) if TEST_TICKETS else []
-                staff_member['assigned_tickets'] = len(staff_tickets)
-                staff_member['active_tickets'] = len([t for t in staff_tickets if t.get('status_id') in [1, 2, 3]])
-                staff_member['resolved_tickets'] = len([t for t in staff_tickets if t.get('status_id') in [4, 5]])
+            # with ticket statistics for each staff member
+            mode = stream_mode()
+            if mode:
+                logger.info(f"Streaming staff members ({mode}) for user {user['name']}")
+                return stream_response(backend.iter_staff_members(user['departments'], fields), mode)
+            active_staff = backend.staff_members(user['departments'], fields)
             logger.info(f"Data for {len(active_staff)} staff members sent for user {user['name']}")
             return jsonify(active_staff)
         except Exception as e:
@@ -251,42 +651,24 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         try:
             user = request.user
-            staff_id = user['staff_id']
-            staff_tickets = get_tickets_by_staff(staff_id, TEST_TICKETS) if TEST_TICKETS else []
-            all_tickets = TEST_TICKETS or []
+            staff_counts = _shared(backend.staff_counts, user['staff_id'])
             
             # Calculate metrics
-            total_tickets = len(staff_tickets)
-            resolved_tickets = len([t for t in staff_tickets if t.get('status_id') in [4, 5]])
-            active_tickets = len([t for t in staff_tickets if t.get('status_id') in [1, 2, 3]])
+            total_tickets = staff_counts['assigned']
+            resolved_tickets = staff_counts['resolved']
+            active_tickets = staff_counts['active']
             
-            # Calculate average resolution time
-            resolved_times = []
-            for ticket in staff_tickets:
-                if ticket.get('closed_at') and ticket.get('created_at'):
-                    try:
-                        resolution_time = (ticket['closed_at'] - ticket['created_at']).total_seconds() / 3600 # in hours
-                        resolved_times.append(resolution_time)
-                    except TypeError:
-                        continue  # Skip if datetime calculation fails
-            
-            avg_resolution_time = sum(resolved_times) / len(resolved_times) if resolved_times else 0
+            # Calculate average resolution time (in hours) and its percentiles
+            avg_resolution_time = backend.avg_resolution_hours(user['staff_id'])
+            resolution_percentiles = backend.duration_quantiles('resolution', staff_id=user['staff_id'])
+            dept_resolution_percentiles = _shared(backend.duration_quantiles, 'resolution', None, tuple(user['departments']))
+            # Time to the first staff reply, from the first-reply index
+            first_response_percentiles = _shared(backend.duration_quantiles, 'first_response', user['staff_id'])
+            dept_first_response_percentiles = _shared(backend.duration_quantiles, 'first_response', None, tuple(user['departments']))
             
             # Department category statistics
-            dept_staff_ids = [s['staff_id'] for s in TEST_STAFF if s.get('department') in user['departments']]
-            dept_tickets = [t for t in all_tickets if t.get('assigned_staff_id') in dept_staff_ids]
-            category_counts = {}
-            for ticket in dept_tickets:
-                cat_id = ticket.get('category_id')
-                if cat_id is not None:
-                    category_counts[cat_id] = category_counts.get(cat_id, 0) + 1
-            
-            most_common_category_id = max(category_counts, key=category_counts.get, default=None)
-            most_common_category_name = 'No data'
-            if most_common_category_id is not None:
-                category_info = get_category_by_id(most_common_category_id, PROBLEM_CATEGORIES) if PROBLEM_CATEGORIES else None
-                if category_info:
-                    most_common_category_name = category_info.get('category_name', 'No data')
+            dept_counts = _shared(backend.department_counts, tuple(user['departments']))
+            most_common_category_name = backend.most_common_category(user['departments']) or 'No data'
             
             metrics = {
                 'personal_metrics': {
@@ -295,12 +677,17 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
                     'active_tickets': active_tickets,
                     'resolution_rate': f"{(resolved_tickets / total_tickets * 100) if total_tickets > 0 else 0:.1f}%",
                     'avg_resolution_time': f"{avg_resolution_time:.1f} hours",
+                    'resolution_time_hours': resolution_percentiles,
+                    'avg_first_response_time': _hours_text(first_response_percentiles['mean']),
+                    'first_response_time_hours': first_response_percentiles,
                     'satisfaction_rate': f"{random.randint(85, 98)}%"
                 },
                 'department_metrics': {
-                    'total_tickets': len(dept_tickets),
-                    'resolved_tickets': len([t for t in dept_tickets if t.get('status_id') in [4, 5]]),
-                    'avg_first_response_time': '2.1 hours', # Placeholder
+                    'total_tickets': dept_counts['assigned'],
+                    'resolved_tickets': dept_counts['resolved'],
+                    'resolution_time_hours': dept_resolution_percentiles,
+                    'avg_first_response_time': _hours_text(dept_first_response_percentiles['mean']),
+                    'first_response_time_hours': dept_first_response_percentiles,
                     'most_common_category': most_common_category_name
                 }
             }
@@ -316,35 +703,68 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         API endpoint to retrieve ticket timeline data for the authenticated user.
         
+        Without further parameters the last `days` days are returned per day. The
+        granularity (hour, day, week, month) and an arbitrary from / to period can
+        be chosen; managers can ask for their departments with scope=department.
+        Created and closed timestamps are bucketed in one pass by the backend.
+        
         @return: JSON response containing timeline data for the specified period
         """
         try:
             user = request.user
+            extended = any(name in request.args for name in ('granularity', 'from', 'to', 'scope'))
+            granularity = request.args.get('granularity', 'day')
+            scope = request.args.get('scope', 'personal')
+            if granularity not in GRANULARITIES:
+                return jsonify({'error': f"Parameter granularity must be one of: {', '.join(GRANULARITIES)}"}), 400
+            if scope not in ('personal', 'department'):
+                return jsonify({'error': 'Parameter scope must be personal or department'}), 400
+            if scope == 'department' and user['role'] not in ('manager', 'admin'):
+                return jsonify({'error': 'Department timeline is available to managers only'}), 403
+            
             days = request.args.get('days', 30, type=int)
             if days > 365:
                 days = 365
             if days < 1:
                 days = 1
+            try:
+                start, end = _date_range_arg()
+                if end is None:
+                    end = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+                if start is None:
+                    start = end - timedelta(days=days)
+                if start >= end:
+                    raise ValueError('Parameter from must not be after to')
+                edges = bucket_edges(start, end, granularity, TIMELINE_MAX_BUCKETS)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             
-            staff_tickets = get_tickets_by_staff(user['staff_id'], TEST_TICKETS) if TEST_TICKETS else []
-            base_date = datetime.now()
+            if scope == 'department':
+                created_counts, resolved_counts = backend.activity_histogram(edges, granularity, departments=user['departments'])
+            else:
+                created_counts, resolved_counts = backend.activity_histogram(edges, granularity, staff_id=user['staff_id'])
             timeline_data = []
-            for i in range(days):
-                date = base_date - timedelta(days=days - i - 1)
-                date_str = date.strftime('%Y-%m-%d')
-                day_tickets = [t for t in staff_tickets if t.get('created_at') and t['created_at'].date() == date.date()]
-                day_resolved = [t for t in staff_tickets if t.get('closed_at') and t['closed_at'].date() == date.date()]
+            for i, bucket_start in enumerate(edges[:-1]):
                 timeline_data.append({
-                    'date': date_str,
-                    'tickets_created': len(day_tickets),
-                    'tickets_resolved': len(day_resolved),
+                    'date': bucket_label(bucket_start, granularity),
+                    'tickets_created': created_counts[i],
+                    'tickets_resolved': resolved_counts[i],
                     'satisfaction_rate': random.randint(85, 98)
                 })
-            logger.info(f"Timeline data for {days} days sent for user {user['name']}")
-            return jsonify({
-                'period_days': days,
+            period_days = (edges[-1] - edges[0]).days
+            logger.info(f"Timeline data for {period_days} days ({granularity}, {scope}) sent for user {user['name']}")
+            timeline = {
+                'period_days': period_days,
                 'data': timeline_data
-            })
+            }
+            if extended:
+                timeline.update({
+                    'granularity': granularity,
+                    'scope': scope,
+                    'from': edges[0].isoformat(),
+                    'to': edges[-1].isoformat()
+                })
+            return jsonify(timeline)
         except Exception as e:
             logger.error(f"Error retrieving timeline: {e}")
             return jsonify({'error': 'Internal server error'}), 500
@@ -359,21 +779,22 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         try:
             user = request.user
-            staff_tickets = get_tickets_by_staff(user['staff_id'], TEST_TICKETS) if TEST_TICKETS else []
+            staff_counts = _shared(backend.staff_counts, user['staff_id'])
             # Compare with the user's department
-            dept_staff_ids = [s['staff_id'] for s in TEST_STAFF if s.get('department') in user['departments']]
-            dept_tickets = [t for t in (TEST_TICKETS or []) if t.get('assigned_staff_id') in dept_staff_ids]
-            user_resolution_rate = len([t for t in staff_tickets if t.get('status_id') in [4, 5]]) / len(staff_tickets) * 100 if staff_tickets else 0
-            avg_resolution_rate = len([t for t in dept_tickets if t.get('status_id') in [4, 5]]) / len(dept_tickets) * 100 if dept_tickets else 0
+            dept_counts = _shared(backend.department_counts, tuple(user['departments']))
+            user_resolution_rate = staff_counts['resolved'] / staff_counts['assigned'] * 100 if staff_counts['assigned'] else 0
+            avg_resolution_rate = dept_counts['resolved'] / dept_counts['assigned'] * 100 if dept_counts['assigned'] else 0
+            first_response = _shared(backend.duration_quantiles, 'first_response', user['staff_id'])
+            dept_first_response = _shared(backend.duration_quantiles, 'first_response', None, tuple(user['departments']))
             return jsonify({
                 'your_performance': {
                     'resolution_rate': f"{user_resolution_rate:.1f}%",
-                    'avg_response_time': '1.8 hours', # Placeholder
+                    'avg_response_time': _hours_text(first_response['mean']),
                     'satisfaction_rate': f"{random.randint(88, 98)}%"
                 },
                 'department_average': {
                     'resolution_rate': f"{avg_resolution_rate:.1f}%",
-                    'avg_response_time': '2.5 hours', # Placeholder
+                    'avg_response_time': _hours_text(dept_first_response['mean']),
                     'satisfaction_rate': '89%' # Placeholder
                 },
                 'top_performer': {
@@ -392,20 +813,46 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         """
         API endpoint to retrieve forecast and trend analysis for the authenticated user.
         
+        The backend fits the models of all staff members and departments at once
+        and keeps them until the data changes, so a request only sums the rows of
+        the requested scope. Managers can ask for their departments with scope=department.
+        
         @return: JSON response containing forecast data and trend analysis
         """
         try:
             user = request.user
+            scope = request.args.get('scope', 'personal')
+            if scope not in ('personal', 'department'):
+                return jsonify({'error': 'Parameter scope must be personal or department'}), 400
+            if scope == 'department' and user['role'] not in ('manager', 'admin'):
+                return jsonify({'error': 'Department forecast is available to managers only'}), 403
+            if scope == 'department':
+                forecast = backend.forecast(departments=user['departments'])
+            else:
+                forecast = backend.forecast(staff_id=user['staff_id'])
+            
+            expected_tickets = forecast['expected_tickets']
+            expected_resolved = forecast['expected_resolved']
+            recent_tickets = forecast['created_recent']
+            busiest = max(forecast['daily'], key=lambda day: day['tickets_created'])
+            logger.info(f"Forecast ({scope}) sent for user {user['name']}")
             return jsonify({
                 'next_week_forecast': {
-                    'expected_tickets': random.randint(15, 25), # Placeholder
-                    'expected_resolution_rate': f"{random.randint(75, 90)}%", # Placeholder
-                    'busiest_day': random.choice(['Monday', 'Tuesday']) # Placeholder
+                    'expected_tickets': round(expected_tickets),
+                    'expected_resolution_rate': f"{min(expected_resolved / expected_tickets * 100, 100):.0f}%"
+                                                if expected_tickets else 'No data',
+                    'busiest_day': busiest['date'].strftime('%A') if busiest['tickets_created'] else 'No data',
+                    'daily': [{
+                        'date': day['date'].isoformat(),
+                        'tickets_created': day['tickets_created'],
+                        'tickets_resolved': day['tickets_resolved']
+                    } for day in forecast['daily']]
                 },
                 'trend_analysis': {
-                    'ticket_growth': f"+{random.randint(5, 15)}%", # Placeholder
-                    'resolution_trend': 'improvement', # Placeholder
-                    'risk_factors': ['Seasonal load', 'System updates'] # Placeholder
+                    'ticket_growth': f"{(expected_tickets - recent_tickets) / recent_tickets * 100:+.0f}%"
+                                     if recent_tickets else 'No data',
+                    'resolution_trend': resolution_trend(forecast),
+                    'risk_factors': risk_factors(forecast)
                 }
             })
         except Exception as e:
@@ -423,21 +870,53 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
         try:
             user = request.user
             # Category statistics for the current staff member
-            staff_tickets = get_tickets_by_staff(user['staff_id'], TEST_TICKETS) if TEST_TICKETS else []
+            resolution_percentiles = backend.category_duration_quantiles('resolution', user['staff_id'])
             category_stats = []
-            for category in (PROBLEM_CATEGORIES or []):
-                category_tickets = [t for t in staff_tickets if t.get('category_id') == category.get('category_id')]
+            for counts in backend.category_counts(user['staff_id']):
                 category_stats.append({
-                    'category_id': category['category_id'],
-                    'category_name': category['category_name'],
-                    'ticket_count': len(category_tickets),
-                    'resolution_rate': f"{(len([t for t in category_tickets if t.get('status_id') in [4, 5]]) / len(category_tickets) * 100) if category_tickets else 0:.1f}%"
+                    'category_id': counts['category_id'],
+                    'category_name': counts['category_name'],
+                    'ticket_count': counts['assigned'],
+                    'resolution_rate': f"{(counts['resolved'] / counts['assigned'] * 100) if counts['assigned'] else 0:.1f}%",
+                    'resolution_time_hours': resolution_percentiles.get(counts['category_id'], {
+                        'count': 0, 'mean': None, **{name: None for name in REPORTED_QUANTILES}
+                    })
                 })
             return jsonify(category_stats)
         except Exception as e:
             logger.error(f"Error retrieving categories: {e}")
             return jsonify({'error': 'Internal server error'}), 500
 
+    @app.route('/api/v1/batch', methods=['GET'])
+    @require_auth
+    def get_batch():
+        """
+        API endpoint running several read requests under one authentication.
+        
+        Each path parameter is one sub-request (path with its own query string,
+        URL-encoded). Lookups shared between the sub-requests, such as the
+        user's ticket counts, are computed once per batch.
+        
+        @return: JSON response with one result (path, status, body) per sub-request, in request order
+        """
+        try:
+            user = request.user
+            paths = request.args.getlist('path')
+            if not paths:
+                return jsonify({'error': 'At least one path parameter required'}), 400
+            if len(paths) > MAX_BATCH_REQUESTS:
+                return jsonify({'error': f"At most {MAX_BATCH_REQUESTS} paths per batch"}), 400
+            g.batch_memo = {}
+            try:
+                results = [_run_subrequest(path, user) for path in paths]
+            finally:
+                g.pop('batch_memo', None)
+            logger.info(f"Batch of {len(paths)} requests sent for user {user['name']}")
+            return jsonify({'results': results})
+        except Exception as e:
+            logger.error(f"Error processing batch: {e}")
+            return jsonify({'error': 'Internal server error'}), 500
+
     @app.route('/api/v1/health', methods=['GET'])
     def health_check():
         """
@@ -451,13 +930,10 @@ def create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEG
                 'status': 'healthy',
                 'timestamp': datetime.now().isoformat(),
                 'version': '1.0.0',
-                'data_counts': {
-                    'users': len(TEST_USERS) if TEST_USERS else 0,
-                    'staff': len(TEST_STAFF) if TEST_STAFF else 0,
-                    'tickets': len(TEST_TICKETS) if TEST_TICKETS else 0,
-                    'comments': len(TEST_COMMENTS) if TEST_COMMENTS else 0,
-                    'logs': len(TEST_LOGS) if TEST_LOGS else 0
-                }
+                'data_counts': backend.counts(),
+                'data_backend': backend.stats(),
+                'db_pool': get_pool_stats(),
+                **{name: stats() for name, stats in monitors.items()}
             })
         except Exception as e:
             logger.error(f"Error in health check: {e}")
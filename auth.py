@@ -1,13 +1,29 @@
 import hashlib
+import hmac
 import secrets
 import logging
-from constants import DEFAULT_USERS
-from db_utils import get_db_connection, get_staff_by_id
-from psycopg2.extras import RealDictCursor
+import threading
+import time
+from collections import OrderedDict
+import psycopg2
+from constants import (
+    SESSION_SECRET, SESSION_TTL, SESSION_MAX_ENTRIES, PBKDF2_ITERATIONS,
+    CREDENTIAL_CACHE_SIZE, CREDENTIAL_CACHE_TTL, CREDENTIAL_NEGATIVE_TTL, CREDENTIAL_CACHED_CODES
+)
+from db_utils import fetch_staff_credentials
 import re
 
 logger = logging.getLogger(__name__)
 
+# Prefix of access code hashes produced by hash_code(); other hashes are treated as legacy SHA-256 hex digests
+PBKDF2_PREFIX = 'pbkdf2_sha256'
+# Hash verified for unknown logins so they take as long as known ones (fixed salt, never matches a real code)
+_DUMMY_HASH = f"{PBKDF2_PREFIX}${PBKDF2_ITERATIONS}${'00' * 16}${'00' * 32}"
+
+if not SESSION_SECRET:
+    logger.warning("API_SESSION_SECRET is not set, session tokens are signed with a random per-process key")
+_signing_key = (SESSION_SECRET or secrets.token_hex(32)).encode('utf-8')
+
 def validate_username(username):
     """
     Validates the username format to prevent SQL injection and other attacks.
@@ -22,27 +38,246 @@ def validate_username(username):
     pattern = r'^[a-zA-Z0-9_-]{1,50}$'
     return bool(re.match(pattern, username))
 
+class CredentialCache:
+    """
+    LRU cache of credential lookups with a TTL and negative caching.
+    
+    Found logins are kept for CREDENTIAL_CACHE_TTL seconds and unknown ones
+    for the shorter CREDENTIAL_NEGATIVE_TTL, so neither valid traffic nor
+    repeated attempts with a wrong login query the database per request.
+    Each entry also remembers the outcome of the last few code checks, keyed
+    by a keyed digest of the code, so a repeated ?login=&code= request skips
+    the PBKDF2 verification. Outcomes are read and written through the entry
+    returned by get() or put(), so a check made against credentials that were
+    replaced in the meantime is never recorded for the new ones.
+    invalidate() drops entries after the underlying rows changed.
+    """
+
+    def __init__(self, max_entries=CREDENTIAL_CACHE_SIZE, ttl=CREDENTIAL_CACHE_TTL, negative_ttl=CREDENTIAL_NEGATIVE_TTL):
+        """
+        @param max_entries: Maximum number of cached logins
+        @param ttl: Seconds a found login is cached
+        @param negative_ttl: Seconds an unknown login is cached
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'negative_hits': 0, 'verdict_hits': 0, 'misses': 0, 'evicted': 0, 'invalidated': 0}
+
+    def get(self, login):
+        """
+        Looks up a cached login.
+        
+        @param login: Login name
+        @return: Tuple (found, user_data, entry); user_data is None for a cached unknown login,
+                 entry identifies the cached lookup for verdict() and put_verdict()
+        """
+        with self._lock:
+            entry = self._entries.get(login)
+            if entry is None or entry[1] <= time.monotonic():
+                self._entries.pop(login, None)
+                self._stats['misses'] += 1
+                return False, None, None
+            self._entries.move_to_end(login)
+            self._stats['hits' if entry[0] is not None else 'negative_hits'] += 1
+            return True, entry[0], entry
+
+    def _current(self, login, entry):
+        """
+        Checks that an entry is still the live cache entry of a login. Must be called with the lock held.
+        
+        @param login: Login name
+        @param entry: Entry from get() or put(), or None
+        @return: True if the entry is cached for the login and not expired
+        """
+        return entry is not None and self._entries.get(login) is entry and entry[1] > time.monotonic()
+
+    def verdict(self, login, entry, code_digest):
+        """
+        Looks up the cached outcome of a code check.
+        
+        @param login: Login name
+        @param entry: Entry from get() or put() that the credentials were taken from
+        @param code_digest: Digest of the code from _code_digest()
+        @return: True or False if this code was checked against the same cached lookup, otherwise None
+        """
+        with self._lock:
+            if not self._current(login, entry):
+                return None
+            valid = entry[2].get(code_digest)
+            if valid is not None:
+                self._stats['verdict_hits'] += 1
+            return valid
+
+    def put_verdict(self, login, entry, code_digest, valid):
+        """
+        Remembers the outcome of a code check for as long as the entry stays cached,
+        keeping at most CREDENTIAL_CACHED_CODES outcomes per login. Nothing is stored
+        if the entry was invalidated or replaced since the credentials were read.
+        
+        @param login: Login name
+        @param entry: Entry from get() or put() that the code was checked against
+        @param code_digest: Digest of the code from _code_digest()
+        @param valid: True if the code matched
+        @return: None
+        """
+        with self._lock:
+            if not self._current(login, entry):
+                return
+            verdicts = entry[2]
+            verdicts[code_digest] = valid
+            while len(verdicts) > CREDENTIAL_CACHED_CODES:
+                del verdicts[next(iter(verdicts))]
+
+    def put(self, login, user_data):
+        """
+        Caches the result of a lookup, evicting the least recently used login if full.
+        
+        @param login: Login name
+        @param user_data: User dictionary, or None if the login does not exist
+        @return: The new entry, for verdict() and put_verdict()
+        """
+        ttl = self.ttl if user_data is not None else self.negative_ttl
+        entry = (user_data, time.monotonic() + ttl, {})
+        with self._lock:
+            self._entries[login] = entry
+            self._entries.move_to_end(login)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evicted'] += 1
+        return entry
+
+    def invalidate(self, staff_ids=None):
+        """
+        Drops cached entries after credentials changed. Negative entries are always
+        dropped, since the change may have added one of those logins.
+        
+        @param staff_ids: Iterable of changed staff IDs, or None to clear the whole cache
+        @return: None
+        """
+        with self._lock:
+            if staff_ids is None:
+                dropped = list(self._entries)
+            else:
+                staff_ids = set(staff_ids)
+                dropped = [login for login, (user_data, _, _) in self._entries.items()
+                           if user_data is None or user_data['staff_id'] in staff_ids]
+            for login in dropped:
+                del self._entries[login]
+            self._stats['invalidated'] += len(dropped)
+
+    def stats(self):
+        """
+        Returns cache statistics for monitoring.
+        
+        @return: Dictionary with the number of cached logins and hit/miss counters
+        """
+        with self._lock:
+            return {'size': len(self._entries), 'max_entries': self.max_entries, **self._stats}
+
+_credentials = CredentialCache()
+
 def get_user_credentials_from_db(username):
     """
-    Fetches the password hash and user data from the DEFAULT_USERS dictionary.
-    This function currently uses a static dictionary for demonstration.
-    In a real application, it would query the database for user credentials.
+    Fetches the password hash and user data of a login from the StaffCredentials table,
+    going through the credential cache.
     
     @param username: The username to look up. Must be validated to prevent injection.
                      Should be a string matching the validation pattern.
-    @return: Dictionary containing user data (e.g., code_hash, role, name, staff_id, departments, code)
-             or None if the username is not found or invalid.
+    @return: Dictionary containing user data (login, code_hash, role, name, staff_id, departments)
+             or None if the username is not found, invalid or the database is unavailable.
     """
     # Validate username to prevent injection
     if not validate_username(username):
         logger.warning(f"Invalid username format: {username}")
         return None
-        
-    # This is a placeholder. In a real app, you would query the DB here.
-    # For now, we use the static dictionary as the source of truth for authentication.
-    # The DB is used for other data like staff info, tickets, etc.
-    # This function mimics a DB lookup for the static data.
-    return DEFAULT_USERS.get(username)
+    
+    return _lookup_credentials(username)[0]
+
+def _lookup_credentials(username):
+    """
+    Looks up a validated login through the credential cache, fetching it from the database on a miss.
+    
+    @param username: Validated login name
+    @return: Tuple (user_data, entry); user_data is None if the login is unknown or the
+             database is unavailable, entry is the cache entry (None if nothing was cached)
+    """
+    found, user_data, entry = _credentials.get(username)
+    if found:
+        return user_data, entry
+    try:
+        user_data = fetch_staff_credentials(username)
+    except psycopg2.Error as e:
+        # Not cached: the login may well exist once the database is reachable again
+        logger.error(f"Error fetching credentials for {username}: {e}")
+        return None, None
+    return user_data, _credentials.put(username, user_data)
+
+def invalidate_credentials(staff_ids=None):
+    """
+    Drops cached credentials and ends the sessions of the affected staff members.
+    Called for StaffCredentials / StaffDepartmentGrants change notifications.
+    
+    @param staff_ids: Iterable of changed staff IDs, or None if anything may have changed
+    @return: None
+    """
+    _credentials.invalidate(staff_ids)
+    revoked = _sessions.revoke_staff(staff_ids)
+    logger.info(f"Credential cache invalidated for staff {sorted(staff_ids) if staff_ids is not None else 'all'}, {revoked} sessions revoked")
+
+def get_credential_cache_stats():
+    """
+    Returns statistics of the credential cache for monitoring.
+    
+    @return: Dictionary of cache counters
+    """
+    return _credentials.stats()
+
+def hash_code(code, iterations=PBKDF2_ITERATIONS, salt=None):
+    """
+    Hashes an access code with salted PBKDF2-HMAC-SHA256 for storage.
+    
+    @param code: Plain text access code
+    @param iterations: Number of PBKDF2 iterations
+    @param salt: Optional salt as hex string; a random 16-byte salt is generated if omitted
+    @return: String 'pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>'
+    """
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', code.encode('utf-8'), bytes.fromhex(salt), iterations)
+    return f"{PBKDF2_PREFIX}${iterations}${salt}${digest.hex()}"
+
+def verify_code(code, stored_hash):
+    """
+    Checks an access code against a stored hash in constant time.
+    Accepts PBKDF2 hashes from hash_code() and legacy unsalted SHA-256 hex digests.
+    
+    @param code: Plain text access code
+    @param stored_hash: Hash string stored for the user
+    @return: True if the code matches
+    """
+    if stored_hash.startswith(PBKDF2_PREFIX + '$'):
+        try:
+            _, iterations, salt, _ = stored_hash.split('$')
+            candidate = hash_code(code, int(iterations), salt)
+        except ValueError:
+            logger.error("Malformed PBKDF2 code hash")
+            return False
+    else:
+        candidate = hashlib.sha256(code.encode('utf-8')).hexdigest()
+    return secrets.compare_digest(stored_hash, candidate)
+
+def _code_digest(login, code):
+    """
+    Computes the key under which the outcome of a code check is cached. Keyed with
+    the signing key, so the cache holds nothing an attacker could test codes against.
+    
+    @param login: Login name
+    @param code: Plain text access code
+    @return: HMAC-SHA256 digest bytes
+    """
+    return hmac.new(_signing_key, f"{login}\0{code}".encode('utf-8', 'surrogatepass'), hashlib.sha256).digest()
 
 def authenticate_user(login, code):
     """
@@ -52,7 +287,7 @@ def authenticate_user(login, code):
     @param login: The username provided by the client. Must be validated.
                   Should be a string matching the validation pattern.
     @param code: The code provided by the client. Expected to be a string.
-                 This will be hashed using SHA-256 for comparison.
+                 This will be hashed with the user's hash scheme (see verify_code) for comparison.
     @return: Tuple containing:
              - success (bool): True if authentication is successful, False otherwise.
              - user_data (dict or None): User data dictionary if successful, None otherwise.
@@ -72,25 +307,209 @@ def authenticate_user(login, code):
         logger.warning(f"Code too long for user: {login}")
         return False, None
 
-    user_data = get_user_credentials_from_db(login)
+    user_data, entry = _lookup_credentials(login)
+    # Codes already checked against the same cached credentials are answered without hashing again
+    code_digest = _code_digest(login, code)
+    code_valid = _credentials.verdict(login, entry, code_digest)
     if not user_data:
         logger.warning(f"Login attempt with non-existent username: {login}")
-        # Perform a dummy hash comparison to maintain constant time and prevent timing attacks
-        # Even if user doesn't exist, we still do the comparison to avoid leaking info
-        dummy_hash = hashlib.sha256(b"dummy").hexdigest()
-        secrets.compare_digest(dummy_hash, dummy_hash)
+        if code_valid is None:
+            # Perform a dummy PBKDF2 verification to maintain constant time and prevent timing attacks
+            # Even if user doesn't exist, we still hash the code to avoid leaking which logins exist
+            try:
+                verify_code(code, _DUMMY_HASH)
+            except UnicodeEncodeError:
+                pass
+            _credentials.put_verdict(login, entry, code_digest, False)
         return False, None
 
-    # Hash the provided code
-    try:
-        code_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
-    except UnicodeEncodeError:
-        logger.warning(f"Invalid encoding for code from user: {login}")
-        return False, None
+    if code_valid is None:
+        # Hash the provided code and compare in constant time to prevent timing attacks
+        try:
+            code_valid = verify_code(code, user_data['code_hash'])
+        except UnicodeEncodeError:
+            logger.warning(f"Invalid encoding for code from user: {login}")
+            return False, None
+        _credentials.put_verdict(login, entry, code_digest, code_valid)
 
-    # Use secrets.compare_digest for constant-time comparison to prevent timing attacks
-    if secrets.compare_digest(user_data['code_hash'], code_hash):
+    if code_valid:
         logger.info(f"Successful authentication for user: {login}")
         return True, user_data
     logger.warning(f"Invalid code for user: {login}")
-    return False, None
\ No newline at end of file
+    return False, None
+
+class SessionStore:
+    """
+    Bounded in-memory store of verified sessions.
+    
+    Maps session IDs to the authenticated user's data and expiry time. Entries
+    are kept in insertion order, so the oldest session is evicted when the
+    store is full; expired entries are dropped when they are looked up and
+    swept from the old end on every insert. Revoking removes the entry, which
+    immediately invalidates the token even though its signature stays valid.
+    """
+
+    def __init__(self, ttl=SESSION_TTL, max_entries=SESSION_MAX_ENTRIES):
+        """
+        @param ttl: Session lifetime in seconds
+        @param max_entries: Maximum number of sessions kept
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'issued': 0, 'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0, 'revoked': 0}
+
+    def add(self, session_id, user_data, expires_at):
+        """
+        Stores a new session, evicting expired and, if needed, the oldest sessions.
+        
+        @param session_id: Random session ID
+        @param user_data: User dictionary attached to authenticated requests
+        @param expires_at: Expiry as a time.time() timestamp
+        @return: None
+        """
+        now = time.time()
+        with self._lock:
+            while self._sessions:
+                oldest_id, (_, oldest_expiry) = next(iter(self._sessions.items()))
+                if oldest_expiry > now and len(self._sessions) < self.max_entries:
+                    break
+                del self._sessions[oldest_id]
+                self._stats['expired' if oldest_expiry <= now else 'evicted'] += 1
+            self._sessions[session_id] = (user_data, expires_at)
+            self._stats['issued'] += 1
+
+    def get(self, session_id):
+        """
+        Returns the user data of a live session.
+        
+        @param session_id: Session ID taken from a token
+        @return: User dictionary, or None if the session is unknown, expired or revoked
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if entry[1] <= time.time():
+                del self._sessions[session_id]
+                self._stats['expired'] += 1
+                return None
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def revoke(self, session_id):
+        """
+        Removes a session so its token is no longer accepted.
+        
+        @param session_id: Session ID taken from a token
+        @return: True if a session was removed
+        """
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                return False
+            self._stats['revoked'] += 1
+            return True
+
+    def revoke_staff(self, staff_ids=None):
+        """
+        Revokes every session of the given staff members.
+        
+        @param staff_ids: Iterable of staff IDs, or None to revoke all sessions
+        @return: Number of sessions revoked
+        """
+        with self._lock:
+            if staff_ids is None:
+                revoked = list(self._sessions)
+            else:
+                staff_ids = set(staff_ids)
+                revoked = [sid for sid, (user_data, _) in self._sessions.items() if user_data['staff_id'] in staff_ids]
+            for session_id in revoked:
+                del self._sessions[session_id]
+            self._stats['revoked'] += len(revoked)
+            return len(revoked)
+
+    def stats(self):
+        """
+        Returns session statistics for monitoring.
+        
+        @return: Dictionary with the number of active sessions and hit/miss/eviction counters
+        """
+        with self._lock:
+            return {'active': len(self._sessions), 'max_entries': self.max_entries, 'ttl': self.ttl, **self._stats}
+
+_sessions = SessionStore()
+
+# Token format 'session_id.expires_at.signature': URL-safe session ID, Unix expiry time, hex HMAC-SHA256
+_TOKEN_PATTERN = re.compile(r'([A-Za-z0-9_-]+)\.([0-9]+)\.([0-9a-f]{64})')
+
+def _sign(payload):
+    """
+    Computes the token signature of a payload.
+    
+    @param payload: String 'session_id.expires_at'
+    @return: Hex HMAC-SHA256 signature
+    """
+    return hmac.new(_signing_key, payload.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def _parse_token(token):
+    """
+    Checks a token's format, signature and expiry without touching the session store.
+    
+    @param token: Token string 'session_id.expires_at.signature'
+    @return: Session ID, or None if the token is malformed, forged or expired
+    """
+    if not isinstance(token, str) or len(token) > 200:
+        return None
+    match = _TOKEN_PATTERN.fullmatch(token)
+    if not match:
+        return None
+    session_id, expires_at, signature = match.groups()
+    if not secrets.compare_digest(_sign(f"{session_id}.{expires_at}").encode('ascii'), signature.encode('ascii')):
+        return None
+    if int(expires_at) <= time.time():
+        return None
+    return session_id
+
+def create_session(user_data):
+    """
+    Issues a signed session token for an authenticated user.
+    
+    @param user_data: User dictionary returned by authenticate_user()
+    @return: Tuple (token, lifetime in seconds)
+    """
+    session_id = secrets.token_urlsafe(24)
+    expires_at = int(time.time()) + _sessions.ttl
+    _sessions.add(session_id, user_data, expires_at)
+    payload = f"{session_id}.{expires_at}"
+    return f"{payload}.{_sign(payload)}", _sessions.ttl
+
+def verify_session(token):
+    """
+    Resolves a session token to its user. Only an HMAC and a dictionary lookup,
+    so requests carrying a token skip the access code hash entirely.
+    
+    @param token: Token string returned by create_session()
+    @return: User dictionary, or None if the token is invalid, expired or revoked
+    """
+    session_id = _parse_token(token)
+    return _sessions.get(session_id) if session_id else None
+
+def revoke_session(token):
+    """
+    Revokes the session behind a token (logout).
+    
+    @param token: Token string returned by create_session()
+    @return: True if a live session was revoked
+    """
+    session_id = _parse_token(token)
+    return _sessions.revoke(session_id) if session_id else False
+
+def get_session_stats():
+    """
+    Returns statistics of the session store for monitoring.
+    
+    @return: Dictionary of session counters
+    """
+    return _sessions.stats()
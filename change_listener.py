@@ -0,0 +1,270 @@
+import json
+import logging
+import select
+import threading
+import time
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from constants import (
+    DATA_NOTIFY_CHANNEL, DATA_NOTIFY_COALESCE_MS, DATA_NOTIFY_IDLE_PING, DATA_NOTIFY_RECONNECT_DELAY
+)
+from db_utils import get_db_connection, fetch_rows_by_ids, load_all_tables
+from data_store import PRIMARY_KEYS
+
+logger = logging.getLogger(__name__)
+
+# Table names sent by the notify_row_change() trigger, mapped to DataStore table names
+NOTIFY_TABLES = {
+    'users': 'users',
+    'tickets': 'tickets',
+    'ticketcomments': 'comments',
+    'ticketlogs': 'logs'
+}
+
+class ChangeListener:
+    """
+    Background thread that applies LISTEN/NOTIFY change events to a DataStore.
+    
+    The triggers in create_support_db.sql publish the primary key of every
+    inserted, updated or deleted row. The listener collects keys for
+    DATA_NOTIFY_COALESCE_MS after the first notification of a burst, then
+    re-reads just those rows (one query per table) and upserts them, removing
+    rows that no longer exist. Notifications sent while the listener
+    connection is down are lost, so after a reconnect the whole dataset is
+    reloaded. On the first connect the optional catch_up callable (e.g.
+    DeltaSyncer.sync_once) closes the gap between the startup load and LISTEN.
+    Notifications for tables outside the store (e.g. staffcredentials) are
+    passed to the matching callable in handlers instead.
+    """
+
+    def __init__(self, store, catch_up=None, handlers=None, channel=DATA_NOTIFY_CHANNEL,
+                 coalesce_ms=DATA_NOTIFY_COALESCE_MS, idle_ping=DATA_NOTIFY_IDLE_PING,
+                 reconnect_delay=DATA_NOTIFY_RECONNECT_DELAY):
+        """
+        @param store: DataStore to keep up to date
+        @param catch_up: Optional zero-argument callable run once after the first LISTEN
+        @param handlers: Optional mapping of trigger table name to a callable taking the set of
+                         changed primary keys, or None after a reconnect when changes may have been missed
+        @param channel: Notification channel to listen on
+        @param coalesce_ms: Milliseconds to keep collecting a burst of notifications
+        @param idle_ping: Seconds without traffic after which the connection is checked
+        @param reconnect_delay: Seconds to wait between reconnection attempts
+        """
+        self.store = store
+        self.catch_up = catch_up
+        self.handlers = handlers or {}
+        self.channel = channel
+        self.coalesce = coalesce_ms / 1000.0
+        self.idle_ping = idle_ping
+        self.reconnect_delay = reconnect_delay
+        self._conn = None
+        self._needs_resync = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {
+            'connected': False,
+            'notifications': 0,
+            'batches': 0,
+            'keys_fetched': 0,
+            'rows_applied': 0,
+            'rows_removed': 0,
+            'last_batch_size': 0,
+            'last_batch_at': None,
+            'reconnects': 0,
+            'full_resyncs': 0,
+            'last_error': None
+        }
+
+    def _connect(self):
+        """
+        Opens a dedicated autocommit connection and subscribes to the channel.
+        
+        @return: None
+        @raise psycopg2.Error: If the connection or LISTEN fails
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise psycopg2.OperationalError("Could not open listener connection")
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        cur = conn.cursor()
+        cur.execute(f"LISTEN {self.channel};")
+        cur.close()
+        self._conn = conn
+        self._stats['connected'] = True
+        logger.info(f"Listening for data changes on channel '{self.channel}'")
+
+    def _disconnect(self):
+        """
+        Closes the listener connection, if open.
+        
+        @return: None
+        """
+        self._stats['connected'] = False
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+            self._conn = None
+
+    def _full_resync(self):
+        """
+        Reloads every table into the store, used when notifications may have been missed.
+        
+        @return: None
+        @raise psycopg2.Error: If the data could not be reloaded completely
+        """
+        started = time.perf_counter()
+        data, _ = load_all_tables()
+        if not all(data.values()):
+            raise psycopg2.OperationalError("Full resync returned incomplete data")
+        self.store.load(**data)
+        for handler in self.handlers.values():
+            handler(None)
+        self._stats['full_resyncs'] += 1
+        logger.info(f"Full resync after listener reconnect finished in {time.perf_counter() - started:.3f}s")
+
+    def _collect(self, pending):
+        """
+        Moves received notifications into the pending set of changed keys.
+        
+        @param pending: Dictionary mapping store table name to a set of primary keys
+        @return: None
+        """
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            self._stats['notifications'] += 1
+            try:
+                payload = json.loads(notify.payload)
+                table = payload['table'] if payload['table'] in self.handlers else NOTIFY_TABLES[payload['table']]
+                pending.setdefault(table, set()).add(int(payload['id']))
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Ignoring malformed change notification: {notify.payload}")
+
+    def _apply(self, pending):
+        """
+        Re-reads the changed rows and merges them into the store.
+        
+        @param pending: Dictionary mapping store table name to a set of primary keys
+        @return: None
+        @raise psycopg2.Error: If the rows cannot be fetched
+        """
+        applied = removed = 0
+        # Parents first, so enrichment never sees a comment for an unknown ticket
+        for table in ('users', 'tickets', 'comments', 'logs'):
+            ids = pending.get(table)
+            if not ids:
+                continue
+            rows = fetch_rows_by_ids(table, ids)
+            found = {row[PRIMARY_KEYS[table]] for row in rows}
+            applied += len(self.store.upsert(table, rows))
+            removed += len(self.store.remove(table, ids - found))
+        for table, handler in self.handlers.items():
+            if pending.get(table):
+                handler(pending[table])
+        batch_size = sum(len(ids) for ids in pending.values())
+        self._stats['batches'] += 1
+        self._stats['keys_fetched'] += batch_size
+        self._stats['rows_applied'] += applied
+        self._stats['rows_removed'] += removed
+        self._stats['last_batch_size'] = batch_size
+        self._stats['last_batch_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        logger.debug(f"Applied change batch: {batch_size} keys, {applied} rows updated, {removed} removed")
+
+    def _listen_loop(self):
+        """
+        Waits for notifications and applies them in coalesced batches until stopped.
+        
+        @return: None
+        @raise psycopg2.Error: If the listener connection breaks
+        """
+        pending = {}
+        deadline = None
+        last_traffic = time.monotonic()
+        while not self._stop_event.is_set():
+            if deadline is None:
+                timeout = 1.0
+            else:
+                timeout = max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._conn], [], [], timeout)
+            if readable:
+                last_traffic = time.monotonic()
+                self._conn.poll()
+                self._collect(pending)
+                if pending and deadline is None:
+                    deadline = time.monotonic() + self.coalesce
+            elif deadline is None and time.monotonic() - last_traffic > self.idle_ping:
+                # Detect half-open connections that select() alone would never report
+                cur = self._conn.cursor()
+                cur.execute("SELECT 1;")
+                cur.close()
+                last_traffic = time.monotonic()
+            if deadline is not None and time.monotonic() >= deadline:
+                self._apply(pending)
+                pending = {}
+                deadline = None
+
+    def _run(self):
+        """
+        Thread body: keeps the listener connected and resynchronises after drops.
+        
+        @return: None
+        """
+        first = True
+        while not self._stop_event.is_set():
+            try:
+                self._connect()
+                if first and self.catch_up is not None:
+                    self.catch_up()
+                elif self._needs_resync:
+                    self._full_resync()
+                first = False
+                self._needs_resync = False
+                self._listen_loop()
+            except (psycopg2.Error, OSError) as e:
+                self._stats['last_error'] = str(e)
+                self._stats['reconnects'] += 1
+                self._needs_resync = True
+                logger.error(f"Change listener connection lost, resyncing after reconnect: {e}")
+                self._disconnect()
+                self._stop_event.wait(self.reconnect_delay)
+            except Exception as e:
+                self._stats['last_error'] = str(e)
+                self._needs_resync = True
+                logger.exception(f"Unexpected error in change listener: {e}")
+                self._disconnect()
+                self._stop_event.wait(self.reconnect_delay)
+        self._disconnect()
+
+    def start(self):
+        """
+        Starts the listener thread.
+        
+        @return: None
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='change-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the listener thread and closes its connection.
+        
+        @return: None
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        """
+        Returns listener statistics for monitoring.
+        
+        @return: Dictionary with notification, batch and reconnect counters
+        """
+        snapshot = dict(self._stats)
+        # Notifications folded into an already pending key of the same batch
+        snapshot['coalesced'] = max(0, snapshot['notifications'] - snapshot['keys_fetched'])
+        return snapshot
@@ -10,6 +10,64 @@ DB_HOST = 'localhost'
 DB_PORT = '5432'
 DB_PASSWORD = 'new_secure_password'
 
+# --- Database Connection Pool Settings ---
+# @param DB_POOL_MIN_SIZE: Number of connections opened when the pool is created and kept open while idle.
+# @param DB_POOL_MAX_SIZE: Maximum number of simultaneously open connections in the pool.
+# @param DB_POOL_CHECKOUT_TIMEOUT: Seconds a caller waits for a free connection before the lease fails.
+# @param DB_POOL_HEALTH_CHECK_INTERVAL: Seconds a connection may sit idle before it is pinged on checkout.
+# @param DB_STATEMENT_TIMEOUT_MS: Server-side statement timeout applied to every pooled connection, in milliseconds.
+DB_POOL_MIN_SIZE = 1
+DB_POOL_MAX_SIZE = 10
+DB_POOL_CHECKOUT_TIMEOUT = 5
+DB_POOL_HEALTH_CHECK_INTERVAL = 30
+DB_STATEMENT_TIMEOUT_MS = 30000
+
+# --- Startup Data Loading Settings ---
+# @param DB_LOAD_WORKERS: Number of tables loaded in parallel at startup. Capped by DB_POOL_MAX_SIZE - 1.
+# @param DB_LOAD_STATEMENT_TIMEOUT_MS: Statement timeout for the bulk startup queries, in milliseconds. 0 disables the timeout.
+# @param DB_STREAMING_LOAD: Read the tickets, comments and logs tables through server-side cursors in batches.
+# @param DB_FETCH_BATCH_SIZE: Number of rows fetched per round-trip when streaming a table.
+DB_LOAD_WORKERS = 4
+DB_LOAD_STATEMENT_TIMEOUT_MS = 0
+DB_STREAMING_LOAD = True
+DB_FETCH_BATCH_SIZE = 5000
+
+# --- Delta Sync Settings ---
+# @param DATA_SYNC_INTERVAL: Seconds between incremental refreshes of the in-memory data. 0 disables the refresher.
+# @param DATA_SYNC_OVERLAP_SECONDS: Rows of every synced table are re-read this many seconds before the newest seen
+#                                  timestamp, so rows committed after a row with a higher ID are not missed.
+DATA_SYNC_INTERVAL = 30
+DATA_SYNC_OVERLAP_SECONDS = 5
+
+# --- Data Backend Settings ---
+# @param DATA_BACKEND: Where endpoint data comes from: 'memory' (all tables loaded into every worker at startup
+#                      and kept fresh according to DATA_SYNC_MODE) or 'sql' (each request is answered by
+#                      parameterized SQL queries; nothing is loaded, for datasets too large to hold in memory).
+DATA_BACKEND = 'memory'
+
+# --- Reporting View Settings (DATA_BACKEND = 'sql') ---
+# @param REPORT_VIEW_REFRESH_INTERVAL: Seconds between REFRESH MATERIALIZED VIEW CONCURRENTLY runs. 0 disables
+#                                     the refresher, so statistics are always computed from the raw tables.
+# @param REPORT_VIEW_MAX_AGE: Statistics are read from the materialized views only if they were refreshed
+#                            within this many seconds; otherwise the raw tables are queried.
+# @param REPORT_VIEW_REFRESH_TIMEOUT_MS: Statement timeout for a view refresh, in milliseconds. 0 disables the timeout.
+REPORT_VIEW_REFRESH_INTERVAL = 300
+REPORT_VIEW_MAX_AGE = 900
+REPORT_VIEW_REFRESH_TIMEOUT_MS = 0
+
+# --- Change Notification Settings ---
+# @param DATA_SYNC_MODE: How the in-memory data is kept fresh: 'notify' (LISTEN/NOTIFY triggers),
+#                        'poll' (periodic delta sync every DATA_SYNC_INTERVAL seconds) or 'off'.
+# @param DATA_NOTIFY_CHANNEL: PostgreSQL channel the change triggers in create_support_db.sql notify on.
+# @param DATA_NOTIFY_COALESCE_MS: Notifications arriving within this window are applied as one batch.
+# @param DATA_NOTIFY_IDLE_PING: Seconds without notifications after which the listener connection is pinged.
+# @param DATA_NOTIFY_RECONNECT_DELAY: Seconds to wait before reconnecting a dropped listener connection.
+DATA_SYNC_MODE = 'notify'
+DATA_NOTIFY_CHANNEL = 'support_changes'
+DATA_NOTIFY_COALESCE_MS = 200
+DATA_NOTIFY_IDLE_PING = 30
+DATA_NOTIFY_RECONNECT_DELAY = 5
+
 # --- API Default Users (Hardcoded for demonstration) ---
 # @param ADMIN_CODE: Secure access code for the admin user. Must be at least 10 characters, containing uppercase, lowercase, and digits.
 # @param TS_MANAGER_CODE: Secure access code for the Technical Support manager user.
@@ -32,7 +90,7 @@ DB_PASSWORD = 'new_secure_password'
 # @param MA_ANALYST_CODE: Secure access code for the Monitoring and Analytics analyst user.
 # @param L1_ANALYST_CODE: Secure access code for the Level 1 Service Desk analyst user.
 # @param L2_ANALYST_CODE: Secure access code for the Level 2 Service Desk analyst user.
-import hashlib
+import os
 
 ADMIN_CODE = "AbC12xYz90Kl"
 TS_MANAGER_CODE = "DeF34mNo56Pq"
@@ -56,17 +114,16 @@ MA_ANALYST_CODE = "WxY45fGh67Vw"
 L1_ANALYST_CODE = "AbC89jKl01Xy"
 L2_ANALYST_CODE = "DeF23mNo45Za"
 
-# @param DEFAULT_USERS: Dictionary containing predefined users for the system.
+# @param DEFAULT_USERS: Dictionary containing the predefined users seeded into the StaffCredentials and
+# StaffDepartmentGrants tables by create_support_db.sql. Authentication reads those tables, not this dictionary.
 # Each user has the following properties:
-# - code_hash: SHA-256 hash of the user's access code.
 # - role: Role of the user (e.g., 'admin', 'manager', 'analyst').
 # - name: Full name of the user.
 # - staff_id: Unique identifier for the staff member in the database.
 # - departments: List of departments the user is associated with.
-# - code: Plain text access code for reference or debugging (should not be exposed in production).
+# - code: Plain text access code the seeded hash was made from; kept as seed documentation only and never logged.
 DEFAULT_USERS = {
     'admin': {
-        'code_hash': hashlib.sha256(ADMIN_CODE.encode()).hexdigest(),
         'role': 'admin',
         'name': 'System Administrator',
         'staff_id': 1,
@@ -85,7 +142,6 @@ DEFAULT_USERS = {
         'code': ADMIN_CODE
     },
     'manager_ts': {
-        'code_hash': hashlib.sha256(TS_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Alexey Smirnov',
         'staff_id': 2,
@@ -93,7 +149,6 @@ DEFAULT_USERS = {
         'code': TS_MANAGER_CODE
     },
     'manager_sa': {
-        'code_hash': hashlib.sha256(SA_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Irina Kozlova',
         'staff_id': 3,
@@ -101,7 +156,6 @@ DEFAULT_USERS = {
         'code': SA_MANAGER_CODE
     },
     'manager_ni': {
-        'code_hash': hashlib.sha256(NI_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Denis Novikov',
         'staff_id': 4,
@@ -109,7 +163,6 @@ DEFAULT_USERS = {
         'code': NI_MANAGER_CODE
     },
     'manager_is': {
-        'code_hash': hashlib.sha256(IS_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Olga Makarova',
         'staff_id': 5,
@@ -117,7 +170,6 @@ DEFAULT_USERS = {
         'code': IS_MANAGER_CODE
     },
     'manager_di': {
-        'code_hash': hashlib.sha256(DI_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Artem Zaitsev',
         'staff_id': 6,
@@ -125,7 +177,6 @@ DEFAULT_USERS = {
         'code': DI_MANAGER_CODE
     },
     'manager_db': {
-        'code_hash': hashlib.sha256(DB_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Natalia Popova',
         'staff_id': 7,
@@ -133,7 +184,6 @@ DEFAULT_USERS = {
         'code': DB_MANAGER_CODE
     },
     'manager_ct': {
-        'code_hash': hashlib.sha256(CT_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Maksim Solovev',
         'staff_id': 8,
@@ -141,7 +191,6 @@ DEFAULT_USERS = {
         'code': CT_MANAGER_CODE
     },
     'manager_ma': {
-        'code_hash': hashlib.sha256(MA_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Elena Vorobeva',
         'staff_id': 9,
@@ -149,7 +198,6 @@ DEFAULT_USERS = {
         'code': MA_MANAGER_CODE
     },
     'manager_l1': {
-        'code_hash': hashlib.sha256(L1_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Ivan Frolov',
         'staff_id': 10,
@@ -157,7 +205,6 @@ DEFAULT_USERS = {
         'code': L1_MANAGER_CODE
     },
     'manager_l2': {
-        'code_hash': hashlib.sha256(L2_MANAGER_CODE.encode()).hexdigest(),
         'role': 'manager',
         'name': 'Svetlana Alekseeva',
         'staff_id': 11,
@@ -165,7 +212,6 @@ DEFAULT_USERS = {
         'code': L2_MANAGER_CODE
     },
     'analyst_ts': {
-        'code_hash': hashlib.sha256(TS_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Petr Sidrov',
         'staff_id': 12,
@@ -173,7 +219,6 @@ DEFAULT_USERS = {
         'code': TS_ANALYST_CODE
     },
     'analyst_sa': {
-        'code_hash': hashlib.sha256(SA_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Anna Orlova',
         'staff_id': 13,
@@ -181,7 +226,6 @@ DEFAULT_USERS = {
         'code': SA_ANALYST_CODE
     },
     'analyst_ni': {
-        'code_hash': hashlib.sha256(NI_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Mikhail Lebedev',
         'staff_id': 14,
@@ -189,7 +233,6 @@ DEFAULT_USERS = {
         'code': NI_ANALYST_CODE
     },
     'analyst_is': {
-        'code_hash': hashlib.sha256(IS_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Irina Semenova',
         'staff_id': 15,
@@ -197,7 +240,6 @@ DEFAULT_USERS = {
         'code': IS_ANALYST_CODE
     },
     'analyst_di': {
-        'code_hash': hashlib.sha256(DI_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Artem Fedorov',
         'staff_id': 16,
@@ -205,7 +247,6 @@ DEFAULT_USERS = {
         'code': DI_ANALYST_CODE
     },
     'analyst_db': {
-        'code_hash': hashlib.sha256(DB_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Tatyana Zhukova',
         'staff_id': 17,
@@ -213,7 +254,6 @@ DEFAULT_USERS = {
         'code': DB_ANALYST_CODE
     },
     'analyst_ct': {
-        'code_hash': hashlib.sha256(CT_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Sergey Gromov',
         'staff_id': 18,
@@ -221,7 +261,6 @@ DEFAULT_USERS = {
         'code': CT_ANALYST_CODE
     },
     'analyst_ma': {
-        'code_hash': hashlib.sha256(MA_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Nadezhda Volkova',
         'staff_id': 19,
@@ -229,7 +268,6 @@ DEFAULT_USERS = {
         'code': MA_ANALYST_CODE
     },
     'analyst_l1': {
-        'code_hash': hashlib.sha256(L1_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Alexei Tikhonov',
         'staff_id': 20,
@@ -237,7 +275,6 @@ DEFAULT_USERS = {
         'code': L1_ANALYST_CODE
     },
     'analyst_l2': {
-        'code_hash': hashlib.sha256(L2_ANALYST_CODE.encode()).hexdigest(),
         'role': 'analyst',
         'name': 'Yulia Andreeva',
         'staff_id': 21,
@@ -246,6 +283,119 @@ DEFAULT_USERS = {
     }
 }
 
+# --- Session Settings ---
+# @param SESSION_SECRET: Key used to sign session tokens (HMAC-SHA256). Read from the API_SESSION_SECRET environment
+#                        variable; if unset, a random key is generated at startup and tokens do not survive a restart
+#                        or work across several worker processes.
+# @param SESSION_TTL: Lifetime of a session token in seconds.
+# @param SESSION_MAX_ENTRIES: Maximum number of sessions kept in memory; the oldest ones are evicted first.
+# @param PBKDF2_ITERATIONS: Iterations of PBKDF2-HMAC-SHA256 used when hashing access codes with auth.hash_code().
+SESSION_SECRET = os.environ.get('API_SESSION_SECRET')
+SESSION_TTL = 900
+SESSION_MAX_ENTRIES = 10000
+PBKDF2_ITERATIONS = 260000
+
+# --- Credential Cache Settings ---
+# @param CREDENTIAL_CACHE_SIZE: Maximum number of logins whose credentials are cached; least recently used ones are evicted.
+# @param CREDENTIAL_CACHE_TTL: Seconds a credential lookup is cached. Bounds how long a change made while change
+#                              notifications are unavailable (DATA_BACKEND = 'sql' or DATA_SYNC_MODE != 'notify') stays unseen.
+# @param CREDENTIAL_NEGATIVE_TTL: Seconds an unknown login is remembered, so repeated attempts do not query the database.
+# @param CREDENTIAL_CACHED_CODES: Number of code check outcomes remembered per cached login, so repeated ?login=&code=
+#                                 requests skip the PBKDF2 verification (PBKDF2_ITERATIONS) until the entry expires.
+CREDENTIAL_CACHE_SIZE = 10000
+CREDENTIAL_CACHE_TTL = 300
+CREDENTIAL_NEGATIVE_TTL = 30
+CREDENTIAL_CACHED_CODES = 4
+
+# --- Pagination Settings ---
+# @param TICKETS_PAGE_SIZE: Number of tickets per page of /api/v1/tickets when paging or filtering without a limit.
+# @param MAX_PAGE_SIZE: Largest accepted value of the limit parameters (tickets, comments and logs).
+TICKETS_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# --- Batch Request Settings ---
+# @param MAX_BATCH_IDS: Largest number of ticket IDs accepted by /api/v1/tickets?ids=...
+# @param MAX_BATCH_REQUESTS: Largest number of sub-requests accepted by one /api/v1/batch call.
+MAX_BATCH_IDS = 200
+MAX_BATCH_REQUESTS = 20
+
+# --- Timeline Settings ---
+# @param TIMELINE_MAX_BUCKETS: Largest number of buckets returned by /api/v1/timeline
+#                              (e.g. about 83 days of hourly or 5 years of daily buckets).
+TIMELINE_MAX_BUCKETS = 2000
+
+# --- Quantile Sketch Settings ---
+# @param QUANTILE_SKETCH_ACCURACY: Relative accuracy of the duration percentiles computed with DDSketch sketches
+#                                  (0.01 = within 1% of the exact value). Both data backends use the same buckets,
+#                                  so they report identical percentiles.
+# @param REPORTED_QUANTILES: Percentiles reported by /api/v1/metrics and /api/v1/categories (name -> quantile).
+QUANTILE_SKETCH_ACCURACY = 0.01
+REPORTED_QUANTILES = {
+    'p50': 0.5,
+    'p90': 0.9,
+    'p99': 0.99
+}
+
+# --- Forecast Settings ---
+# @param FORECAST_HISTORY_DAYS: Number of past days of ticket arrivals and resolutions the forecast models are fitted to
+#                               (at least two weeks, needed to initialize the weekly seasonality).
+# @param FORECAST_HORIZON_DAYS: Number of days forecast by /api/v1/forecast, starting today.
+# @param FORECAST_SMOOTHING: Holt-Winters smoothing factors between 0 and 1 for the level (alpha),
+#                            the trend (beta) and the weekly seasonality (gamma).
+# @param FORECAST_GROWTH_ALERT: Growth of the forecast ticket count over the count of the same number of past days
+#                               (0.1 = 10%) from which a growing ticket volume is reported as a risk factor.
+# @param FORECAST_SQL_CACHE_SECONDS: Seconds forecasts are reused with DATA_BACKEND = 'sql' while the reporting views
+#                                    are not in use (otherwise they are refitted after every view refresh).
+FORECAST_HISTORY_DAYS = 84
+FORECAST_HORIZON_DAYS = 7
+FORECAST_SMOOTHING = {
+    'alpha': 0.3,
+    'beta': 0.05,
+    'gamma': 0.2
+}
+FORECAST_GROWTH_ALERT = 0.1
+FORECAST_SQL_CACHE_SECONDS = 600
+
+# --- Streaming Settings ---
+# @param STREAM_BATCH_SIZE: Number of collection elements serialized per chunk of a streamed response
+#                           (stream=1 or Accept: application/x-ndjson).
+STREAM_BATCH_SIZE = 100
+
+# --- Response Cache Settings ---
+# @param RESPONSE_CACHE_MAX_BYTES: Maximum total size of the cached response bodies in bytes.
+# @param RESPONSE_CACHE_DEFAULT_TTL: Seconds a response is cached for endpoints not listed in RESPONSE_CACHE_TTLS.
+# @param RESPONSE_CACHE_TTLS: Per-endpoint TTL in seconds (Flask endpoint name -> TTL); 0 disables caching for the
+#                             endpoint. With the memory backend entries are also dropped as soon as the data changes,
+#                             so TTLs mostly matter for DATA_BACKEND = 'sql', where they bound how stale a response can be.
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RESPONSE_CACHE_DEFAULT_TTL = 30
+RESPONSE_CACHE_TTLS = {
+    'get_profile': 30,
+    'get_tickets': 30,
+    'get_ticket_detail': 30,
+    'get_metrics': 120,
+    'get_timeline': 120,
+    'get_comparison': 120,
+    'get_categories': 300,
+    'get_forecast': 300,
+    'get_batch': 0
+}
+
+# --- Response Compression Settings ---
+# @param COMPRESSION_MIN_SIZE: Smallest response body in bytes that is compressed; smaller bodies are sent as is.
+#                              Streamed responses are always compressed because their size is not known up front.
+# @param COMPRESSION_ENCODINGS: Content codings offered to clients, in order of preference when the client accepts
+#                               several with the same weight. 'br' and 'zstd' are only used if the brotli or
+#                               zstandard package is installed.
+# @param COMPRESSION_LEVELS: Compression level per content coding (gzip 1-9, br 0-11, zstd 1-22).
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
+COMPRESSION_LEVELS = {
+    'gzip': 6,
+    'br': 5,
+    'zstd': 3
+}
+
 # --- API Configuration ---
 # @param API_HOST: Host address for the Flask API server. Use '0.0.0.0' to bind to all available interfaces.
 # @param API_PORT: Port number on which the Flask API server will listen for requests.
@@ -253,9 +403,20 @@ DEFAULT_USERS = {
 # @param LOG_FILE: Path to the file where API logs will be written.
 # @param LOG_MAX_SIZE: Maximum size of a single log file in bytes before rotation occurs.
 # @param LOG_BACKUP_COUNT: Number of backup log files to keep during rotation.
+# @param LOG_ROTATE_INTERVAL: Seconds after which the log file is rotated even if it is below LOG_MAX_SIZE (0 disables).
+# @param LOG_COMPRESS_ROTATED: Whether rotated log files are gzipped. Compression runs on the logging thread.
+# @param LOG_QUEUE_SIZE: Maximum number of log records waiting for the logging thread. Records beyond it are
+#                        dropped (and counted in the health check) instead of slowing down requests.
+# @param ACCESS_LOG_FILE: Path to the JSON-lines access log (one record per request with status, size and timings).
+# @param ACCESS_LOG_SAMPLE_RATE: Fraction of per-request access lines that are logged (1.0 logs every request).
 API_HOST = '0.0.0.0'
 API_PORT = 5000
 API_DEBUG = True
 LOG_FILE = 'logs/api.log'
-LOG_MAX_SIZE = 10240  # in bytes
-LOG_BACKUP_COUNT = 10
\ No newline at end of file
+LOG_MAX_SIZE = 10 * 1024 * 1024  # in bytes
+LOG_BACKUP_COUNT = 10
+LOG_ROTATE_INTERVAL = 86400
+LOG_COMPRESS_ROTATED = True
+LOG_QUEUE_SIZE = 10000
+ACCESS_LOG_FILE = 'logs/access.log'
+ACCESS_LOG_SAMPLE_RATE = 1.0
\ No newline at end of file
@@ -0,0 +1,1255 @@
+import logging
+import time
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+import numpy as np
+from db_utils import db_connection, fetch_rows, iter_rows
+from ticket_columns import TicketColumns, to_epoch
+from ticket_index import StaffTicketIndex, ticket_key, created_key
+from ticket_aggregates import TicketAggregates, ACTIVE_STATUSES, RESOLVED_STATUSES
+from first_reply_index import FirstReplyIndex
+from duration_sketches import DurationSketches, quantiles
+from quantile_sketch import DDSketch
+from ticket_forecast import TicketForecasts, ForecastCache
+from constants import FORECAST_HISTORY_DAYS, FORECAST_SQL_CACHE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Output fields accepted by the fields parameter (sparse fieldsets) of each collection
+TICKET_FIELDS = ('ticket_id', 'subject', 'description', 'created_at', 'updated_at', 'closed_at', 'user_id',
+                 'assigned_staff_id', 'status_id', 'category_id', 'status_name', 'category_name', 'user_name', 'comments_count')
+TICKET_DETAIL_FIELDS = TICKET_FIELDS[:-1] + ('assigned_staff_name', 'comments', 'logs')
+STAFF_FIELDS = ('staff_id', 'username', 'full_name', 'email', 'department', 'is_active',
+                'assigned_tickets', 'active_tickets', 'resolved_tickets')
+
+def _wanted(fields, name):
+    """
+    Checks whether an output field was requested.
+    
+    @param fields: Set of requested field names, or None for all fields
+    @param name: Name of the field
+    @return: True if the field should be produced
+    """
+    return fields is None or name in fields
+
+def _project(row, fields):
+    """
+    Copies a row, keeping only the requested fields.
+    
+    @param row: Row dictionary
+    @param fields: Set of requested field names, or None for all fields
+    @return: New dictionary
+    """
+    return row.copy() if fields is None else {k: v for k, v in row.items() if k in fields}
+
+class MemoryBackend:
+    """
+    Answers endpoint queries from the in-memory DataStore.
+    
+    Lookups go through the store's hash indexes, counters through
+    TicketAggregates and time-based statistics through TicketColumns.
+    Lists are returned in primary-key order so the output matches SqlBackend.
+    """
+
+    name = 'memory'
+
+    def __init__(self, store):
+        """
+        @param store: DataStore holding the data loaded from the database
+        """
+        self.store = store
+        self.columns = TicketColumns(store)
+        self.aggregates = TicketAggregates(store)
+        self.ticket_index = StaffTicketIndex(store)
+        self.first_replies = FirstReplyIndex(store)
+        self.durations = DurationSketches(store, self.first_replies)
+        self.forecasts = ForecastCache()
+
+    def _name_of(self, row, column):
+        """
+        Returns a display name from a looked-up row.
+        
+        @param row: Row dictionary or None
+        @param column: Name of the column holding the name
+        @return: The name, or 'Unknown' if the row was not found
+        """
+        return row[column] if row else 'Unknown'
+
+    def staff_counts(self, staff_id):
+        """
+        Returns the assigned, active and resolved ticket counts of a staff member.
+        
+        @param staff_id: The ID of the staff member
+        @return: Dictionary with 'assigned', 'active' and 'resolved' counts
+        """
+        return self.aggregates.for_staff(staff_id)
+
+    def departments(self):
+        """
+        Returns the names of all departments that have staff members.
+        
+        @return: Sorted list of department names
+        """
+        return sorted({s['department'] for s in self.store.staff if s.get('department') is not None})
+
+    def department_counts(self, departments):
+        """
+        Returns the combined ticket counts of staff from the given departments.
+        
+        @param departments: List of department names
+        @return: Dictionary with 'assigned', 'active' and 'resolved' counts
+        """
+        return self.aggregates.for_departments(departments)
+
+    def department_breakdown(self, departments):
+        """
+        Returns ticket counts and the number of active staff for each department.
+        
+        @param departments: List of department names
+        @return: Dictionary mapping department name to a dictionary with
+                 'assigned', 'active', 'resolved' and 'staff_count'
+        """
+        staff_counts = {}
+        for s in self.store.staff:
+            if s.get('is_active'):
+                staff_counts[s.get('department')] = staff_counts.get(s.get('department'), 0) + 1
+        breakdown = {}
+        for dept in departments:
+            breakdown[dept] = self.aggregates.for_departments([dept])
+            breakdown[dept]['staff_count'] = staff_counts.get(dept, 0)
+        return breakdown
+
+    def staff_members(self, departments, fields=None):
+        """
+        Returns active staff members of the given departments with their ticket counts.
+        
+        @param departments: List of department names
+        @param fields: Set of STAFF_FIELDS to return, or None for all; counters are only looked up if requested
+        @return: List of staff dictionaries with 'assigned_tickets', 'active_tickets'
+                 and 'resolved_tickets' added, ordered by staff ID
+        """
+        return list(self.iter_staff_members(departments, fields))
+
+    def iter_staff_members(self, departments, fields=None):
+        """
+        Yields active staff members of the given departments one at a time, with counts like staff_members().
+        Only the sorted list of staff row references is built up front.
+        
+        @param departments: List of department names
+        @param fields: Set of STAFF_FIELDS to return, or None for all; counters are only looked up if requested
+        @return: Generator of staff dictionaries ordered by staff ID
+        """
+        staff = sorted((s for s in self.store.staff if s.get('is_active') and s.get('department', '') in departments),
+                       key=lambda s: s['staff_id'])
+        counters = [name for name in ('assigned', 'active', 'resolved') if _wanted(fields, f"{name}_tickets")]
+        for staff_row in staff:
+            # Copy staff rows so that ticket statistics are not written back into the store
+            staff_member = _project(staff_row, fields)
+            if counters:
+                counts = self.aggregates.for_staff(staff_row['staff_id'])
+                for name in counters:
+                    staff_member[f"{name}_tickets"] = counts[name]
+            yield staff_member
+
+    def _enrich_ticket(self, ticket, fields=None):
+        """
+        Copies a ticket and adds status, category and user names and the comment count.
+        Lookups for fields that were not requested are skipped.
+        
+        @param ticket: Ticket dictionary from the store
+        @param fields: Set of TICKET_FIELDS to return, or None for all
+        @return: New ticket dictionary
+        """
+        store = self.store
+        enriched_ticket = _project(ticket, fields)
+        if _wanted(fields, 'status_name'):
+            enriched_ticket['status_name'] = self._name_of(store.get_status(ticket['status_id']), 'status_name')
+        if _wanted(fields, 'category_name'):
+            enriched_ticket['category_name'] = self._name_of(store.get_category(ticket['category_id']), 'category_name')
+        if _wanted(fields, 'user_name'):
+            enriched_ticket['user_name'] = self._name_of(store.get_user(ticket['user_id']), 'full_name')
+        if _wanted(fields, 'comments_count'):
+            enriched_ticket['comments_count'] = store.count_comments(ticket['ticket_id'])
+        return enriched_ticket
+
+    def staff_tickets(self, staff_id, fields=None):
+        """
+        Returns the tickets assigned to a staff member, enriched with names and comment counts.
+        
+        @param staff_id: The ID of the staff member
+        @param fields: Set of TICKET_FIELDS to return, or None for all
+        @return: List of ticket dictionaries ordered by ticket ID
+        """
+        return list(self.iter_staff_tickets(staff_id, fields))
+
+    def iter_staff_tickets(self, staff_id, fields=None):
+        """
+        Yields the tickets assigned to a staff member one at a time, enriched like staff_tickets().
+        Only the sorted list of the staff member's ticket references is built up front.
+        
+        @param staff_id: The ID of the staff member
+        @param fields: Set of TICKET_FIELDS to return, or None for all
+        @return: Generator of ticket dictionaries ordered by ticket ID
+        """
+        for ticket in sorted(self.store.tickets_by_staff(staff_id), key=lambda t: t['ticket_id']):
+            yield self._enrich_ticket(ticket, fields)
+
+    def ticket_page(self, staff_id, limit, after=None, statuses=None, categories=None,
+                    created_from=None, created_to=None, closed_from=None, closed_to=None, fields=None):
+        """
+        Returns one page of a staff member's tickets in (created_at, ticket_id) order.
+        
+        The cursor and the created_at range are resolved by bisect on the
+        StaffTicketIndex; only tickets inside that range are looked up and
+        checked against the remaining filters, and the walk stops after limit + 1 matches.
+        
+        @param staff_id: The ID of the staff member
+        @param limit: Maximum number of tickets to return
+        @param after: Tuple (created_at, ticket_id) of the last ticket of the previous page, or None
+        @param statuses: Collection of status IDs to keep, or None for all
+        @param categories: Collection of category IDs to keep, or None for all
+        @param created_from: Inclusive lower created_at bound (datetime) or None
+        @param created_to: Exclusive upper created_at bound (datetime) or None
+        @param closed_from: Inclusive lower closed_at bound (datetime) or None
+        @param closed_to: Exclusive upper closed_at bound (datetime) or None
+        @param fields: Set of TICKET_FIELDS to return, or None for all
+        @return: Tuple (list of enriched ticket dictionaries, (created_at, ticket_id) of the last
+                 returned ticket if more tickets follow, otherwise None)
+        """
+        after_key = (created_key(after[0]), after[1]) if after is not None else None
+        keys, start, end = self.ticket_index.keys_for(staff_id, after_key, created_from, created_to)
+        page = []
+        for position in range(start, end):
+            ticket = self.store.get_ticket(keys[position][1])
+            # Skip tickets changed since the index list was taken
+            if ticket is None or ticket.get('assigned_staff_id') != staff_id or ticket_key(ticket) != keys[position]:
+                continue
+            if statuses is not None and ticket.get('status_id') not in statuses:
+                continue
+            if categories is not None and ticket.get('category_id') not in categories:
+                continue
+            if closed_from is not None or closed_to is not None:
+                closed_at = ticket.get('closed_at')
+                if closed_at is None or (closed_from is not None and closed_at < closed_from) \
+                        or (closed_to is not None and closed_at >= closed_to):
+                    continue
+            if len(page) == limit:
+                return page, (last['created_at'], last['ticket_id'])
+            page.append(self._enrich_ticket(ticket, fields))
+            last = ticket
+        return page, None
+
+    @staticmethod
+    def _page_by_id(rows, pk, limit, after):
+        """
+        Applies keyset pagination on the primary key to rows sorted by it.
+        
+        @param rows: List of row dictionaries sorted by pk
+        @param pk: Name of the primary-key column
+        @param limit: Maximum number of rows, or None for all
+        @param after: Primary key of the last row already returned, or None
+        @return: Tuple (rows of the page, primary key of its last row if more rows follow, otherwise None)
+        """
+        if after is not None:
+            rows = rows[bisect_right([row[pk] for row in rows], after):]
+        if limit is None or len(rows) <= limit:
+            return rows, None
+        return rows[:limit], rows[limit - 1][pk]
+
+    def ticket_detail(self, ticket_id, comments_limit=None, comments_after=None, logs_limit=None, logs_after=None,
+                      fields=None):
+        """
+        Returns a ticket enriched with names, its comments (with author names) and its logs.
+        Comments and logs can be paged by their primary key; the ticket then
+        carries 'comments_next_after' / 'logs_next_after' with the key to continue from.
+        
+        @param ticket_id: The ID of the ticket
+        @param comments_limit: Maximum number of comments, or None for all
+        @param comments_after: comment_id of the last comment already returned, or None
+        @param logs_limit: Maximum number of logs, or None for all
+        @param logs_after: log_id of the last log already returned, or None
+        @param fields: Set of TICKET_DETAIL_FIELDS to return, or None for all; comments and logs
+                       are only read if requested
+        @return: Ticket dictionary, or None if the ticket does not exist
+        """
+        store = self.store
+        ticket = store.get_ticket(ticket_id)
+        if not ticket:
+            return None
+        enriched_ticket = _project(ticket, fields)
+        if _wanted(fields, 'status_name'):
+            enriched_ticket['status_name'] = self._name_of(store.get_status(ticket['status_id']), 'status_name')
+        if _wanted(fields, 'category_name'):
+            enriched_ticket['category_name'] = self._name_of(store.get_category(ticket['category_id']), 'category_name')
+        if _wanted(fields, 'user_name'):
+            enriched_ticket['user_name'] = self._name_of(store.get_user(ticket['user_id']), 'full_name')
+        if _wanted(fields, 'assigned_staff_name'):
+            enriched_ticket['assigned_staff_name'] = self._name_of(store.get_staff(ticket['assigned_staff_id']), 'full_name')
+        if _wanted(fields, 'comments'):
+            comments = sorted(store.comments_by_ticket(ticket_id), key=lambda c: c['comment_id'])
+            comments, comments_next = self._page_by_id(comments, 'comment_id', comments_limit, comments_after)
+            # Copy comments so that author names are not written back into the store
+            enriched_ticket['comments'] = [comment.copy() for comment in comments]
+            for comment in enriched_ticket['comments']:
+                if comment.get('author_type') == 'user':
+                    author_info = store.get_user(comment['author_id'])
+                else:
+                    author_info = store.get_staff(comment['author_id'])
+                comment['author_name'] = self._name_of(author_info, 'full_name')
+            if comments_limit is not None or comments_after is not None:
+                enriched_ticket['comments_next_after'] = comments_next
+        if _wanted(fields, 'logs'):
+            logs = sorted(store.logs_by_ticket(ticket_id), key=lambda l: l['log_id'])
+            enriched_ticket['logs'], logs_next = self._page_by_id(logs, 'log_id', logs_limit, logs_after)
+            if logs_limit is not None or logs_after is not None:
+                enriched_ticket['logs_next_after'] = logs_next
+        return enriched_ticket
+
+    def tickets_by_ids(self, staff_id, ticket_ids, detail=False, fields=None):
+        """
+        Returns several tickets of a staff member in one call, either enriched like
+        staff_tickets() or with the full detail of ticket_detail().
+        
+        @param staff_id: The ID of the staff member the tickets must be assigned to
+        @param ticket_ids: List of ticket IDs
+        @param detail: Whether to return ticket_detail() dictionaries with comments and logs
+        @param fields: Set of TICKET_FIELDS (TICKET_DETAIL_FIELDS with detail) to return, or None for all
+        @return: List of ticket dictionaries in the order of ticket_ids; tickets that do not exist
+                 or are assigned to someone else are left out
+        """
+        tickets = []
+        for ticket_id in ticket_ids:
+            ticket = self.store.get_ticket(ticket_id)
+            if not ticket or ticket.get('assigned_staff_id') != staff_id:
+                continue
+            tickets.append(self.ticket_detail(ticket_id, fields=fields) if detail else self._enrich_ticket(ticket, fields))
+        return tickets
+
+    def avg_resolution_hours(self, staff_id):
+        """
+        Returns the average created-to-closed time of a staff member's tickets.
+        
+        @param staff_id: The ID of the staff member
+        @return: Average resolution time in hours, or 0 if no ticket was closed
+        """
+        tv = self.columns.view()
+        resolved_times = tv.resolution_hours(tv.for_staff([staff_id]))
+        return float(resolved_times.mean()) if len(resolved_times) else 0
+
+    def duration_quantiles(self, metric, staff_id=None, departments=None):
+        """
+        Returns duration percentiles of one staff member's tickets or of the given departments,
+        read from the incrementally maintained DDSketch sketches.
+        
+        @param metric: Duration metric, 'resolution' or 'first_response'
+        @param staff_id: The ID of the staff member, or None to use departments
+        @param departments: List of department names, used if staff_id is None
+        @return: Dictionary with 'count', 'mean' and the REPORTED_QUANTILES in hours (None without data)
+        """
+        if staff_id is not None:
+            return self.durations.for_staff(metric, staff_id)
+        return self.durations.for_departments(metric, departments)
+
+    def category_duration_quantiles(self, metric, staff_id):
+        """
+        Returns duration percentiles of a staff member's tickets per category.
+        
+        @param metric: Duration metric, 'resolution' or 'first_response'
+        @param staff_id: The ID of the staff member
+        @return: Dictionary mapping category ID to a dictionary like duration_quantiles()
+        """
+        return self.durations.categories_for_staff(metric, staff_id)
+
+    def most_common_category(self, departments):
+        """
+        Returns the name of the most frequent ticket category among the given departments.
+        Ties go to the lowest category ID.
+        
+        @param departments: List of department names
+        @return: Category name, or None if there are no categorized tickets
+        """
+        category_counts = {
+            cat_id: counts['assigned']
+            for cat_id, counts in self.aggregates.categories_for_departments(departments).items()
+            if cat_id is not None
+        }
+        most_common_category_id = max(sorted(category_counts), key=category_counts.get, default=None)
+        if most_common_category_id is None:
+            return None
+        category_info = self.store.get_category(most_common_category_id)
+        return category_info.get('category_name') if category_info else None
+
+    def category_counts(self, staff_id):
+        """
+        Returns the ticket counts of a staff member for every problem category.
+        
+        @param staff_id: The ID of the staff member
+        @return: List of dictionaries with 'category_id', 'category_name', 'assigned'
+                 and 'resolved', ordered by category ID
+        """
+        staff_categories = self.aggregates.categories_for_staff(staff_id)
+        category_stats = []
+        for category in sorted(self.store.problem_categories, key=lambda c: c['category_id']):
+            counts = staff_categories.get(category['category_id'], {'assigned': 0, 'resolved': 0})
+            category_stats.append({
+                'category_id': category['category_id'],
+                'category_name': category['category_name'],
+                'assigned': counts['assigned'],
+                'resolved': counts['resolved']
+            })
+        return category_stats
+
+    def activity_histogram(self, edges, granularity, staff_id=None, departments=None):
+        """
+        Counts tickets created and closed in each bucket of a period, for one staff
+        member or for all staff of the given departments.
+        
+        @param edges: Bucket boundaries from timeline_buckets.bucket_edges() (n + 1 datetimes)
+        @param granularity: Granularity the edges were built with (unused, the edges define the buckets)
+        @param staff_id: The ID of the staff member, or None to use departments
+        @param departments: List of department names, used if staff_id is None
+        @return: Tuple (created counts, closed counts), two lists of length n
+        """
+        if staff_id is not None:
+            staff_ids = [staff_id]
+        else:
+            staff_ids = [s['staff_id'] for s in self.store.staff if s.get('department', '') in departments]
+        tv = self.columns.view()
+        mask = tv.for_staff(staff_ids)
+        epoch_edges = np.array([to_epoch(edge) for edge in edges])
+        created = tv.bucket_counts('created', mask, epoch_edges)
+        closed = tv.bucket_counts('closed', mask, epoch_edges)
+        return [int(n) for n in created], [int(n) for n in closed]
+
+    def _fit_forecasts(self, first_day):
+        """
+        Fits the forecasts of all staff members and departments to the daily counts from the ticket columns.
+        
+        @param first_day: date of the first day of history
+        @return: TicketForecasts instance
+        """
+        staff = sorted(self.store.staff, key=lambda s: s['staff_id'])
+        staff_ids = np.array([s['staff_id'] for s in staff], dtype=np.int64)
+        start = to_epoch(datetime.combine(first_day, datetime.min.time()))
+        tv = self.columns.view()
+        created = tv.staff_day_counts('created', staff_ids, start, FORECAST_HISTORY_DAYS)
+        closed = tv.staff_day_counts('closed', staff_ids, start, FORECAST_HISTORY_DAYS)
+        return TicketForecasts(first_day, staff_ids.tolist(), [s.get('department') for s in staff], created, closed)
+
+    def forecast(self, staff_id=None, departments=None):
+        """
+        Returns the ticket forecast for the coming days of one staff member or of the given departments.
+        The models of all staff members and departments are fitted together once per data version.
+        
+        @param staff_id: The ID of the staff member, or None to use departments
+        @param departments: List of department names, used if staff_id is None
+        @return: Dictionary from TicketForecasts.summary()
+        """
+        first_day = date.today() - timedelta(days=FORECAST_HISTORY_DAYS)
+        forecasts = self.forecasts.get((self.store.version, first_day), lambda: self._fit_forecasts(first_day))
+        return forecasts.summary(staff_id, departments)
+
+    def counts(self):
+        """
+        Returns the number of rows held for each table.
+        
+        @return: Dictionary with users, staff, tickets, comments and logs counts
+        """
+        return self.store.counts()
+
+    def stats(self):
+        """
+        Returns backend details for the health endpoint.
+        
+        @return: Dictionary with the backend mode and the memory held by the ticket columns
+        """
+        return {'mode': self.name, 'ticket_columns_bytes': self.columns.memory_bytes()}
+
+    def data_version(self):
+        """
+        Returns a value that changes whenever the loaded data changes.
+        
+        @return: Integer version of the data store
+        """
+        return self.store.version
+
+# Per-staff ticket counters, joined laterally so every query below can use idx_tickets_assigned_staff_id
+_STAFF_TICKET_COUNTS = """
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS assigned,
+               COUNT(*) FILTER (WHERE t.status_id = ANY(%(active)s)) AS active,
+               COUNT(*) FILTER (WHERE t.status_id = ANY(%(resolved)s)) AS resolved
+        FROM Tickets t
+        WHERE t.assigned_staff_id = s.staff_id
+    ) c ON TRUE
+"""
+
+# Durations in hours per duration metric, with the assignee and category of the ticket
+_RESOLUTION_HOURS = """
+    SELECT t.assigned_staff_id AS staff_id, t.category_id,
+           EXTRACT(EPOCH FROM t.closed_at - t.created_at) / 3600.0 AS hours
+    FROM Tickets t
+    WHERE t.closed_at IS NOT NULL AND t.created_at IS NOT NULL
+"""
+_FIRST_RESPONSE_HOURS = """
+    SELECT t.assigned_staff_id AS staff_id, t.category_id,
+           GREATEST(EXTRACT(EPOCH FROM r.first_reply_at - t.created_at) / 3600.0, 0) AS hours
+    FROM Tickets t
+    JOIN (
+        SELECT ticket_id, MIN(created_at) AS first_reply_at
+        FROM TicketComments
+        WHERE author_type = 'staff'
+        GROUP BY ticket_id
+    ) r ON r.ticket_id = t.ticket_id
+    WHERE t.created_at IS NOT NULL
+"""
+
+# DDSketch bucket of a duration, computed like DDSketch.bucket_key() (NULL for durations at or below zero)
+_SKETCH_BUCKET = "CASE WHEN d.hours > 0 THEN CEIL(LN(d.hours::float8) / %(log_gamma)s::float8)::integer END"
+
+# Queries answering the endpoints directly in PostgreSQL (see SqlBackend)
+SQL_QUERIES = {
+    'departments': """
+        SELECT DISTINCT department
+        FROM Staff
+        WHERE department IS NOT NULL
+        ORDER BY department;
+    """,
+    'staff_counts': """
+        SELECT COUNT(*) AS assigned,
+               COUNT(*) FILTER (WHERE status_id = ANY(%(active)s)) AS active,
+               COUNT(*) FILTER (WHERE status_id = ANY(%(resolved)s)) AS resolved
+        FROM Tickets
+        WHERE assigned_staff_id = %(staff_id)s;
+    """,
+    'department_counts': """
+        SELECT COALESCE(SUM(c.assigned), 0)::bigint AS assigned,
+               COALESCE(SUM(c.active), 0)::bigint AS active,
+               COALESCE(SUM(c.resolved), 0)::bigint AS resolved
+        FROM Staff s""" + _STAFF_TICKET_COUNTS + """
+        WHERE s.department = ANY(%(departments)s);
+    """,
+    'department_breakdown': """
+        SELECT s.department,
+               COALESCE(SUM(c.assigned), 0)::bigint AS assigned,
+               COALESCE(SUM(c.active), 0)::bigint AS active,
+               COALESCE(SUM(c.resolved), 0)::bigint AS resolved,
+               COUNT(*) FILTER (WHERE s.is_active) AS staff_count
+        FROM Staff s""" + _STAFF_TICKET_COUNTS + """
+        WHERE s.department = ANY(%(departments)s)
+        GROUP BY s.department;
+    """,
+    'staff_members': """
+        SELECT s.staff_id, s.username, s.full_name, s.email, s.department, s.is_active,
+               c.assigned AS assigned_tickets, c.active AS active_tickets, c.resolved AS resolved_tickets
+        FROM Staff s""" + _STAFF_TICKET_COUNTS + """
+        WHERE s.is_active AND s.department = ANY(%(departments)s)
+        ORDER BY s.staff_id;
+    """,
+    'staff_tickets': """
+        SELECT t.ticket_id, t.subject, t.description, t.created_at, t.updated_at, t.closed_at,
+               t.user_id, t.assigned_staff_id, t.status_id, t.category_id,
+               COALESCE(ts.status_name, 'Unknown') AS status_name,
+               COALESCE(pc.category_name, 'Unknown') AS category_name,
+               COALESCE(u.full_name, 'Unknown') AS user_name,
+               (SELECT COUNT(*) FROM TicketComments tc WHERE tc.ticket_id = t.ticket_id) AS comments_count
+        FROM Tickets t
+        LEFT JOIN TicketStatuses ts ON ts.status_id = t.status_id
+        LEFT JOIN ProblemCategories pc ON pc.category_id = t.category_id
+        LEFT JOIN Users u ON u.user_id = t.user_id
+        WHERE t.assigned_staff_id = %(staff_id)s
+        ORDER BY t.ticket_id;
+    """,
+    'ticket_page': """
+        SELECT t.ticket_id, t.subject, t.description, t.created_at, t.updated_at, t.closed_at,
+               t.user_id, t.assigned_staff_id, t.status_id, t.category_id,
+               COALESCE(ts.status_name, 'Unknown') AS status_name,
+               COALESCE(pc.category_name, 'Unknown') AS category_name,
+               COALESCE(u.full_name, 'Unknown') AS user_name,
+               (SELECT COUNT(*) FROM TicketComments tc WHERE tc.ticket_id = t.ticket_id) AS comments_count
+        FROM Tickets t
+        LEFT JOIN TicketStatuses ts ON ts.status_id = t.status_id
+        LEFT JOIN ProblemCategories pc ON pc.category_id = t.category_id
+        LEFT JOIN Users u ON u.user_id = t.user_id
+        WHERE t.assigned_staff_id = %(staff_id)s
+          AND (%(after_created)s::timestamp IS NULL OR (t.created_at, t.ticket_id) > (%(after_created)s, %(after_id)s))
+          AND (%(statuses)s::integer[] IS NULL OR t.status_id = ANY(%(statuses)s))
+          AND (%(categories)s::integer[] IS NULL OR t.category_id = ANY(%(categories)s))
+          AND (%(created_from)s::timestamp IS NULL OR t.created_at >= %(created_from)s)
+          AND (%(created_to)s::timestamp IS NULL OR t.created_at < %(created_to)s)
+          AND (%(closed_from)s::timestamp IS NULL OR t.closed_at >= %(closed_from)s)
+          AND (%(closed_to)s::timestamp IS NULL OR t.closed_at < %(closed_to)s)
+        ORDER BY t.created_at, t.ticket_id
+        LIMIT %(limit)s;
+    """,
+    'ticket': """
+        SELECT t.ticket_id, t.subject, t.description, t.created_at, t.updated_at, t.closed_at,
+               t.user_id, t.assigned_staff_id, t.status_id, t.category_id,
+               COALESCE(ts.status_name, 'Unknown') AS status_name,
+               COALESCE(pc.category_name, 'Unknown') AS category_name,
+               COALESCE(u.full_name, 'Unknown') AS user_name,
+               COALESCE(s.full_name, 'Unknown') AS assigned_staff_name
+        FROM Tickets t
+        LEFT JOIN TicketStatuses ts ON ts.status_id = t.status_id
+        LEFT JOIN ProblemCategories pc ON pc.category_id = t.category_id
+        LEFT JOIN Users u ON u.user_id = t.user_id
+        LEFT JOIN Staff s ON s.staff_id = t.assigned_staff_id
+        WHERE t.ticket_id = %(ticket_id)s;
+    """,
+    'ticket_comments': """
+        SELECT c.comment_id, c.ticket_id, c.author_id, c.author_type, c.comment_text, c.created_at,
+               COALESCE(CASE WHEN c.author_type = 'user' THEN u.full_name ELSE s.full_name END, 'Unknown') AS author_name
+        FROM TicketComments c
+        LEFT JOIN Users u ON c.author_type = 'user' AND u.user_id = c.author_id
+        LEFT JOIN Staff s ON c.author_type IS DISTINCT FROM 'user' AND s.staff_id = c.author_id
+        WHERE c.ticket_id = %(ticket_id)s
+          AND (%(after)s::integer IS NULL OR c.comment_id > %(after)s)
+        ORDER BY c.comment_id
+        LIMIT %(limit)s;
+    """,
+    'ticket_logs': """
+        SELECT log_id, ticket_id, action, performed_by_staff_id, performed_at
+        FROM TicketLogs
+        WHERE ticket_id = %(ticket_id)s
+          AND (%(after)s::integer IS NULL OR log_id > %(after)s)
+        ORDER BY log_id
+        LIMIT %(limit)s;
+    """,
+    'tickets_by_ids': """
+        SELECT t.ticket_id, t.subject, t.description, t.created_at, t.updated_at, t.closed_at,
+               t.user_id, t.assigned_staff_id, t.status_id, t.category_id,
+               COALESCE(ts.status_name, 'Unknown') AS status_name,
+               COALESCE(pc.category_name, 'Unknown') AS category_name,
+               COALESCE(u.full_name, 'Unknown') AS user_name,
+               (SELECT COUNT(*) FROM TicketComments tc WHERE tc.ticket_id = t.ticket_id) AS comments_count
+        FROM Tickets t
+        LEFT JOIN TicketStatuses ts ON ts.status_id = t.status_id
+        LEFT JOIN ProblemCategories pc ON pc.category_id = t.category_id
+        LEFT JOIN Users u ON u.user_id = t.user_id
+        WHERE t.ticket_id = ANY(%(ticket_ids)s) AND t.assigned_staff_id = %(staff_id)s;
+    """,
+    'ticket_details_by_ids': """
+        SELECT t.ticket_id, t.subject, t.description, t.created_at, t.updated_at, t.closed_at,
+               t.user_id, t.assigned_staff_id, t.status_id, t.category_id,
+               COALESCE(ts.status_name, 'Unknown') AS status_name,
+               COALESCE(pc.category_name, 'Unknown') AS category_name,
+               COALESCE(u.full_name, 'Unknown') AS user_name,
+               COALESCE(s.full_name, 'Unknown') AS assigned_staff_name
+        FROM Tickets t
+        LEFT JOIN TicketStatuses ts ON ts.status_id = t.status_id
+        LEFT JOIN ProblemCategories pc ON pc.category_id = t.category_id
+        LEFT JOIN Users u ON u.user_id = t.user_id
+        LEFT JOIN Staff s ON s.staff_id = t.assigned_staff_id
+        WHERE t.ticket_id = ANY(%(ticket_ids)s) AND t.assigned_staff_id = %(staff_id)s;
+    """,
+    'comments_by_tickets': """
+        SELECT c.comment_id, c.ticket_id, c.author_id, c.author_type, c.comment_text, c.created_at,
+               COALESCE(CASE WHEN c.author_type = 'user' THEN u.full_name ELSE s.full_name END, 'Unknown') AS author_name
+        FROM TicketComments c
+        LEFT JOIN Users u ON c.author_type = 'user' AND u.user_id = c.author_id
+        LEFT JOIN Staff s ON c.author_type IS DISTINCT FROM 'user' AND s.staff_id = c.author_id
+        WHERE c.ticket_id = ANY(%(ticket_ids)s)
+        ORDER BY c.ticket_id, c.comment_id;
+    """,
+    'logs_by_tickets': """
+        SELECT log_id, ticket_id, action, performed_by_staff_id, performed_at
+        FROM TicketLogs
+        WHERE ticket_id = ANY(%(ticket_ids)s)
+        ORDER BY ticket_id, log_id;
+    """,
+    'avg_resolution_hours': """
+        SELECT AVG(EXTRACT(EPOCH FROM closed_at - created_at) / 3600.0)::float8 AS hours
+        FROM Tickets
+        WHERE assigned_staff_id = %(staff_id)s AND closed_at IS NOT NULL AND created_at IS NOT NULL;
+    """,
+    'most_common_category': """
+        SELECT t.category_id, pc.category_name
+        FROM Tickets t
+        JOIN Staff s ON s.staff_id = t.assigned_staff_id
+        LEFT JOIN ProblemCategories pc ON pc.category_id = t.category_id
+        WHERE s.department = ANY(%(departments)s) AND t.category_id IS NOT NULL
+        GROUP BY t.category_id, pc.category_name
+        ORDER BY COUNT(*) DESC, t.category_id
+        LIMIT 1;
+    """,
+    'category_counts': """
+        SELECT pc.category_id, pc.category_name,
+               COUNT(t.ticket_id) AS assigned,
+               COUNT(t.ticket_id) FILTER (WHERE t.status_id = ANY(%(resolved)s)) AS resolved
+        FROM ProblemCategories pc
+        LEFT JOIN Tickets t ON t.category_id = pc.category_id AND t.assigned_staff_id = %(staff_id)s
+        GROUP BY pc.category_id, pc.category_name
+        ORDER BY pc.category_id;
+    """,
+    'activity_histogram': """
+        SELECT date_trunc(%(granularity)s, stamp) AS bucket, SUM(created)::bigint AS created, SUM(closed)::bigint AS closed
+        FROM (
+            SELECT created_at AS stamp, 1 AS created, 0 AS closed
+            FROM Tickets
+            WHERE created_at >= %(start)s AND created_at < %(end)s
+              AND (%(staff_id)s::integer IS NULL OR assigned_staff_id = %(staff_id)s)
+              AND (%(departments)s::text[] IS NULL OR assigned_staff_id IN (SELECT staff_id FROM Staff WHERE department = ANY(%(departments)s)))
+            UNION ALL
+            SELECT closed_at AS stamp, 0 AS created, 1 AS closed
+            FROM Tickets
+            WHERE closed_at >= %(start)s AND closed_at < %(end)s
+              AND (%(staff_id)s::integer IS NULL OR assigned_staff_id = %(staff_id)s)
+              AND (%(departments)s::text[] IS NULL OR assigned_staff_id IN (SELECT staff_id FROM Staff WHERE department = ANY(%(departments)s)))
+        ) activity
+        GROUP BY bucket;
+    """,
+    'staff_departments': """
+        SELECT staff_id, department
+        FROM Staff
+        ORDER BY staff_id;
+    """,
+    'daily_activity': """
+        SELECT staff_id, day, SUM(created)::bigint AS created, SUM(closed)::bigint AS closed
+        FROM (
+            SELECT assigned_staff_id AS staff_id, created_at::date AS day, 1 AS created, 0 AS closed
+            FROM Tickets
+            WHERE created_at >= %(start)s AND created_at < %(end)s AND assigned_staff_id IS NOT NULL
+            UNION ALL
+            SELECT assigned_staff_id AS staff_id, closed_at::date AS day, 0 AS created, 1 AS closed
+            FROM Tickets
+            WHERE closed_at >= %(start)s AND closed_at < %(end)s AND assigned_staff_id IS NOT NULL
+        ) activity
+        GROUP BY staff_id, day;
+    """,
+    'resolution_sketch': """
+        SELECT """ + _SKETCH_BUCKET + """ AS bucket, COUNT(*) AS count, SUM(d.hours)::float8 AS total
+        FROM (""" + _RESOLUTION_HOURS + """) d
+        WHERE (%(staff_id)s::integer IS NULL OR d.staff_id = %(staff_id)s)
+          AND (%(departments)s::text[] IS NULL OR d.staff_id IN (SELECT staff_id FROM Staff WHERE department = ANY(%(departments)s)))
+        GROUP BY bucket;
+    """,
+    'resolution_category_sketch': """
+        SELECT d.category_id, """ + _SKETCH_BUCKET + """ AS bucket, COUNT(*) AS count, SUM(d.hours)::float8 AS total
+        FROM (""" + _RESOLUTION_HOURS + """) d
+        WHERE d.staff_id = %(staff_id)s
+        GROUP BY d.category_id, bucket;
+    """,
+    'first_response_sketch': """
+        SELECT """ + _SKETCH_BUCKET + """ AS bucket, COUNT(*) AS count, SUM(d.hours)::float8 AS total
+        FROM (""" + _FIRST_RESPONSE_HOURS + """) d
+        WHERE (%(staff_id)s::integer IS NULL OR d.staff_id = %(staff_id)s)
+          AND (%(departments)s::text[] IS NULL OR d.staff_id IN (SELECT staff_id FROM Staff WHERE department = ANY(%(departments)s)))
+        GROUP BY bucket;
+    """,
+    'first_response_category_sketch': """
+        SELECT d.category_id, """ + _SKETCH_BUCKET + """ AS bucket, COUNT(*) AS count, SUM(d.hours)::float8 AS total
+        FROM (""" + _FIRST_RESPONSE_HOURS + """) d
+        WHERE d.staff_id = %(staff_id)s
+        GROUP BY d.category_id, bucket;
+    """,
+    'counts': """
+        SELECT (SELECT COUNT(*) FROM Users) AS users,
+               (SELECT COUNT(*) FROM Staff) AS staff,
+               (SELECT COUNT(*) FROM Tickets) AS tickets,
+               (SELECT COUNT(*) FROM TicketComments) AS comments,
+               (SELECT COUNT(*) FROM TicketLogs) AS logs;
+    """
+}
+
+# Variants of SQL_QUERIES reading the reporting materialized views (create_support_db.sql, section 6)
+VIEW_QUERIES = {
+    'staff_counts': """
+        SELECT COALESCE(SUM(created_count), 0)::bigint AS assigned,
+               COALESCE(SUM(created_count) FILTER (WHERE status_id = ANY(%(active)s)), 0)::bigint AS active,
+               COALESCE(SUM(created_count) FILTER (WHERE status_id = ANY(%(resolved)s)), 0)::bigint AS resolved
+        FROM mv_ticket_daily_stats
+        WHERE staff_id = %(staff_id)s;
+    """,
+    'department_counts': """
+        SELECT COALESCE(SUM(created_count), 0)::bigint AS assigned,
+               COALESCE(SUM(created_count) FILTER (WHERE status_id = ANY(%(active)s)), 0)::bigint AS active,
+               COALESCE(SUM(created_count) FILTER (WHERE status_id = ANY(%(resolved)s)), 0)::bigint AS resolved
+        FROM mv_ticket_daily_stats
+        WHERE department = ANY(%(departments)s);
+    """,
+    'department_breakdown': """
+        WITH staff_counts AS (
+            SELECT department, COUNT(*) FILTER (WHERE is_active) AS staff_count
+            FROM Staff
+            WHERE department = ANY(%(departments)s)
+            GROUP BY department
+        ), ticket_counts AS (
+            SELECT department,
+                   SUM(created_count)::bigint AS assigned,
+                   COALESCE(SUM(created_count) FILTER (WHERE status_id = ANY(%(active)s)), 0)::bigint AS active,
+                   COALESCE(SUM(created_count) FILTER (WHERE status_id = ANY(%(resolved)s)), 0)::bigint AS resolved
+            FROM mv_ticket_daily_stats
+            WHERE department = ANY(%(departments)s)
+            GROUP BY department
+        )
+        SELECT sc.department,
+               COALESCE(tc.assigned, 0) AS assigned,
+               COALESCE(tc.active, 0) AS active,
+               COALESCE(tc.resolved, 0) AS resolved,
+               sc.staff_count
+        FROM staff_counts sc
+        LEFT JOIN ticket_counts tc ON tc.department = sc.department;
+    """,
+    'avg_resolution_hours': """
+        SELECT (SUM(resolution_hours_sum) / NULLIF(SUM(resolved_count), 0))::float8 AS hours
+        FROM mv_ticket_resolution_stats
+        WHERE staff_id = %(staff_id)s;
+    """,
+    'most_common_category': """
+        SELECT v.category_id, pc.category_name
+        FROM mv_ticket_daily_stats v
+        LEFT JOIN ProblemCategories pc ON pc.category_id = v.category_id
+        WHERE v.department = ANY(%(departments)s)
+        GROUP BY v.category_id, pc.category_name
+        ORDER BY SUM(v.created_count) DESC, v.category_id
+        LIMIT 1;
+    """,
+    'category_counts': """
+        SELECT pc.category_id, pc.category_name,
+               COALESCE(v.assigned, 0) AS assigned,
+               COALESCE(v.resolved, 0) AS resolved
+        FROM ProblemCategories pc
+        LEFT JOIN (
+            SELECT category_id,
+                   SUM(created_count)::bigint AS assigned,
+                   SUM(created_count) FILTER (WHERE status_id = ANY(%(resolved)s))::bigint AS resolved
+            FROM mv_ticket_daily_stats
+            WHERE staff_id = %(staff_id)s
+            GROUP BY category_id
+        ) v ON v.category_id = pc.category_id
+        ORDER BY pc.category_id;
+    """,
+    'activity_histogram': """
+        SELECT date_trunc(%(granularity)s, day::timestamp) AS bucket,
+               SUM(created_count)::bigint AS created, SUM(closed_count)::bigint AS closed
+        FROM mv_ticket_daily_stats
+        WHERE day >= %(start)s AND day < %(end)s
+          AND (%(staff_id)s::integer IS NULL OR staff_id = %(staff_id)s)
+          AND (%(departments)s::text[] IS NULL OR department = ANY(%(departments)s))
+        GROUP BY bucket;
+    """,
+    'daily_activity': """
+        SELECT staff_id, day, SUM(created_count)::bigint AS created, SUM(closed_count)::bigint AS closed
+        FROM mv_ticket_daily_stats
+        WHERE day >= %(start)s AND day < %(end)s
+        GROUP BY staff_id, day;
+    """
+}
+
+class SqlBackend:
+    """
+    Answers endpoint queries with parameterized SQL instead of an in-memory copy.
+    
+    Every method runs index-friendly queries on a pooled connection: counters
+    are computed with GROUP BY / FILTER aggregates, names are joined in and
+    lists are ordered by primary key, so the results are identical to
+    MemoryBackend. Nothing is loaded at startup, which suits deployments that
+    cannot hold the tickets, comments and logs tables in every worker.
+    Statistics are read from the reporting materialized views (VIEW_QUERIES)
+    while the given ReportViewRefresher reports them fresh, and from the raw
+    tables otherwise. Database errors propagate to the endpoint as psycopg2.Error.
+    """
+
+    name = 'sql'
+
+    def __init__(self, views=None):
+        """
+        @param views: Optional ReportViewRefresher deciding whether the materialized views may be used
+        """
+        self.views = views
+        self.forecasts = ForecastCache()
+
+    def _query(self, name, **params):
+        """
+        Runs one of SQL_QUERIES on a pooled connection, or its VIEW_QUERIES
+        variant while the materialized views are fresh.
+        
+        @param name: Key of the query in SQL_QUERIES
+        @param params: Named query parameters
+        @return: List of row dictionaries
+        """
+        params.setdefault('active', list(ACTIVE_STATUSES))
+        params.setdefault('resolved', list(RESOLVED_STATUSES))
+        query = SQL_QUERIES[name]
+        if name in VIEW_QUERIES and self.views is not None and self.views.is_fresh():
+            query = VIEW_QUERIES[name]
+        with db_connection() as conn:
+            return fetch_rows(conn, query, params)
+
+    def staff_counts(self, staff_id):
+        """
+        Returns the assigned, active and resolved ticket counts of a staff member.
+        
+        @param staff_id: The ID of the staff member
+        @return: Dictionary with 'assigned', 'active' and 'resolved' counts
+        """
+        return self._query('staff_counts', staff_id=staff_id)[0]
+
+    def departments(self):
+        """
+        Returns the names of all departments that have staff members.
+        
+        @return: Sorted list of department names
+        """
+        return [row['department'] for row in self._query('departments')]
+
+    def department_counts(self, departments):
+        """
+        Returns the combined ticket counts of staff from the given departments.
+        
+        @param departments: List of department names
+        @return: Dictionary with 'assigned', 'active' and 'resolved' counts
+        """
+        return self._query('department_counts', departments=list(departments))[0]
+
+    def department_breakdown(self, departments):
+        """
+        Returns ticket counts and the number of active staff for each department.
+        
+        @param departments: List of department names
+        @return: Dictionary mapping department name to a dictionary with
+                 'assigned', 'active', 'resolved' and 'staff_count'
+        """
+        rows = {row.pop('department'): row for row in self._query('department_breakdown', departments=list(departments))}
+        empty = {'assigned': 0, 'active': 0, 'resolved': 0, 'staff_count': 0}
+        return {dept: rows.get(dept, dict(empty)) for dept in departments}
+
+    def staff_members(self, departments, fields=None):
+        """
+        Returns active staff members of the given departments with their ticket counts.
+        
+        @param departments: List of department names
+        @param fields: Set of STAFF_FIELDS to return, or None for all (applied to the fetched rows)
+        @return: List of staff dictionaries with 'assigned_tickets', 'active_tickets'
+                 and 'resolved_tickets' added, ordered by staff ID
+        """
+        rows = self._query('staff_members', departments=list(departments))
+        return rows if fields is None else [_project(row, fields) for row in rows]
+
+    def iter_staff_members(self, departments, fields=None):
+        """
+        Yields active staff members of the given departments, with counts like staff_members(),
+        through a server-side cursor. The pooled connection is held until the
+        generator is exhausted or closed.
+        
+        @param departments: List of department names
+        @param fields: Set of STAFF_FIELDS to return, or None for all (applied to the fetched rows)
+        @return: Generator of staff dictionaries ordered by staff ID
+        """
+        params = {'departments': list(departments), 'active': list(ACTIVE_STATUSES), 'resolved': list(RESOLVED_STATUSES)}
+        with db_connection() as conn:
+            rows = iter_rows(conn, SQL_QUERIES['staff_members'], params, cursor_name='staff_members')
+            if fields is None:
+                yield from rows
+            else:
+                for row in rows:
+                    yield _project(row, fields)
+
+    def staff_tickets(self, staff_id, fields=None):
+        """
+        Returns the tickets assigned to a staff member, enriched with names and comment counts.
+        
+        @param staff_id: The ID of the staff member
+        @param fields: Set of TICKET_FIELDS to return, or None for all (applied to the fetched rows)
+        @return: List of ticket dictionaries ordered by ticket ID
+        """
+        rows = self._query('staff_tickets', staff_id=staff_id)
+        return rows if fields is None else [_project(row, fields) for row in rows]
+
+    def iter_staff_tickets(self, staff_id, fields=None):
+        """
+        Yields the tickets assigned to a staff member, enriched like staff_tickets(),
+        through a server-side cursor. The pooled connection is held until the
+        generator is exhausted or closed.
+        
+        @param staff_id: The ID of the staff member
+        @param fields: Set of TICKET_FIELDS to return, or None for all (applied to the fetched rows)
+        @return: Generator of ticket dictionaries ordered by ticket ID
+        """
+        with db_connection() as conn:
+            rows = iter_rows(conn, SQL_QUERIES['staff_tickets'], {'staff_id': staff_id}, cursor_name='staff_tickets')
+            if fields is None:
+                yield from rows
+            else:
+                for row in rows:
+                    yield _project(row, fields)
+
+    def ticket_page(self, staff_id, limit, after=None, statuses=None, categories=None,
+                    created_from=None, created_to=None, closed_from=None, closed_to=None, fields=None):
+        """
+        Returns one page of a staff member's tickets in (created_at, ticket_id) order.
+        The keyset condition and the ORDER BY follow idx_tickets_staff_created.
+        
+        @param staff_id: The ID of the staff member
+        @param limit: Maximum number of tickets to return
+        @param after: Tuple (created_at, ticket_id) of the last ticket of the previous page, or None
+        @param statuses: Collection of status IDs to keep, or None for all
+        @param categories: Collection of category IDs to keep, or None for all
+        @param created_from: Inclusive lower created_at bound (datetime) or None
+        @param created_to: Exclusive upper created_at bound (datetime) or None
+        @param closed_from: Inclusive lower closed_at bound (datetime) or None
+        @param closed_to: Exclusive upper closed_at bound (datetime) or None
+        @param fields: Set of TICKET_FIELDS to return, or None for all (applied to the fetched rows)
+        @return: Tuple (list of enriched ticket dictionaries, (created_at, ticket_id) of the last
+                 returned ticket if more tickets follow, otherwise None)
+        """
+        rows = self._query(
+            'ticket_page', staff_id=staff_id, limit=limit + 1,
+            after_created=after[0] if after is not None else None,
+            after_id=after[1] if after is not None else None,
+            statuses=sorted(statuses) if statuses is not None else None,
+            categories=sorted(categories) if categories is not None else None,
+            created_from=created_from, created_to=created_to, closed_from=closed_from, closed_to=closed_to
+        )
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1]['created_at'], rows[-1]['ticket_id'])
+        if fields is not None:
+            rows = [_project(row, fields) for row in rows]
+        return rows, next_key
+
+    @staticmethod
+    def _fetch_page(conn, name, params, limit, after):
+        """
+        Runs a query paged by primary key, fetching one extra row to detect further pages.
+        
+        @param conn: Leased database connection
+        @param name: Key of the query in SQL_QUERIES
+        @param params: Query parameters other than the page bounds
+        @param limit: Maximum number of rows, or None for all
+        @param after: Primary key of the last row already returned, or None
+        @return: Tuple (rows of the page, True if more rows follow)
+        """
+        rows = fetch_rows(conn, SQL_QUERIES[name], {**params, 'after': after, 'limit': limit + 1 if limit is not None else None})
+        if limit is None or len(rows) <= limit:
+            return rows, False
+        return rows[:limit], True
+
+    def ticket_detail(self, ticket_id, comments_limit=None, comments_after=None, logs_limit=None, logs_after=None,
+                      fields=None):
+        """
+        Returns a ticket enriched with names, its comments (with author names) and its logs.
+        Comments and logs can be paged by their primary key; the ticket then
+        carries 'comments_next_after' / 'logs_next_after' with the key to continue from.
+        
+        @param ticket_id: The ID of the ticket
+        @param comments_limit: Maximum number of comments, or None for all
+        @param comments_after: comment_id of the last comment already returned, or None
+        @param logs_limit: Maximum number of logs, or None for all
+        @param logs_after: log_id of the last log already returned, or None
+        @param fields: Set of TICKET_DETAIL_FIELDS to return, or None for all; the comment and
+                       log queries only run if requested
+        @return: Ticket dictionary, or None if the ticket does not exist
+        """
+        params = {'ticket_id': ticket_id}
+        with db_connection() as conn:
+            rows = fetch_rows(conn, SQL_QUERIES['ticket'], params)
+            if not rows:
+                return None
+            ticket = _project(rows[0], fields) if fields is not None else rows[0]
+            if _wanted(fields, 'comments'):
+                ticket['comments'], more_comments = self._fetch_page(conn, 'ticket_comments', params, comments_limit, comments_after)
+                if comments_limit is not None or comments_after is not None:
+                    ticket['comments_next_after'] = ticket['comments'][-1]['comment_id'] if more_comments else None
+            if _wanted(fields, 'logs'):
+                ticket['logs'], more_logs = self._fetch_page(conn, 'ticket_logs', params, logs_limit, logs_after)
+                if logs_limit is not None or logs_after is not None:
+                    ticket['logs_next_after'] = ticket['logs'][-1]['log_id'] if more_logs else None
+        return ticket
+
+    def tickets_by_ids(self, staff_id, ticket_ids, detail=False, fields=None):
+        """
+        Returns several tickets of a staff member in one call, either enriched like
+        staff_tickets() or with the full detail of ticket_detail(). Comments and logs
+        of all tickets are read with one query each.
+        
+        @param staff_id: The ID of the staff member the tickets must be assigned to
+        @param ticket_ids: List of ticket IDs
+        @param detail: Whether to return ticket_detail() dictionaries with comments and logs
+        @param fields: Set of TICKET_FIELDS (TICKET_DETAIL_FIELDS with detail) to return, or None for all
+                       (applied to the fetched rows)
+        @return: List of ticket dictionaries in the order of ticket_ids; tickets that do not exist
+                 or are assigned to someone else are left out
+        """
+        params = {'staff_id': staff_id, 'ticket_ids': list(ticket_ids)}
+        with db_connection() as conn:
+            if not detail:
+                rows = fetch_rows(conn, SQL_QUERIES['tickets_by_ids'], params)
+            else:
+                rows = fetch_rows(conn, SQL_QUERIES['ticket_details_by_ids'], params)
+                params['ticket_ids'] = [row['ticket_id'] for row in rows]
+                for part in ('comments', 'logs'):
+                    if not _wanted(fields, part) or not rows:
+                        continue
+                    grouped = {}
+                    for child in fetch_rows(conn, SQL_QUERIES[f"{part}_by_tickets"], params):
+                        grouped.setdefault(child['ticket_id'], []).append(child)
+                    for row in rows:
+                        row[part] = grouped.get(row['ticket_id'], [])
+        by_id = {row['ticket_id']: row if fields is None else _project(row, fields) for row in rows}
+        return [by_id[ticket_id] for ticket_id in ticket_ids if ticket_id in by_id]
+
+    def avg_resolution_hours(self, staff_id):
+        """
+        Returns the average created-to-closed time of a staff member's tickets.
+        
+        @param staff_id: The ID of the staff member
+        @return: Average resolution time in hours, or 0 if no ticket was closed
+        """
+        return self._query('avg_resolution_hours', staff_id=staff_id)[0]['hours'] or 0
+
+    @staticmethod
+    def _sketch(rows):
+        """
+        Loads DDSketch bucket counts computed by one of the *_sketch queries.
+        
+        @param rows: Row dictionaries with 'bucket', 'count' and 'total'
+        @return: DDSketch instance
+        """
+        sketch = DDSketch()
+        for row in rows:
+            sketch.add_bucket(row['bucket'], row['count'], row['total'])
+        return sketch
+
+    def duration_quantiles(self, metric, staff_id=None, departments=None):
+        """
+        Returns duration percentiles of one staff member's tickets or of the given departments.
+        The database counts the durations into DDSketch buckets, so the values are identical
+        to those of MemoryBackend (within QUANTILE_SKETCH_ACCURACY of the exact percentiles).
+        
+        @param metric: Duration metric, 'resolution' or 'first_response'
+        @param staff_id: The ID of the staff member, or None to use departments
+        @param departments: List of department names, used if staff_id is None
+        @return: Dictionary with 'count', 'mean' and the REPORTED_QUANTILES in hours (None without data)
+        """
+        rows = self._query(f"{metric}_sketch", log_gamma=DDSketch().log_gamma, staff_id=staff_id,
+                           departments=list(departments) if staff_id is None else None)
+        return quantiles(self._sketch(rows))
+
+    def category_duration_quantiles(self, metric, staff_id):
+        """
+        Returns duration percentiles of a staff member's tickets per category.
+        
+        @param metric: Duration metric, 'resolution' or 'first_response'
+        @param staff_id: The ID of the staff member
+        @return: Dictionary mapping category ID to a dictionary like duration_quantiles()
+        """
+        rows_by_category = {}
+        for row in self._query(f"{metric}_category_sketch", log_gamma=DDSketch().log_gamma, staff_id=staff_id):
+            rows_by_category.setdefault(row['category_id'], []).append(row)
+        return {category_id: quantiles(self._sketch(rows)) for category_id, rows in rows_by_category.items()}
+
+    def most_common_category(self, departments):
+        """
+        Returns the name of the most frequent ticket category among the given departments.
+        Ties go to the lowest category ID.
+        
+        @param departments: List of department names
+        @return: Category name, or None if there are no categorized tickets
+        """
+        rows = self._query('most_common_category', departments=list(departments))
+        return rows[0]['category_name'] if rows else None
+
+    def category_counts(self, staff_id):
+        """
+        Returns the ticket counts of a staff member for every problem category.
+        
+        @param staff_id: The ID of the staff member
+        @return: List of dictionaries with 'category_id', 'category_name', 'assigned'
+                 and 'resolved', ordered by category ID
+        """
+        return self._query('category_counts', staff_id=staff_id)
+
+    def activity_histogram(self, edges, granularity, staff_id=None, departments=None):
+        """
+        Counts tickets created and closed in each bucket of a period, for one staff
+        member or for all staff of the given departments. The buckets are formed
+        by date_trunc() in the database; hourly buckets always read the raw tables
+        because the materialized view only has daily rows.
+        
+        @param edges: Bucket boundaries from timeline_buckets.bucket_edges() (n + 1 datetimes)
+        @param granularity: Granularity the edges were built with ('hour', 'day', 'week' or 'month')
+        @param staff_id: The ID of the staff member, or None to use departments
+        @param departments: List of department names, used if staff_id is None
+        @return: Tuple (created counts, closed counts), two lists of length n
+        """
+        params = {
+            'granularity': granularity, 'start': edges[0], 'end': edges[-1], 'staff_id': staff_id,
+            'departments': list(departments) if staff_id is None else None
+        }
+        if granularity == 'hour':
+            with db_connection() as conn:
+                rows = fetch_rows(conn, SQL_QUERIES['activity_histogram'], params)
+        else:
+            rows = self._query('activity_histogram', **params)
+        positions = {edge: i for i, edge in enumerate(edges[:-1])}
+        created = [0] * len(positions)
+        closed = [0] * len(positions)
+        for row in rows:
+            i = positions[row['bucket']]
+            created[i] = row['created']
+            closed[i] = row['closed']
+        return created, closed
+
+    def _fit_forecasts(self, first_day):
+        """
+        Fits the forecasts of all staff members and departments to the daily counts read from the database.
+        
+        @param first_day: date of the first day of history
+        @return: TicketForecasts instance
+        """
+        staff = self._query('staff_departments')
+        rows = {s['staff_id']: i for i, s in enumerate(staff)}
+        created = np.zeros((len(staff), FORECAST_HISTORY_DAYS), dtype=np.int64)
+        closed = np.zeros((len(staff), FORECAST_HISTORY_DAYS), dtype=np.int64)
+        for row in self._query('daily_activity', start=first_day, end=first_day + timedelta(days=FORECAST_HISTORY_DAYS)):
+            i = rows.get(row['staff_id'])
+            if i is not None:
+                day = (row['day'] - first_day).days
+                created[i, day] = row['created']
+                closed[i, day] = row['closed']
+        return TicketForecasts(first_day, list(rows), [s['department'] for s in staff], created, closed)
+
+    def forecast(self, staff_id=None, departments=None):
+        """
+        Returns the ticket forecast for the coming days of one staff member or of the given departments.
+        The models of all staff members and departments are fitted together after every refresh of the
+        materialized views, or every FORECAST_SQL_CACHE_SECONDS while the views are not in use.
+        
+        @param staff_id: The ID of the staff member, or None to use departments
+        @param departments: List of department names, used if staff_id is None
+        @return: Dictionary from TicketForecasts.summary()
+        """
+        if self.views is not None and self.views.is_fresh():
+            version = ('views', self.views.refreshed_at())
+        else:
+            version = ('tables', int(time.time() // FORECAST_SQL_CACHE_SECONDS))
+        first_day = date.today() - timedelta(days=FORECAST_HISTORY_DAYS)
+        forecasts = self.forecasts.get((version, first_day), lambda: self._fit_forecasts(first_day))
+        return forecasts.summary(staff_id, departments)
+
+    def counts(self):
+        """
+        Returns the number of rows in each table.
+        
+        @return: Dictionary with users, staff, tickets, comments and logs counts
+        """
+        return self._query('counts')[0]
+
+    def stats(self):
+        """
+        Returns backend details for the health endpoint.
+        
+        @return: Dictionary with the backend mode and whether statistics come from the materialized views
+        """
+        return {'mode': self.name, 'views_in_use': self.views is not None and self.views.is_fresh()}
+
+    def data_version(self):
+        """
+        Returns a value that changes whenever the data changes. Every query reads
+        the live tables, so no such value is tracked for this backend.
+        
+        @return: None (no ETags are issued and cached responses expire by TTL only)
+        """
+        return None
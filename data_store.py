@@ -0,0 +1,431 @@
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Primary-key column of every table held by the store
+PRIMARY_KEYS = {
+    'users': 'user_id',
+    'staff': 'staff_id',
+    'ticket_statuses': 'status_id',
+    'problem_categories': 'category_id',
+    'tickets': 'ticket_id',
+    'comments': 'comment_id',
+    'logs': 'log_id'
+}
+
+# Secondary group-by indexes: index name -> (table, grouping column)
+GROUP_INDEXES = {
+    'tickets_by_staff': ('tickets', 'assigned_staff_id'),
+    'tickets_by_status': ('tickets', 'status_id'),
+    'tickets_by_category': ('tickets', 'category_id'),
+    'comments_by_ticket': ('comments', 'ticket_id'),
+    'logs_by_ticket': ('logs', 'ticket_id')
+}
+
+# Table name passed to listeners after the whole store was reloaded
+RELOADED = '*'
+
+def _index_by(rows, key):
+    """
+    Builds a primary-key hash map over a list of rows.
+    
+    @param rows: List of row dictionaries
+    @param key: Name of the primary-key column
+    @return: Dictionary mapping key value to row
+    """
+    return {row[key]: row for row in rows}
+
+def _group_by(rows, key, pk):
+    """
+    Builds a secondary index grouping rows by a column value.
+    Each group maps primary key to row, so single rows can be replaced or moved
+    in O(1); rows keep their original relative order inside each group.
+    
+    @param rows: Iterable of row dictionaries
+    @param key: Name of the column to group by
+    @param pk: Name of the primary-key column
+    @return: Dictionary mapping column value to a {primary key: row} dictionary
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.get(key), {})[row[pk]] = row
+    return groups
+
+class DataStore:
+    """
+    In-memory copy of the support database with hash indexes for lookups.
+    
+    Holds the seven tables loaded at startup together with primary-key maps and
+    group-by indexes (tickets by staff, status and category; comments and logs by
+    ticket), so endpoint lookups are O(1) or O(result) instead of full list scans.
+    Indexes are rebuilt whenever load() is called and kept up to date by upsert().
+    """
+
+    def __init__(self, users=None, staff=None, ticket_statuses=None, problem_categories=None,
+                 tickets=None, comments=None, logs=None):
+        """
+        @param users: List of user dictionaries
+        @param staff: List of staff dictionaries
+        @param ticket_statuses: List of ticket status dictionaries
+        @param problem_categories: List of problem category dictionaries
+        @param tickets: List of ticket dictionaries
+        @param comments: List of comment dictionaries
+        @param logs: List of log dictionaries
+        """
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._version = 0
+        self.load(users, staff, ticket_statuses, problem_categories, tickets, comments, logs)
+
+    @classmethod
+    def from_tables(cls, data):
+        """
+        Creates a store from the dictionary returned by db_utils.load_all_tables().
+        
+        @param data: Dictionary mapping table name to a list of row dictionaries
+        @return: DataStore instance
+        """
+        return cls(
+            users=data.get('users'),
+            staff=data.get('staff'),
+            ticket_statuses=data.get('ticket_statuses'),
+            problem_categories=data.get('problem_categories'),
+            tickets=data.get('tickets'),
+            comments=data.get('comments'),
+            logs=data.get('logs')
+        )
+
+    def load(self, users, staff, ticket_statuses, problem_categories, tickets, comments, logs):
+        """
+        Replaces the stored tables and rebuilds every index.
+        Indexes are built off to the side and swapped in together, so concurrent
+        readers never observe a half-built store.
+        
+        @return: None
+        """
+        source = {
+            'users': users,
+            'staff': staff,
+            'ticket_statuses': ticket_statuses,
+            'problem_categories': problem_categories,
+            'tickets': tickets,
+            'comments': comments,
+            'logs': logs
+        }
+        tables = {name: _index_by(source[name] or [], pk) for name, pk in PRIMARY_KEYS.items()}
+        groups = {
+            index: _group_by(tables[table].values(), column, PRIMARY_KEYS[table])
+            for index, (table, column) in GROUP_INDEXES.items()
+        }
+        with self._lock:
+            self._tables = tables
+            self._groups = groups
+            self._notify(RELOADED, None)
+        logger.debug(f"Data store indexes rebuilt for {len(tables['tickets'])} tickets")
+
+    def upsert(self, table, rows):
+        """
+        Inserts new rows into a table and replaces changed ones, keeping the
+        secondary indexes in step. Rows identical to the stored ones are ignored.
+        
+        @param table: Name of the table (a key of PRIMARY_KEYS)
+        @param rows: Iterable of row dictionaries with every column of the table
+        @return: List of (old_row, new_row) tuples for the rows that changed; old_row is None for inserts
+        """
+        pk = PRIMARY_KEYS[table]
+        indexes = [(index, column) for index, (indexed_table, column) in GROUP_INDEXES.items() if indexed_table == table]
+        changes = []
+        with self._lock:
+            rows_by_id = self._tables[table]
+            for row in rows:
+                key = row[pk]
+                old = rows_by_id.get(key)
+                if old == row:
+                    continue
+                new = dict(row)
+                rows_by_id[key] = new
+                for index, column in indexes:
+                    groups = self._groups[index]
+                    if old is not None and old.get(column) != new.get(column):
+                        old_group = groups.get(old.get(column))
+                        if old_group is not None:
+                            old_group.pop(key, None)
+                            if not old_group:
+                                del groups[old.get(column)]
+                    groups.setdefault(new.get(column), {})[key] = new
+                changes.append((old, new))
+            if changes:
+                self._notify(table, changes)
+        return changes
+
+    def remove(self, table, keys):
+        """
+        Removes rows from a table and its secondary indexes.
+        
+        @param table: Name of the table (a key of PRIMARY_KEYS)
+        @param keys: Iterable of primary-key values to remove; unknown keys are ignored
+        @return: List of the removed row dictionaries
+        """
+        indexes = [(index, column) for index, (indexed_table, column) in GROUP_INDEXES.items() if indexed_table == table]
+        removed = []
+        with self._lock:
+            rows_by_id = self._tables[table]
+            for key in keys:
+                old = rows_by_id.pop(key, None)
+                if old is None:
+                    continue
+                for index, column in indexes:
+                    groups = self._groups[index]
+                    group = groups.get(old.get(column))
+                    if group is not None:
+                        group.pop(key, None)
+                        if not group:
+                            del groups[old.get(column)]
+                removed.append(old)
+            if removed:
+                self._notify(table, [(old, None) for old in removed])
+        return removed
+
+    def add_listener(self, callback):
+        """
+        Registers a callback that keeps derived structures in step with the store.
+        
+        The callback is invoked under the store lock as callback(table, changes), where
+        changes is a list of (old_row, new_row) tuples (old_row is None for inserts and
+        new_row is None for removals). After load() it is invoked as
+        callback(RELOADED, None) and should rebuild from scratch.
+        
+        @param callback: Callable taking (table, changes)
+        @return: None
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def _notify(self, table, changes):
+        """
+        Invokes the registered listeners. Must be called with the store lock held.
+        
+        @param table: Name of the changed table, or RELOADED after a full load
+        @param changes: List of (old_row, new_row) tuples, or None after a full load
+        @return: None
+        """
+        self._version += 1
+        for callback in self._listeners:
+            try:
+                callback(table, changes)
+            except Exception as e:
+                logger.exception(f"Data store listener failed for {table}: {e}")
+
+    @property
+    def version(self):
+        """
+        Data version: a counter increased by every load() and by every upsert() or
+        remove() that changed at least one row.
+        
+        @return: Integer version
+        """
+        return self._version
+
+    def _rows(self, table):
+        """
+        Returns a snapshot list of every row in a table.
+        
+        @param table: Name of the table
+        @return: List of row dictionaries
+        """
+        with self._lock:
+            return list(self._tables[table].values())
+
+    def _group(self, index, value):
+        """
+        Returns a snapshot list of the rows in one group of a secondary index.
+        
+        @param index: Name of the index in GROUP_INDEXES
+        @param value: Value of the grouping column
+        @return: List of row dictionaries (empty if the group does not exist)
+        """
+        with self._lock:
+            group = self._groups[index].get(value)
+            return list(group.values()) if group else []
+
+    # --- Full tables ---
+    @property
+    def users(self):
+        """
+        Snapshot of the users table.
+        
+        @return: List of user dictionaries
+        """
+        return self._rows('users')
+
+    @property
+    def staff(self):
+        """
+        Snapshot of the staff table.
+        
+        @return: List of staff dictionaries
+        """
+        return self._rows('staff')
+
+    @property
+    def ticket_statuses(self):
+        """
+        Snapshot of the ticket statuses table.
+        
+        @return: List of ticket status dictionaries
+        """
+        return self._rows('ticket_statuses')
+
+    @property
+    def problem_categories(self):
+        """
+        Snapshot of the problem categories table.
+        
+        @return: List of problem category dictionaries
+        """
+        return self._rows('problem_categories')
+
+    @property
+    def tickets(self):
+        """
+        Snapshot of the tickets table.
+        
+        @return: List of ticket dictionaries
+        """
+        return self._rows('tickets')
+
+    @property
+    def comments(self):
+        """
+        Snapshot of the comments table.
+        
+        @return: List of comment dictionaries
+        """
+        return self._rows('comments')
+
+    @property
+    def logs(self):
+        """
+        Snapshot of the logs table.
+        
+        @return: List of log dictionaries
+        """
+        return self._rows('logs')
+
+    # --- Primary-key lookups ---
+    def get_user(self, user_id):
+        """
+        Finds a user by ID.
+        
+        @param user_id: The ID of the user to find
+        @return: User dictionary or None if not found
+        """
+        return self._tables['users'].get(user_id)
+
+    def get_staff(self, staff_id):
+        """
+        Finds a staff member by ID.
+        
+        @param staff_id: The ID of the staff member to find
+        @return: Staff dictionary or None if not found
+        """
+        return self._tables['staff'].get(staff_id)
+
+    def get_status(self, status_id):
+        """
+        Finds a ticket status by ID.
+        
+        @param status_id: The ID of the status to find
+        @return: Status dictionary or None if not found
+        """
+        return self._tables['ticket_statuses'].get(status_id)
+
+    def get_category(self, category_id):
+        """
+        Finds a problem category by ID.
+        
+        @param category_id: The ID of the category to find
+        @return: Category dictionary or None if not found
+        """
+        return self._tables['problem_categories'].get(category_id)
+
+    def get_ticket(self, ticket_id):
+        """
+        Finds a ticket by ID.
+        
+        @param ticket_id: The ID of the ticket to find
+        @return: Ticket dictionary or None if not found
+        """
+        return self._tables['tickets'].get(ticket_id)
+
+    # --- Secondary indexes ---
+    def tickets_by_staff(self, staff_id):
+        """
+        Returns tickets assigned to a staff member.
+        
+        @param staff_id: The ID of the staff member
+        @return: List of ticket dictionaries
+        """
+        return self._group('tickets_by_staff', staff_id)
+
+    def tickets_by_status(self, status_id):
+        """
+        Returns tickets in a given status.
+        
+        @param status_id: The ID of the status
+        @return: List of ticket dictionaries
+        """
+        return self._group('tickets_by_status', status_id)
+
+    def tickets_by_category(self, category_id):
+        """
+        Returns tickets in a given problem category.
+        
+        @param category_id: The ID of the category
+        @return: List of ticket dictionaries
+        """
+        return self._group('tickets_by_category', category_id)
+
+    def comments_by_ticket(self, ticket_id):
+        """
+        Returns comments associated with a ticket.
+        
+        @param ticket_id: The ID of the ticket
+        @return: List of comment dictionaries
+        """
+        return self._group('comments_by_ticket', ticket_id)
+
+    def logs_by_ticket(self, ticket_id):
+        """
+        Returns logs associated with a ticket.
+        
+        @param ticket_id: The ID of the ticket
+        @return: List of log dictionaries
+        """
+        return self._group('logs_by_ticket', ticket_id)
+
+    def count_comments(self, ticket_id):
+        """
+        Returns the number of comments on a ticket without copying them.
+        
+        @param ticket_id: The ID of the ticket
+        @return: Number of comments
+        """
+        return len(self._groups['comments_by_ticket'].get(ticket_id) or ())
+
+    def counts(self):
+        """
+        Returns the number of rows held for each table.
+        
+        @return: Dictionary with users, staff, tickets, comments and logs counts
+        """
+        return {name: len(self._tables[name]) for name in ('users', 'staff', 'tickets', 'comments', 'logs')}
+
+    def is_complete(self):
+        """
+        Checks that every table was loaded with at least one row.
+        
+        @return: True if no table is empty
+        """
+        return all(self._tables[name] for name in PRIMARY_KEYS)
@@ -0,0 +1,185 @@
+import threading
+import logging
+import time
+from datetime import datetime, timedelta
+import psycopg2
+from constants import DATA_SYNC_INTERVAL, DATA_SYNC_OVERLAP_SECONDS
+from db_utils import fetch_changes
+
+logger = logging.getLogger(__name__)
+
+# Tables pulled by the delta sync, in the order they are merged (parents before children)
+SYNCED_TABLES = ('users', 'tickets', 'comments', 'logs')
+
+def _changed_at(ticket):
+    """
+    Returns the timestamp the delta sync uses to detect ticket changes.
+    
+    @param ticket: Ticket dictionary
+    @return: updated_at if set, otherwise created_at
+    """
+    return ticket.get('updated_at') or ticket.get('created_at')
+
+# Table -> (primary key, function returning the timestamp the look-back window of the table is applied to)
+_SYNC_KEYS = {
+    'users': ('user_id', lambda row: row.get('registration_date')),
+    'tickets': ('ticket_id', _changed_at),
+    'comments': ('comment_id', lambda row: row.get('created_at')),
+    'logs': ('log_id', lambda row: row.get('performed_at'))
+}
+
+class DeltaSyncer:
+    """
+    Background refresher that keeps a DataStore in step with PostgreSQL.
+    
+    Instead of reloading whole tables, every run pulls only the rows past the
+    current watermarks and upserts them into the store. Each table has two:
+    the highest ID seen and its newest timestamp (ticket updated_at/created_at,
+    user registration_date, comment created_at, log performed_at). IDs are
+    handed out at insert, not at commit, so a row can become visible after a
+    higher ID was already synced; every run therefore also re-reads the rows
+    whose timestamp lies within overlap_seconds before the newest one seen.
+    Rows that did not actually change are ignored by the store.
+    
+    Guarantee: a row is synced if it is committed in ID order, or if its
+    timestamp is at most overlap_seconds older than the newest timestamp of
+    its table at the time it becomes visible. A row committed later than that
+    (e.g. by a transaction running longer than the overlap, since timestamps
+    default to the transaction start) is only picked up by a full reload.
+    Deleted rows are not detected.
+    """
+
+    def __init__(self, store, interval=DATA_SYNC_INTERVAL, overlap_seconds=DATA_SYNC_OVERLAP_SECONDS):
+        """
+        @param store: DataStore to keep up to date
+        @param interval: Seconds between sync runs
+        @param overlap_seconds: Look-back window applied to the timestamp watermarks
+        """
+        self.store = store
+        self.interval = interval
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.watermarks = self._initial_watermarks()
+        self._sync_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {
+            'syncs': 0,
+            'failures': 0,
+            'rows_applied_total': 0,
+            'last_rows_applied': {},
+            'last_sync_at': None,
+            'last_sync_duration': None,
+            'last_error': None
+        }
+        self._last_success = time.monotonic()
+
+    def _initial_watermarks(self):
+        """
+        Derives the starting watermarks from the data already held in the store.
+        
+        @return: Dictionary of watermarks accepted by db_utils.fetch_changes()
+        """
+        watermarks = {}
+        for table, (pk, changed_at) in _SYNC_KEYS.items():
+            rows = getattr(self.store, table)
+            watermarks[table] = max((row[pk] for row in rows), default=0)
+            watermarks[f"{table}_changed_at"] = max(filter(None, map(changed_at, rows)), default=datetime.min)
+        return watermarks
+
+    def _advance_watermarks(self, changes):
+        """
+        Moves the watermarks past the rows returned by a sync run.
+        
+        @param changes: Dictionary mapping table name to fetched rows
+        @return: None
+        """
+        for table, (pk, changed_at) in _SYNC_KEYS.items():
+            rows = changes.get(table, [])
+            self.watermarks[table] = max([self.watermarks[table]] + [row[pk] for row in rows])
+            key = f"{table}_changed_at"
+            self.watermarks[key] = max([self.watermarks[key]] + list(filter(None, map(changed_at, rows))))
+
+    def sync_once(self):
+        """
+        Pulls rows changed since the last run and merges them into the store.
+        
+        @return: Dictionary mapping table name to the number of rows inserted or updated
+        @raise psycopg2.Error: If the changes cannot be fetched
+        """
+        with self._sync_lock:
+            started = time.perf_counter()
+            params = dict(self.watermarks)
+            for table in _SYNC_KEYS:
+                key = f"{table}_changed_at"
+                if params[key] > datetime.min + self.overlap:
+                    params[key] -= self.overlap
+            changes, db_time = fetch_changes(params)
+            applied = {}
+            for table in SYNCED_TABLES:
+                applied[table] = len(self.store.upsert(table, changes.get(table, [])))
+            self._advance_watermarks(changes)
+            duration = time.perf_counter() - started
+            self._last_success = time.monotonic()
+            self._stats['syncs'] += 1
+            self._stats['rows_applied_total'] += sum(applied.values())
+            self._stats['last_rows_applied'] = applied
+            self._stats['last_sync_at'] = db_time.isoformat()
+            self._stats['last_sync_duration'] = round(duration, 4)
+            self._stats['last_error'] = None
+        if any(applied.values()):
+            logger.info(f"Delta sync applied {sum(applied.values())} rows in {duration:.3f}s: {applied}")
+        else:
+            logger.debug(f"Delta sync found no changes ({duration:.3f}s)")
+        return applied
+
+    def _run(self):
+        """
+        Thread body: runs sync_once() every interval until stop() is called.
+        
+        @return: None
+        """
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sync_once()
+            except psycopg2.Error as e:
+                self._stats['failures'] += 1
+                self._stats['last_error'] = str(e)
+                logger.error(f"Delta sync failed: {e}")
+            except Exception as e:
+                self._stats['failures'] += 1
+                self._stats['last_error'] = str(e)
+                logger.exception(f"Unexpected error during delta sync: {e}")
+
+    def start(self):
+        """
+        Starts the background refresher thread. Does nothing if the interval is 0.
+        
+        @return: None
+        """
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='delta-sync', daemon=True)
+        self._thread.start()
+        logger.info(f"Delta sync started with a {self.interval}s interval")
+
+    def stop(self):
+        """
+        Stops the background refresher thread.
+        
+        @return: None
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+
+    def stats(self):
+        """
+        Returns refresh statistics for monitoring.
+        
+        @return: Dictionary with sync counters, rows applied and refresh lag in seconds
+        """
+        snapshot = dict(self._stats)
+        snapshot['interval'] = self.interval
+        snapshot['lag_seconds'] = round(time.monotonic() - self._last_success, 1)
+        return snapshot
@@ -73,11 +73,15 @@ CREATE INDEX IF NOT EXISTS idx_tickets_status_id ON Tickets(status_id);
 CREATE INDEX IF NOT EXISTS idx_tickets_category_id ON Tickets(category_id);
 CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON Tickets(created_at);
 CREATE INDEX IF NOT EXISTS idx_tickets_closed_at ON Tickets(closed_at);
+CREATE INDEX IF NOT EXISTS idx_tickets_staff_created ON Tickets(assigned_staff_id, created_at, ticket_id); -- Для постраничной выдачи тикетов (keyset)
+CREATE INDEX IF NOT EXISTS idx_tickets_changed_at ON Tickets((COALESCE(updated_at, created_at))); -- Для инкрементальной синхронизации
 CREATE INDEX IF NOT EXISTS idx_ticket_comments_ticket_id ON TicketComments(ticket_id);
 CREATE INDEX IF NOT EXISTS idx_ticket_comments_author_type ON TicketComments(author_type);
 CREATE INDEX IF NOT EXISTS idx_ticket_comments_created_at ON TicketComments(created_at);
+CREATE INDEX IF NOT EXISTS idx_ticket_comments_staff_reply ON TicketComments(ticket_id, created_at) WHERE author_type = 'staff'; -- Для времени первого ответа сотрудника
 CREATE INDEX IF NOT EXISTS idx_ticket_logs_ticket_id ON TicketLogs(ticket_id);
 CREATE INDEX IF NOT EXISTS idx_ticket_logs_performed_at ON TicketLogs(performed_at);
+CREATE INDEX IF NOT EXISTS idx_users_registration_date ON Users(registration_date); -- Для инкрементальной синхронизации
 CREATE INDEX IF NOT EXISTS idx_users_email ON Users(email);
 CREATE INDEX IF NOT EXISTS idx_staff_username ON Staff(username);
 CREATE INDEX IF NOT EXISTS idx_staff_department ON Staff(department);
@@ -286,3 +290,209 @@ SELECT
     created_at + (random() * 25)::INTEGER * INTERVAL '1 day'
 FROM Tickets
 WHERE random() > 0.5;
+
+-- 5. Уведомления об изменениях (LISTEN/NOTIFY)
+-- Триггеры отправляют в канал support_changes первичный ключ изменённой строки,
+-- приложение применяет к данным в памяти только эти строки.
+-- Формат сообщения: {"table": "tickets", "op": "UPDATE", "id": 42}
+CREATE OR REPLACE FUNCTION notify_row_change() RETURNS TRIGGER AS $$
+DECLARE
+    row_data JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+    PERFORM pg_notify(
+        'support_changes',
+        json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'id', (row_data ->> TG_ARGV[0])::INTEGER
+        )::TEXT
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_notify ON Users;
+CREATE TRIGGER trg_users_notify
+    AFTER INSERT OR UPDATE OR DELETE ON Users
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('user_id');
+
+DROP TRIGGER IF EXISTS trg_tickets_notify ON Tickets;
+CREATE TRIGGER trg_tickets_notify
+    AFTER INSERT OR UPDATE OR DELETE ON Tickets
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('ticket_id');
+
+DROP TRIGGER IF EXISTS trg_ticket_comments_notify ON TicketComments;
+CREATE TRIGGER trg_ticket_comments_notify
+    AFTER INSERT OR UPDATE OR DELETE ON TicketComments
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('comment_id');
+
+DROP TRIGGER IF EXISTS trg_ticket_logs_notify ON TicketLogs;
+CREATE TRIGGER trg_ticket_logs_notify
+    AFTER INSERT OR UPDATE OR DELETE ON TicketLogs
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('log_id');
+
+-- updated_at тикета выставляется при каждом изменении строки:
+-- по нему инкрементальная синхронизация (DATA_SYNC_MODE=poll) находит изменённые тикеты
+CREATE OR REPLACE FUNCTION touch_ticket_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tickets_updated_at ON Tickets;
+CREATE TRIGGER trg_tickets_updated_at
+    BEFORE UPDATE ON Tickets
+    FOR EACH ROW EXECUTE FUNCTION touch_ticket_updated_at();
+
+-- 6. Материализованные представления для отчётов
+-- Обновляются приложением (REFRESH MATERIALIZED VIEW CONCURRENTLY, см. REPORT_VIEW_REFRESH_INTERVAL);
+-- эндпоинты читают из них, пока данные достаточно свежие (REPORT_VIEW_MAX_AGE).
+-- Ежедневная статистика тикетов по сотруднику, отделу, категории и статусу:
+-- created_count — тикеты, созданные в этот день, closed_count — закрытые в этот день
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_ticket_daily_stats AS
+SELECT
+    day,
+    staff_id,
+    department,
+    category_id,
+    status_id,
+    SUM(created)::BIGINT AS created_count,
+    SUM(closed)::BIGINT AS closed_count
+FROM (
+    SELECT t.created_at::DATE AS day, t.assigned_staff_id AS staff_id, s.department,
+           t.category_id, t.status_id, 1 AS created, 0 AS closed
+    FROM Tickets t
+    JOIN Staff s ON s.staff_id = t.assigned_staff_id
+    UNION ALL
+    SELECT t.closed_at::DATE AS day, t.assigned_staff_id AS staff_id, s.department,
+           t.category_id, t.status_id, 0 AS created, 1 AS closed
+    FROM Tickets t
+    JOIN Staff s ON s.staff_id = t.assigned_staff_id
+    WHERE t.closed_at IS NOT NULL
+) activity
+GROUP BY day, staff_id, department, category_id, status_id;
+
+-- Уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_ticket_daily_stats_key
+    ON mv_ticket_daily_stats(day, staff_id, department, category_id, status_id);
+CREATE INDEX IF NOT EXISTS idx_mv_ticket_daily_stats_staff ON mv_ticket_daily_stats(staff_id, day);
+CREATE INDEX IF NOT EXISTS idx_mv_ticket_daily_stats_department ON mv_ticket_daily_stats(department);
+
+-- Длительность решения закрытых тикетов (в часах) по сотруднику, отделу и категории
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_ticket_resolution_stats AS
+SELECT
+    t.assigned_staff_id AS staff_id,
+    s.department,
+    t.category_id,
+    COUNT(*) AS resolved_count,
+    SUM(EXTRACT(EPOCH FROM t.closed_at - t.created_at) / 3600.0)::FLOAT8 AS resolution_hours_sum
+FROM Tickets t
+JOIN Staff s ON s.staff_id = t.assigned_staff_id
+WHERE t.closed_at IS NOT NULL
+GROUP BY t.assigned_staff_id, s.department, t.category_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_ticket_resolution_stats_key
+    ON mv_ticket_resolution_stats(staff_id, department, category_id);
+
+-- 7. Учётные данные сотрудников
+-- Логины, хеши кодов доступа (PBKDF2-HMAC-SHA256, см. auth.hash_code) и роли, привязанные к Staff.
+-- Доступ к отделам выдаётся отдельными строками StaffDepartmentGrants.
+-- Приложение кэширует учётные данные; триггеры ниже сбрасывают кэш при изменениях.
+CREATE TABLE IF NOT EXISTS StaffCredentials (
+    staff_id INTEGER PRIMARY KEY REFERENCES Staff(staff_id) ON DELETE CASCADE,
+    login VARCHAR(50) UNIQUE NOT NULL,
+    code_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL CHECK (role IN ('admin', 'manager', 'analyst')),
+    display_name VARCHAR(100), -- Если NULL, используется Staff.full_name
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS StaffDepartmentGrants (
+    staff_id INTEGER NOT NULL REFERENCES StaffCredentials(staff_id) ON DELETE CASCADE,
+    department VARCHAR(100) NOT NULL,
+    PRIMARY KEY (staff_id, department)
+);
+
+-- Начальные учётные записи (коды доступа — в constants.DEFAULT_USERS).
+-- Записи для сотрудников, отсутствующих в Staff, пропускаются.
+INSERT INTO StaffCredentials (staff_id, login, code_hash, role, display_name)
+SELECT v.staff_id, v.login, v.code_hash, v.role, v.display_name
+FROM (VALUES
+    (1, 'admin', 'pbkdf2_sha256$260000$11191d2e41df82575664f6bbde4d25e9$01d81387edd88bd6decbaf4e68dfd542341c15cef705e2f20f5254b8ea55abc2', 'admin', 'System Administrator'),
+    (2, 'manager_ts', 'pbkdf2_sha256$260000$921af97a31f6c6d94afe46727c99f018$b0966a68b3ee1d99eccf6918f378618bdb9fcfc2e21687dacc254de0acdab8a0', 'manager', 'Alexey Smirnov'),
+    (3, 'manager_sa', 'pbkdf2_sha256$260000$174d320c3242a5b047a59ac607aa51a5$b5d1fa6f1542b53fc00da0bdba5d2a819027388260d275eced1b0464e6ea8380', 'manager', 'Irina Kozlova'),
+    (4, 'manager_ni', 'pbkdf2_sha256$260000$c6777bd6ab5c7a6682efe596241adb3f$d262b796b6e9ae13971a3e69dfbc14aabc079c2999a6dcb3ee10bf8de2ab2d2a', 'manager', 'Denis Novikov'),
+    (5, 'manager_is', 'pbkdf2_sha256$260000$45cbaddf3182a7bdda2a18be744f8a63$d181f6ebc53ae5c772f1a38787fc9969b99c3f9139eae149bbe9987fcee175be', 'manager', 'Olga Makarova'),
+    (6, 'manager_di', 'pbkdf2_sha256$260000$8021a6cc62c44926f18307f71259353d$d4cae788ce877a5a9863e835bb2001a072305fe486832ddd663b60e3f3d3f735', 'manager', 'Artem Zaitsev'),
+    (7, 'manager_db', 'pbkdf2_sha256$260000$af136e7c187b0b6d6ba9c8bb3ff06dc2$54085e2119bc8f3d5489fbf7e30aa8cc1a0899145ff6a4529a387904bc80ec2d', 'manager', 'Natalia Popova'),
+    (8, 'manager_ct', 'pbkdf2_sha256$260000$f3591b28e02861827ad23246841096c2$7edb3fc8aeb2105b509b6ea09e4e716667c6b658486fcceccac8cb25d348ead4', 'manager', 'Maksim Solovev'),
+    (9, 'manager_ma', 'pbkdf2_sha256$260000$bb2d69bc35d2c4b53f5ecb14f33eaf90$8552d28a27e4aa9c792a6f8638350a3b604de7cd00cf2e6a2f46eb5ab1d9c9ff', 'manager', 'Elena Vorobeva'),
+    (10, 'manager_l1', 'pbkdf2_sha256$260000$31340650e760cbc611918693d502508a$36eb98da3f2406e7c4890ab27285fc47c33eebf8978294e30ada41d1167fa225', 'manager', 'Ivan Frolov'),
+    (11, 'manager_l2', 'pbkdf2_sha256$260000$3bc0297c0d35c3b724e651bd2ef47566$213ca71eccb6a23b40bdead84eb54a376af465eda1a4a5ecf1737a4e3b81ad5c', 'manager', 'Svetlana Alekseeva'),
+    (12, 'analyst_ts', 'pbkdf2_sha256$260000$c268259439b3bf8e77df17e944b1a2a6$76c49be5196568f5bdef4f187ad7554e617ea564aef09750c1fe1f286c0d1539', 'analyst', 'Petr Sidrov'),
+    (13, 'analyst_sa', 'pbkdf2_sha256$260000$66074f31f8b97f14afdac633aa4e2b17$c8c1428aeabd9377fa6534424a0e7ca7f4e1cbade7cfb057361c97beb3282e92', 'analyst', 'Anna Orlova'),
+    (14, 'analyst_ni', 'pbkdf2_sha256$260000$45c20bb2752c51d01730797e3d085859$e50105dbee2ff5f371036918c56ae8ccb03077f70a1967d5eb16ebe464a4475f', 'analyst', 'Mikhail Lebedev'),
+    (15, 'analyst_is', 'pbkdf2_sha256$260000$67f8c6167454ffac17b30adeb299c52a$f3c4c594ff6405f49ec67fc9884b3ae0b3c52a248a8290239c431109157ed5dd', 'analyst', 'Irina Semenova'),
+    (16, 'analyst_di', 'pbkdf2_sha256$260000$16212572f30892ab774f0b3e7205e2a2$4eddf787ea1e351989783b3c3474d5807cc63041cc8299aa418ed72c64932222', 'analyst', 'Artem Fedorov'),
+    (17, 'analyst_db', 'pbkdf2_sha256$260000$fe8a556a4c91894a66ed0806993ec029$375d58461b00b1787f4369d712522212ee4ca2a4846c6071d5f57611589dd582', 'analyst', 'Tatyana Zhukova'),
+    (18, 'analyst_ct', 'pbkdf2_sha256$260000$86fef47f300ee36e0ca3a6c0f3a5c74f$6f7e9258c9fe49a03610f2d41fccc1b26450158428d1ff36b9ac00c58796da78', 'analyst', 'Sergey Gromov'),
+    (19, 'analyst_ma', 'pbkdf2_sha256$260000$bc90460c3383fd0aa4ac913a0436d297$a45a7e3b597eb45aff12b726d82ece043026a91dd60998c82e195471911c4546', 'analyst', 'Nadezhda Volkova'),
+    (20, 'analyst_l1', 'pbkdf2_sha256$260000$d5140d06770db9f7b2599904b3c6d7aa$85fa1576ef672e70ecc319074bab60a15b7b6a15f9b96eec88e76b1091c2c1c1', 'analyst', 'Alexei Tikhonov'),
+    (21, 'analyst_l2', 'pbkdf2_sha256$260000$08e834fe544b50e98364bd487cbc0b6b$973405f6f40930f500ba83da553e30d3f24c4fce2538b4dc6481830c8b033e39', 'analyst', 'Yulia Andreeva')
+) AS v(staff_id, login, code_hash, role, display_name)
+JOIN Staff s ON s.staff_id = v.staff_id
+ON CONFLICT (staff_id) DO NOTHING;
+
+INSERT INTO StaffDepartmentGrants (staff_id, department)
+SELECT v.staff_id, v.department
+FROM (VALUES
+    (1, 'Отдел технической поддержки'),
+    (1, 'Отдел системного администрирования'),
+    (1, 'Отдел сетевой инфраструктуры'),
+    (1, 'Отдел информационной безопасности'),
+    (1, 'Отдел разработки и внедрения'),
+    (1, 'Отдел баз данных'),
+    (1, 'Отдел облачных технологий'),
+    (1, 'Отдел мониторинга и аналитики'),
+    (1, 'Сервисный деск Level 1'),
+    (1, 'Сервисный деск Level 2'),
+    (2, 'Отдел технической поддержки'),
+    (3, 'Отдел системного администрирования'),
+    (4, 'Отдел сетевой инфраструктуры'),
+    (5, 'Отдел информационной безопасности'),
+    (6, 'Отдел разработки и внедрения'),
+    (7, 'Отдел баз данных'),
+    (8, 'Отдел облачных технологий'),
+    (9, 'Отдел мониторинга и аналитики'),
+    (10, 'Сервисный деск Level 1'),
+    (11, 'Сервисный деск Level 2'),
+    (12, 'Отдел технической поддержки'),
+    (13, 'Отдел системного администрирования'),
+    (14, 'Отдел сетевой инфраструктуры'),
+    (15, 'Отдел информационной безопасности'),
+    (16, 'Отдел разработки и внедрения'),
+    (17, 'Отдел баз данных'),
+    (18, 'Отдел облачных технологий'),
+    (19, 'Отдел мониторинга и аналитики'),
+    (20, 'Сервисный деск Level 1'),
+    (21, 'Сервисный деск Level 2')
+) AS v(staff_id, department)
+JOIN StaffCredentials c ON c.staff_id = v.staff_id
+ON CONFLICT DO NOTHING;
+
+DROP TRIGGER IF EXISTS trg_staff_credentials_notify ON StaffCredentials;
+CREATE TRIGGER trg_staff_credentials_notify
+    AFTER INSERT OR UPDATE OR DELETE ON StaffCredentials
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('staff_id');
+
+DROP TRIGGER IF EXISTS trg_staff_department_grants_notify ON StaffDepartmentGrants;
+CREATE TRIGGER trg_staff_department_grants_notify
+    AFTER INSERT OR UPDATE OR DELETE ON StaffDepartmentGrants
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('staff_id');
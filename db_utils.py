@@ -1,274 +1,646 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import STATUS_READY
+from psycopg2.pool import PoolError
 import logging
-from constants import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from constants import (
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT,
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_CHECKOUT_TIMEOUT,
+    DB_POOL_HEALTH_CHECK_INTERVAL, DB_STATEMENT_TIMEOUT_MS,
+    DB_LOAD_WORKERS, DB_LOAD_STATEMENT_TIMEOUT_MS, DB_STREAMING_LOAD, DB_FETCH_BATCH_SIZE
+)
 
 logger = logging.getLogger(__name__)
 
+class PoolTimeoutError(PoolError):
+    """
+    Raised when no pooled connection becomes available within the checkout timeout.
+    Subclasses psycopg2's PoolError, so callers catching psycopg2.Error handle it as well.
+    """
+
+def _connect():
+    """
+    Opens a new PostgreSQL connection with the configured statement timeout.
+    
+    @return: psycopg2 connection object
+    @raise psycopg2.Error: If the connection cannot be established
+    """
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        options=f"-c statement_timeout={int(DB_STATEMENT_TIMEOUT_MS)}"
+    )
+
 def get_db_connection():
     """
-    Establishes and returns a connection to the PostgreSQL database.
+    Establishes and returns a new, unpooled connection to the PostgreSQL database.
+    Request-time code should lease connections through db_connection() instead.
     
     @return: psycopg2 connection object or None if connection fails
     """
     try:
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
+        conn = _connect()
         logger.debug("Successfully connected to the database.")
         return conn
     except psycopg2.Error as e:
         logger.error(f"Database connection error: {e}")
         return None
 
-def get_users_from_db():
+class ConnectionPool:
     """
-    Fetches all users from the database.
+    Thread-safe pool of PostgreSQL connections.
     
-    @return: List of user dictionaries
+    Connections are opened lazily up to max_size, idle connections are checked
+    with a lightweight query before being handed out, and callers block for at most
+    checkout_timeout seconds when every connection is leased.
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT user_id, email, full_name, registration_date FROM Users;")
-        users = [dict(row) for row in cur.fetchall()]
-        cur.close()
-        return users
-    except psycopg2.Error as e:
-        logger.error(f"Error fetching users from DB: {e}")
-        return []
-    finally:
-        if conn:
+
+    def __init__(self, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT,
+                 health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL):
+        """
+        @param min_size: Number of connections opened up front and kept when idle
+        @param max_size: Upper bound on simultaneously open connections
+        @param checkout_timeout: Seconds to wait for a free connection before giving up
+        @param health_check_interval: Idle seconds after which a connection is pinged on checkout
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size bounds")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._cond = threading.Condition()
+        self._idle = []  # list of (connection, last_used_monotonic)
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'health_check_failures': 0
+        }
+        for _ in range(min_size):
+            self._size += 1
+            try:
+                conn = self._open()
+            except psycopg2.Error as e:
+                logger.error(f"Could not pre-open pooled connection: {e}")
+                break
+            self._idle.append((conn, time.monotonic()))
+
+    def _open(self):
+        """
+        Opens a connection for a pool slot that the caller has already reserved.
+        The slot is released again if the connection cannot be established.
+        
+        @return: psycopg2 connection object
+        """
+        try:
+            conn = _connect()
+        except psycopg2.Error:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['connections_created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        """
+        Closes a connection and frees its slot in the pool.
+        
+        @param conn: The connection to drop
+        @return: None
+        """
+        try:
             conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['connections_discarded'] += 1
+            self._cond.notify()
 
-def get_staff_from_db():
+    def _is_healthy(self, conn, idle_since):
+        """
+        Checks whether an idle connection can still be used.
+        
+        @param conn: The connection to check
+        @param idle_since: Monotonic time at which the connection was returned to the pool
+        @return: True if the connection is usable
+        """
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """
+        Leases a healthy connection from the pool, opening a new one if allowed.
+        
+        @return: psycopg2 connection object
+        @raise PoolTimeoutError: If no connection frees up within checkout_timeout
+        @raise psycopg2.Error: If a new connection cannot be established
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        wait_started = time.monotonic()
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available within {self.checkout_timeout}s"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    candidate = self._idle.pop()
+                else:
+                    candidate = None
+                    self._size += 1  # reserve a slot for the new connection
+            if candidate is None:
+                conn = self._open()
+                break
+            conn, idle_since = candidate
+            if self._is_healthy(conn, idle_since):
+                break
+            with self._cond:
+                self._stats['health_check_failures'] += 1
+            logger.warning("Discarding broken pooled database connection")
+            self._discard(conn)
+        with self._cond:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_time_total'] += time.monotonic() - wait_started
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """
+        Returns a leased connection to the pool, ending any open transaction.
+        
+        @param conn: The connection obtained from getconn()
+        @param discard: Close the connection instead of keeping it (e.g. after a fatal error)
+        @return: None
+        """
+        if not discard and not conn.closed:
+            try:
+                if conn.status != STATUS_READY:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        if discard or conn.closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            if self._closed or len(self._idle) >= self.max_size:
+                keep = False
+            else:
+                self._idle.append((conn, time.monotonic()))
+                keep = True
+            self._cond.notify()
+        if not keep:
+            self._discard(conn)
+
+    def closeall(self):
+        """
+        Closes every idle connection and rejects further checkouts.
+        Leased connections are closed when they are returned.
+        
+        @return: None
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """
+        Returns a snapshot of pool counters for monitoring.
+        
+        @return: Dictionary with size, idle and in-use counts and lifetime counters
+        """
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size
+            })
+        snapshot['wait_time_total'] = round(snapshot['wait_time_total'], 4)
+        return snapshot
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
     """
-    Fetches all staff members from the database.
+    Returns the process-wide connection pool, creating it on first use.
     
-    @return: List of staff dictionaries
+    @return: ConnectionPool instance
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+def close_pool():
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT staff_id, username, full_name, email, department, is_active FROM Staff;")
-        staff = [dict(row) for row in cur.fetchall()]
-        cur.close()
-        return staff
-    except psycopg2.Error as e:
-        logger.error(f"Error fetching staff from DB: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
+    Closes the process-wide connection pool, if it was created.
+    
+    @return: None
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
 
-def get_ticket_statuses_from_db():
+def get_pool_stats():
     """
-    Fetches all ticket statuses from the database.
+    Returns connection pool statistics for health and monitoring endpoints.
     
-    @return: List of status dictionaries
+    @return: Dictionary of pool counters, or None if the pool has not been created yet
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT status_id, status_name FROM TicketStatuses;")
-        statuses = [dict(row) for row in cur.fetchall()]
-        cur.close()
-        return statuses
-    except psycopg2.Error as e:
-        logger.error(f"Error fetching ticket statuses from DB: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
+    return _pool.stats() if _pool is not None else None
 
-def get_problem_categories_from_db():
+@contextmanager
+def db_connection(statement_timeout_ms=None):
     """
-    Fetches all problem categories from the database.
+    Context manager that leases a pooled connection for the duration of the block.
+    The connection is returned to the pool (with its transaction rolled back unless
+    committed) on exit, and dropped from the pool if it broke while in use.
     
-    @return: List of category dictionaries
+    @param statement_timeout_ms: Optional statement timeout for the lease's transaction, overriding DB_STATEMENT_TIMEOUT_MS
+    @return: psycopg2 connection object (yielded)
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT category_id, category_name FROM ProblemCategories;")
-        categories = [dict(row) for row in cur.fetchall()]
-        cur.close()
-        return categories
-    except psycopg2.Error as e:
-        logger.error(f"Error fetching problem categories from DB: {e}")
-        return []
+        if statement_timeout_ms is not None:
+            cur = conn.cursor()
+            cur.execute("SET LOCAL statement_timeout = %s;", (int(statement_timeout_ms),))
+            cur.close()
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
     finally:
-        if conn:
-            conn.close()
+        pool.putconn(conn, discard=broken or conn.closed)
 
-def get_tickets_from_db():
+# SQL used to load each table at startup, keyed by the name used in load results
+TABLE_QUERIES = {
+    'users': "SELECT user_id, email, full_name, registration_date FROM Users;",
+    'staff': "SELECT staff_id, username, full_name, email, department, is_active FROM Staff;",
+    'ticket_statuses': "SELECT status_id, status_name FROM TicketStatuses;",
+    'problem_categories': "SELECT category_id, category_name FROM ProblemCategories;",
+    'tickets': "SELECT ticket_id, subject, description, created_at, updated_at, closed_at, user_id, assigned_staff_id, status_id, category_id FROM Tickets;",
+    'comments': "SELECT comment_id, ticket_id, author_id, author_type, comment_text, created_at FROM TicketComments;",
+    'logs': "SELECT log_id, ticket_id, action, performed_by_staff_id, performed_at FROM TicketLogs;"
+}
+
+# Large tables that are read through server-side cursors instead of a single fetchall()
+STREAMED_TABLES = ('tickets', 'comments', 'logs')
+
+# Incremental queries used by the delta sync; parameters are the watermarks passed to fetch_changes()
+DELTA_QUERIES = {
+    'users': "SELECT user_id, email, full_name, registration_date FROM Users WHERE registration_date >= %(users_changed_at)s OR user_id > %(users)s;",
+    'tickets': "SELECT ticket_id, subject, description, created_at, updated_at, closed_at, user_id, assigned_staff_id, status_id, category_id FROM Tickets WHERE COALESCE(updated_at, created_at) >= %(tickets_changed_at)s OR ticket_id > %(tickets)s;",
+    'comments': "SELECT comment_id, ticket_id, author_id, author_type, comment_text, created_at FROM TicketComments WHERE created_at >= %(comments_changed_at)s OR comment_id > %(comments)s;",
+    'logs': "SELECT log_id, ticket_id, action, performed_by_staff_id, performed_at FROM TicketLogs WHERE performed_at >= %(logs_changed_at)s OR log_id > %(logs)s;"
+}
+
+def fetch_rows(conn, query, params=None):
     """
-    Fetches all tickets from the database.
+    Runs a query on the given connection and returns the rows as dictionaries.
     
-    @return: List of ticket dictionaries
+    @param conn: psycopg2 connection to run the query on
+    @param query: SQL query to execute
+    @param params: Optional query parameters
+    @return: List of row dictionaries
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
+    cur = conn.cursor(cursor_factory=RealDictCursor)
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT ticket_id, subject, description, created_at, updated_at, closed_at, user_id, assigned_staff_id, status_id, category_id FROM Tickets;")
-        tickets = [dict(row) for row in cur.fetchall()]
+        cur.execute(query, params)
+        return [dict(row) for row in cur.fetchall()]
+    finally:
         cur.close()
-        return tickets
-    except psycopg2.Error as e:
-        logger.error(f"Error fetching tickets from DB: {e}")
-        return []
+
+def iter_rows(conn, query, params=None, cursor_name='stream', batch_size=DB_FETCH_BATCH_SIZE):
+    """
+    Runs a query through a named server-side cursor and yields the rows as dictionaries.
+    
+    Rows are pulled from the server in batches of plain tuples and converted one batch
+    at a time, so only a single batch is held in memory. Must be consumed inside a
+    transaction (named cursors do not survive commit); closing the generator early
+    closes the cursor.
+    
+    @param conn: psycopg2 connection to run the query on
+    @param query: SQL query to execute
+    @param params: Optional query parameters
+    @param cursor_name: Name of the server-side cursor
+    @param batch_size: Number of rows fetched per round-trip
+    @return: Generator of row dictionaries
+    """
+    cur = conn.cursor(name=cursor_name)
+    cur.itersize = batch_size
+    try:
+        cur.execute(query, params)
+        columns = None
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            if columns is None:
+                columns = [col[0] for col in cur.description]
+            for row in batch:
+                yield dict(zip(columns, row))
     finally:
-        if conn:
-            conn.close()
+        cur.close()
 
-def get_comments_from_db():
+def _stream_rows(conn, query, cursor_name, batch_size=DB_FETCH_BATCH_SIZE):
     """
-    Fetches all comments from the database.
+    Runs a query through a named server-side cursor and returns the rows as dictionaries.
+    Besides the result list only a single batch is held in memory (see iter_rows()).
     
-    @return: List of comment dictionaries
+    @param conn: psycopg2 connection to run the query on
+    @param query: SQL query to execute
+    @param cursor_name: Name of the server-side cursor
+    @param batch_size: Number of rows fetched per round-trip
+    @return: List of row dictionaries
+    """
+    return list(iter_rows(conn, query, cursor_name=cursor_name, batch_size=batch_size))
+
+def _read_table(conn, name):
+    """
+    Reads one table from TABLE_QUERIES, streaming it when it is listed in STREAMED_TABLES.
+    
+    @param conn: psycopg2 connection with an open transaction
+    @param name: Key of the table in TABLE_QUERIES
+    @return: List of row dictionaries
+    """
+    if DB_STREAMING_LOAD and name in STREAMED_TABLES:
+        return _stream_rows(conn, TABLE_QUERIES[name], f"load_{name}")
+    return fetch_rows(conn, TABLE_QUERIES[name])
+
+def _fetch_all(query, what):
+    """
+    Runs a read-only query on a pooled connection and returns the rows as dictionaries.
+    
+    @param query: SQL query to execute
+    @param what: Human-readable name of the fetched data, used in error messages
+    @return: List of row dictionaries, or an empty list on database errors
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT comment_id, ticket_id, author_id, author_type, comment_text, created_at FROM TicketComments;")
-        comments = [dict(row) for row in cur.fetchall()]
-        cur.close()
-        return comments
+        with db_connection() as conn:
+            return fetch_rows(conn, query)
     except psycopg2.Error as e:
-        logger.error(f"Error fetching comments from DB: {e}")
+        logger.error(f"Error fetching {what} from DB: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
-def get_logs_from_db():
+def _load_streamed(name):
     """
-    Fetches all logs from the database.
+    Loads one of the STREAMED_TABLES on a pooled connection.
     
-    @return: List of log dictionaries
+    @param name: Key of the table in TABLE_QUERIES
+    @return: List of row dictionaries, or an empty list on database errors
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT log_id, ticket_id, action, performed_by_staff_id, performed_at FROM TicketLogs;")
-        logs = [dict(row) for row in cur.fetchall()]
-        cur.close()
-        return logs
+        with db_connection(statement_timeout_ms=DB_LOAD_STATEMENT_TIMEOUT_MS) as conn:
+            return _read_table(conn, name)
     except psycopg2.Error as e:
-        logger.error(f"Error fetching logs from DB: {e}")
+        logger.error(f"Error fetching {name} from DB: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
-# --- Functions to get data by ID ---
-# These now search within the lists loaded from the DB
-def get_user_by_id(user_id, users_list):
+def get_users_from_db():
     """
-    Finds a user by ID in the provided list.
+    Fetches all users from the database.
     
-    @param user_id: The ID of the user to find
-    @param users_list: The list of users to search in
-    @return: User dictionary or None if not found
+    @return: List of user dictionaries
     """
-    return next((u for u in users_list if u['user_id'] == user_id), None)
+    return _fetch_all(TABLE_QUERIES['users'], "users")
 
-def get_staff_by_id(staff_id, staff_list):
+def get_staff_from_db():
     """
-    Finds a staff member by ID in the provided list.
+    Fetches all staff members from the database.
     
-    @param staff_id: The ID of the staff member to find
-    @param staff_list: The list of staff to search in
-    @return: Staff dictionary or None if not found
+    @return: List of staff dictionaries
     """
-    return next((s for s in staff_list if s['staff_id'] == staff_id), None)
+    return _fetch_all(TABLE_QUERIES['staff'], "staff")
 
-def get_status_by_id(status_id, statuses_list):
+def get_ticket_statuses_from_db():
     """
-    Finds a status by ID in the provided list.
+    Fetches all ticket statuses from the database.
     
-    @param status_id: The ID of the status to find
-    @param statuses_list: The list of statuses to search in
-    @return: Status dictionary or None if not found
+    @return: List of status dictionaries
     """
-    return next((s for s in statuses_list if s['status_id'] == status_id), None)
+    return _fetch_all(TABLE_QUERIES['ticket_statuses'], "ticket statuses")
 
-def get_category_by_id(category_id, categories_list):
+def get_problem_categories_from_db():
     """
-    Finds a category by ID in the provided list.
+    Fetches all problem categories from the database.
     
-    @param category_id: The ID of the category to find
-    @param categories_list: The list of categories to search in
-    @return: Category dictionary or None if not found
+    @return: List of category dictionaries
     """
-    return next((c for c in categories_list if c['category_id'] == category_id), None)
+    return _fetch_all(TABLE_QUERIES['problem_categories'], "problem categories")
 
-def get_tickets_by_staff(staff_id, tickets_list):
+def get_tickets_from_db():
     """
-    Filters tickets assigned to a specific staff member.
+    Fetches all tickets from the database.
     
-    @param staff_id: The ID of the staff member
-    @param tickets_list: The list of tickets to filter
-    @return: List of ticket dictionaries assigned to the staff member
+    @return: List of ticket dictionaries
     """
-    return [t for t in tickets_list if t['assigned_staff_id'] == staff_id]
+    return _load_streamed('tickets')
 
-def get_comments_by_ticket(ticket_id, comments_list):
+def get_comments_from_db():
     """
-    Filters comments associated with a specific ticket.
+    Fetches all comments from the database.
     
-    @param ticket_id: The ID of the ticket
-    @param comments_list: The list of comments to filter
-    @return: List of comment dictionaries for the ticket
+    @return: List of comment dictionaries
     """
-    return [c for c in comments_list if c['ticket_id'] == ticket_id]
+    return _load_streamed('comments')
 
-def get_logs_by_ticket(ticket_id, logs_list):
+def get_logs_from_db():
     """
-    Filters logs associated with a specific ticket.
+    Fetches all logs from the database.
     
-    @param ticket_id: The ID of the ticket
-    @param logs_list: The list of logs to filter
-    @return: List of log dictionaries for the ticket
+    @return: List of log dictionaries
     """
-    return [l for l in logs_list if l['ticket_id'] == ticket_id]
+    return _load_streamed('logs')
 
-def get_departments_from_db():
+def _load_table(name, snapshot_id):
     """
-    Fetches distinct department names from the Staff table.
+    Loads one table on its own pooled connection, optionally inside an exported snapshot.
     
-    @return: List of department names
+    @param name: Key of the table in TABLE_QUERIES
+    @param snapshot_id: Snapshot identifier from pg_export_snapshot(), or None to read the latest data
+    @return: Tuple (rows, elapsed_seconds)
+    """
+    started = time.perf_counter()
+    with db_connection(statement_timeout_ms=DB_LOAD_STATEMENT_TIMEOUT_MS) as conn:
+        cur = conn.cursor()
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY;")
+        if snapshot_id is not None:
+            cur.execute("SET TRANSACTION SNAPSHOT %s;", (snapshot_id,))
+        cur.close()
+        rows = _read_table(conn, name)
+    return rows, time.perf_counter() - started
+
+def load_all_tables(max_workers=DB_LOAD_WORKERS):
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
+    Loads every table in TABLE_QUERIES concurrently from one consistent point in time.
+    
+    A coordinating connection opens a REPEATABLE READ transaction and exports its
+    snapshot; each worker imports that snapshot, so all tables reflect the same
+    committed state even though they are read over separate connections. If the
+    snapshot cannot be exported, the tables are still loaded concurrently but
+    without a shared snapshot.
+    
+    @param max_workers: Maximum number of tables loaded in parallel
+    @return: Tuple (data, timings) where data maps table name to a list of row
+             dictionaries (empty on error) and timings maps table name to seconds
+    """
+    # Keep one pool slot free for the coordinating connection
+    workers = max(1, min(max_workers, len(TABLE_QUERIES), get_pool().max_size - 1))
+    data = {name: [] for name in TABLE_QUERIES}
+    timings = {}
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT DISTINCT department FROM Staff ORDER BY department;")
-        all_departments = [row['department'] for row in cur.fetchall()]
-        cur.close()
-        return all_departments
+        with db_connection() as coordinator:
+            snapshot_id = None
+            try:
+                cur = coordinator.cursor()
+                cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY;")
+                cur.execute("SELECT pg_export_snapshot();")
+                snapshot_id = cur.fetchone()[0]
+                cur.close()
+            except psycopg2.Error as e:
+                logger.warning(f"Could not export snapshot, loading tables without a shared snapshot: {e}")
+                coordinator.rollback()
+            # The coordinator's transaction must stay open until every worker has imported the snapshot
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db-load') as executor:
+                futures = {executor.submit(_load_table, name, snapshot_id): name for name in TABLE_QUERIES}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        data[name], timings[name] = future.result()
+                    except psycopg2.Error as e:
+                        logger.error(f"Error loading {name} from DB: {e}")
     except psycopg2.Error as e:
-        logger.error(f"Error fetching departments from DB: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+        logger.error(f"Error starting snapshot load: {e}")
+    return data, timings
+
+def fetch_changes(watermarks):
+    """
+    Fetches rows added or changed since the given watermarks, all from one snapshot.
+    
+    @param watermarks: Dictionary with the last seen 'users', 'tickets', 'comments' and
+                       'logs' primary keys and the '<table>_changed_at' timestamps to re-read from
+    @return: Tuple (changes, db_time) where changes maps table name to a list of row
+             dictionaries and db_time is the database clock at the snapshot
+    @raise psycopg2.Error: On connection or query errors
+    """
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY;")
+        cur.execute("SELECT LOCALTIMESTAMP;")
+        db_time = cur.fetchone()[0]
+        cur.close()
+        changes = {name: fetch_rows(conn, query, watermarks) for name, query in DELTA_QUERIES.items()}
+    return changes, db_time
+
+# Queries fetching rows of a table by a list of primary keys, used to apply change notifications
+ROWS_BY_ID_QUERIES = {
+    'users': "SELECT user_id, email, full_name, registration_date FROM Users WHERE user_id = ANY(%s);",
+    'tickets': "SELECT ticket_id, subject, description, created_at, updated_at, closed_at, user_id, assigned_staff_id, status_id, category_id FROM Tickets WHERE ticket_id = ANY(%s);",
+    'comments': "SELECT comment_id, ticket_id, author_id, author_type, comment_text, created_at FROM TicketComments WHERE comment_id = ANY(%s);",
+    'logs': "SELECT log_id, ticket_id, action, performed_by_staff_id, performed_at FROM TicketLogs WHERE log_id = ANY(%s);"
+}
+
+def fetch_rows_by_ids(table, ids):
+    """
+    Fetches the current version of specific rows of a table.
+    
+    @param table: Key of the table in ROWS_BY_ID_QUERIES
+    @param ids: Iterable of primary-key values
+    @return: List of row dictionaries for the rows that still exist
+    @raise psycopg2.Error: On connection or query errors
+    """
+    with db_connection() as conn:
+        return fetch_rows(conn, ROWS_BY_ID_QUERIES[table], (list(ids),))
+
+# Credentials of one login with its department grants (create_support_db.sql, section 7)
+CREDENTIALS_QUERY = """
+    SELECT c.login, c.code_hash, c.role, c.staff_id,
+           COALESCE(c.display_name, s.full_name) AS name,
+           COALESCE(array_agg(g.department ORDER BY g.department) FILTER (WHERE g.department IS NOT NULL), '{}') AS departments
+    FROM StaffCredentials c
+    JOIN Staff s ON s.staff_id = c.staff_id
+    LEFT JOIN StaffDepartmentGrants g ON g.staff_id = c.staff_id
+    WHERE c.login = %s AND c.is_active
+    GROUP BY c.login, c.code_hash, c.role, c.staff_id, c.display_name, s.full_name;
+"""
+
+def fetch_staff_credentials(login):
+    """
+    Fetches the credentials, role and department grants of an active login.
+    
+    @param login: Validated login name
+    @return: Dictionary with login, code_hash, role, staff_id, name and departments, or None if not found
+    @raise psycopg2.Error: If the query fails
+    """
+    with db_connection() as conn:
+        rows = fetch_rows(conn, CREDENTIALS_QUERY, (login,))
+    return rows[0] if rows else None
+
+STAFF_LOGINS_QUERY = """
+    SELECT c.login, c.role, c.staff_id,
+           COALESCE(c.display_name, s.full_name) AS name,
+           COALESCE(array_agg(g.department ORDER BY g.department) FILTER (WHERE g.department IS NOT NULL), '{}') AS departments
+    FROM StaffCredentials c
+    JOIN Staff s ON s.staff_id = c.staff_id
+    LEFT JOIN StaffDepartmentGrants g ON g.staff_id = c.staff_id
+    WHERE c.is_active
+    GROUP BY c.login, c.role, c.staff_id, c.display_name, s.full_name
+    ORDER BY c.login;
+"""
+
+def fetch_staff_logins():
+    """
+    Fetches all active logins with their role and department grants, without code hashes.
+    
+    @return: List of dictionaries with login, role, staff_id, name and departments, ordered by login
+    @raise psycopg2.Error: If the query fails
+    """
+    with db_connection() as conn:
+        return fetch_rows(conn, STAFF_LOGINS_QUERY)
@@ -0,0 +1,196 @@
+import logging
+import threading
+from data_store import RELOADED
+from quantile_sketch import DDSketch
+from first_reply_index import first_response_hours
+from constants import REPORTED_QUANTILES
+
+logger = logging.getLogger(__name__)
+
+def _resolution_hours(ticket):
+    """
+    Returns the created-to-closed time of a ticket.
+    
+    @param ticket: Ticket dictionary
+    @return: Duration in hours, or None if the ticket is not closed
+    """
+    created_at = ticket.get('created_at')
+    closed_at = ticket.get('closed_at')
+    if created_at is None or closed_at is None:
+        return None
+    return (closed_at - created_at).total_seconds() / 3600.0
+
+def quantiles(sketch):
+    """
+    Reads the REPORTED_QUANTILES of a sketch.
+    
+    @param sketch: DDSketch or None
+    @return: Dictionary with 'count', the exact 'mean' and one entry per reported quantile
+             (hours rounded to 0.01, None if empty)
+    """
+    mean = sketch.mean() if sketch is not None else None
+    result = {'count': sketch.count if sketch is not None else 0, 'mean': round(mean, 2) if mean is not None else None}
+    for name, q in REPORTED_QUANTILES.items():
+        value = sketch.quantile(q) if sketch is not None else None
+        result[name] = round(value, 2) if value is not None else None
+    return result
+
+class DurationSketches:
+    """
+    Quantile sketches of ticket durations per staff member, department and
+    staff member's category.
+    
+    Each ticket contributes its durations (resolution time and time to the
+    first staff reply) to the DDSketch of its assignee, the assignee's
+    department and the assignee's category. Sketches are built once from the
+    store and then kept up to date through the DataStore listener hook: a
+    changed ticket removes its old durations and adds the new ones, so a ticket
+    closing costs O(1) and a percentile query depends only on the number of
+    sketch buckets. First replies come from a FirstReplyIndex, whose listener
+    moves a ticket's first-response time when a comment changes it. A change to
+    the staff table or a full reload rebuilds every sketch.
+    """
+
+    # Names of the duration metrics
+    METRICS = ('resolution', 'first_response')
+
+    def __init__(self, store, first_replies):
+        """
+        @param store: DataStore whose tickets are summarized
+        @param first_replies: FirstReplyIndex of the same store; must be created before this
+                              object so that it is rebuilt first after a reload
+        """
+        self.store = store
+        self.first_replies = first_replies
+        self._lock = threading.Lock()
+        self._rebuild()
+        store.add_listener(self._on_change)
+        first_replies.add_listener(self._on_first_replies)
+
+    def _rebuild(self):
+        """
+        Recomputes every sketch from the tickets and staff held by the store.
+        
+        @return: None
+        """
+        with self._lock:
+            self._departments_by_staff = {s['staff_id']: s.get('department') for s in self.store.staff}
+            self._sketches = {}
+            self._staff_categories = {}
+            for ticket in self.store.tickets:
+                self._add(ticket, 1)
+        logger.debug(f"Duration sketches rebuilt ({len(self._sketches)} sketches)")
+
+    def _add(self, ticket, sign):
+        """
+        Adds (sign=1) or removes (sign=-1) a ticket's durations. Must be called with the lock held.
+        
+        @param ticket: Ticket dictionary
+        @param sign: 1 or -1
+        @return: None
+        """
+        self._add_duration(ticket, 'resolution', _resolution_hours(ticket), sign)
+        first_reply_at = self.first_replies.get(ticket['ticket_id'])
+        self._add_duration(ticket, 'first_response', first_response_hours(ticket, first_reply_at), sign)
+
+    def _add_duration(self, ticket, metric, hours, sign):
+        """
+        Adds (sign=1) or removes (sign=-1) one duration of a ticket. Must be called with the lock held.
+        
+        @param ticket: Ticket dictionary
+        @param metric: Name of the duration metric
+        @param hours: Duration in hours, or None (nothing to count)
+        @param sign: 1 or -1
+        @return: None
+        """
+        staff_id = ticket.get('assigned_staff_id')
+        if staff_id is None or hours is None:
+            return
+        department = self._departments_by_staff.get(staff_id)
+        targets = [
+            (self._sketches, (metric, 'staff', staff_id)),
+            (self._staff_categories.setdefault((metric, staff_id), {}), ticket.get('category_id'))
+        ]
+        if department is not None:
+            targets.append((self._sketches, (metric, 'department', department)))
+        for sketches, key in targets:
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = DDSketch()
+            sketch.add(hours, sign)
+            if sketch.count <= 0:
+                del sketches[key]
+
+    def _on_change(self, table, changes):
+        """
+        DataStore listener keeping the sketches in step with ticket and staff changes.
+        
+        @param table: Name of the changed table, or RELOADED
+        @param changes: List of (old_row, new_row) tuples
+        @return: None
+        """
+        if table in (RELOADED, 'staff'):
+            self._rebuild()
+            return
+        if table != 'tickets':
+            return
+        with self._lock:
+            for old, new in changes:
+                if old is not None:
+                    self._add(old, -1)
+                if new is not None:
+                    self._add(new, 1)
+
+    def _on_first_replies(self, updates):
+        """
+        FirstReplyIndex listener moving the first-response times of tickets whose first reply changed.
+        
+        @param updates: List of (ticket_id, old_first_reply_at, new_first_reply_at) tuples
+        @return: None
+        """
+        with self._lock:
+            for ticket_id, old_first, new_first in updates:
+                ticket = self.store.get_ticket(ticket_id)
+                if ticket is None:
+                    continue
+                self._add_duration(ticket, 'first_response', first_response_hours(ticket, old_first), -1)
+                self._add_duration(ticket, 'first_response', first_response_hours(ticket, new_first), 1)
+
+    def for_staff(self, metric, staff_id):
+        """
+        Returns the duration percentiles of one staff member's tickets.
+        
+        @param metric: Name of the duration metric (see METRICS)
+        @param staff_id: The ID of the staff member
+        @return: Dictionary from quantiles()
+        """
+        with self._lock:
+            return quantiles(self._sketches.get((metric, 'staff', staff_id)))
+
+    def for_departments(self, metric, departments):
+        """
+        Returns the duration percentiles of the tickets of the given departments, merging their sketches.
+        
+        @param metric: Name of the duration metric (see METRICS)
+        @param departments: List of department names
+        @return: Dictionary from quantiles()
+        """
+        merged = DDSketch()
+        with self._lock:
+            for department in set(departments):
+                sketch = self._sketches.get((metric, 'department', department))
+                if sketch is not None:
+                    merged.merge(sketch)
+        return quantiles(merged)
+
+    def categories_for_staff(self, metric, staff_id):
+        """
+        Returns the duration percentiles of one staff member's tickets per category.
+        
+        @param metric: Name of the duration metric (see METRICS)
+        @param staff_id: The ID of the staff member
+        @return: Dictionary mapping category ID to a dictionary from quantiles()
+        """
+        with self._lock:
+            categories = self._staff_categories.get((metric, staff_id)) or {}
+            return {category_id: quantiles(sketch) for category_id, sketch in categories.items()}
@@ -0,0 +1,121 @@
+import logging
+import threading
+from data_store import RELOADED
+
+logger = logging.getLogger(__name__)
+
+def _is_staff_reply(comment):
+    """
+    @param comment: Comment dictionary
+    @return: True if the comment was written by a staff member and has a timestamp
+    """
+    return comment.get('author_type') == 'staff' and comment.get('created_at') is not None
+
+def first_response_hours(ticket, first_reply_at):
+    """
+    Returns the time from a ticket's creation to its first staff reply.
+    
+    @param ticket: Ticket dictionary
+    @param first_reply_at: datetime of the first staff comment, or None
+    @return: Duration in hours (0 for replies stamped before the ticket), or None if there is no reply yet
+    """
+    created_at = ticket.get('created_at')
+    if first_reply_at is None or created_at is None:
+        return None
+    return max((first_reply_at - created_at).total_seconds() / 3600.0, 0.0)
+
+class FirstReplyIndex:
+    """
+    Time of the first staff comment of every ticket.
+    
+    Built in one pass over the comments sorted by time, so the first staff
+    comment seen for a ticket is its first reply. Kept up to date through the
+    DataStore listener hook: a new comment only has to be compared with the
+    stored time; a changed or removed comment that was the first reply makes
+    the ticket's comments be scanned again. Listeners registered with
+    add_listener() are told which tickets got a different first reply.
+    """
+
+    def __init__(self, store):
+        """
+        @param store: DataStore whose comments are indexed
+        """
+        self.store = store
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._rebuild()
+        store.add_listener(self._on_change)
+
+    def add_listener(self, callback):
+        """
+        Registers a function called after first replies changed (not after a full reload).
+        
+        @param callback: Callable taking a list of (ticket_id, old_first_reply_at, new_first_reply_at) tuples
+        @return: None
+        """
+        self._listeners.append(callback)
+
+    def _rebuild(self):
+        """
+        Recomputes the first reply of every ticket from the comments held by the store.
+        
+        @return: None
+        """
+        first_replies = {}
+        for comment in sorted(filter(_is_staff_reply, self.store.comments), key=lambda c: c['created_at']):
+            first_replies.setdefault(comment['ticket_id'], comment['created_at'])
+        with self._lock:
+            self._first_replies = first_replies
+        logger.debug(f"First reply index rebuilt for {len(first_replies)} tickets")
+
+    def _scan(self, ticket_id):
+        """
+        Finds the first staff reply of one ticket among its stored comments.
+        
+        @param ticket_id: The ID of the ticket
+        @return: datetime of the first staff comment, or None
+        """
+        return min((c['created_at'] for c in self.store.comments_by_ticket(ticket_id) if _is_staff_reply(c)), default=None)
+
+    def _on_change(self, table, changes):
+        """
+        DataStore listener applying comment changes to the index.
+        
+        @param table: Name of the changed table, or RELOADED
+        @param changes: List of (old_row, new_row) tuples
+        @return: None
+        """
+        if table == RELOADED:
+            self._rebuild()
+            return
+        if table != 'comments':
+            return
+        updates = []
+        with self._lock:
+            for old, new in changes:
+                for ticket_id in {row['ticket_id'] for row in (old, new) if row is not None}:
+                    current = self._first_replies.get(ticket_id)
+                    if old is None:
+                        # New comment: it can only move the first reply earlier
+                        first = new['created_at'] if _is_staff_reply(new) and (current is None or new['created_at'] < current) else current
+                    else:
+                        first = self._scan(ticket_id)
+                    if first == current:
+                        continue
+                    if first is None:
+                        del self._first_replies[ticket_id]
+                    else:
+                        self._first_replies[ticket_id] = first
+                    updates.append((ticket_id, current, first))
+        if updates:
+            for callback in self._listeners:
+                callback(updates)
+
+    def get(self, ticket_id):
+        """
+        Returns the first staff reply time of a ticket.
+        
+        @param ticket_id: The ID of the ticket
+        @return: datetime, or None if no staff member has replied
+        """
+        return self._first_replies.get(ticket_id)
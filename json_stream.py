@@ -0,0 +1,83 @@
+from flask import request, current_app, stream_with_context
+from constants import STREAM_BATCH_SIZE
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def stream_mode():
+    """
+    Decides whether a collection should be streamed for the current request.
+    
+    NDJSON is used when the client prefers application/x-ndjson in its Accept
+    header; a streamed JSON array when it passes stream=1.
+    
+    @return: 'ndjson', 'json' or None for a regular buffered response
+    """
+    if NDJSON_MIMETYPE in request.accept_mimetypes and \
+            request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return 'ndjson'
+    if request.args.get('stream') in ('1', 'true'):
+        return 'json'
+    return None
+
+def _json_array(items, dumps, batch_size):
+    """
+    Serializes items as one JSON array, yielding a chunk every batch_size elements.
+    
+    @param items: Iterable of JSON-serializable objects
+    @param dumps: Function serializing one object
+    @param batch_size: Number of elements per chunk
+    @return: Generator of string chunks
+    """
+    yield '['
+    separator = ''
+    batch = []
+    for item in items:
+        batch.append(dumps(item))
+        if len(batch) >= batch_size:
+            yield separator + ','.join(batch)
+            separator = ','
+            batch = []
+    if batch:
+        yield separator + ','.join(batch)
+    yield ']\n'
+
+def _ndjson(items, dumps, batch_size):
+    """
+    Serializes items as newline-delimited JSON, yielding a chunk every batch_size lines.
+    
+    @param items: Iterable of JSON-serializable objects
+    @param dumps: Function serializing one object
+    @param batch_size: Number of lines per chunk
+    @return: Generator of string chunks
+    """
+    batch = []
+    for item in items:
+        batch.append(dumps(item) + '\n')
+        if len(batch) >= batch_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+def stream_response(items, mode):
+    """
+    Builds a response that serializes a collection while it is being sent.
+    
+    Elements are encoded one at a time with the application's JSON provider
+    (the same encoding as jsonify, always compact) and sent in chunks of STREAM_BATCH_SIZE, so
+    memory per request does not grow with the result size when items is a
+    generator. The request context stays available to the generator.
+    
+    @param items: Iterable of JSON-serializable objects
+    @param mode: 'json' for a JSON array or 'ndjson' for one object per line
+    @return: Streamed Flask response
+    """
+    provider = current_app.json
+    # Compact separators as in jsonify outside debug mode; elements are never indented
+    dumps = lambda item: provider.dumps(item, separators=(',', ':'))
+    if mode == 'ndjson':
+        body, mimetype = _ndjson(items, dumps, STREAM_BATCH_SIZE), NDJSON_MIMETYPE
+    else:
+        body, mimetype = _json_array(items, dumps, STREAM_BATCH_SIZE), JSON_MIMETYPE
+    return current_app.response_class(stream_with_context(body), mimetype=mimetype)
@@ -0,0 +1,228 @@
+import gzip
+import logging
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Logger that receives the per-request access lines; ACCESS_LOG_SAMPLE_RATE applies to it only
+ACCESS_LOGGER = 'api.access'
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that rolls over by size and by age and gzips rotated files.
+    
+    A rollover happens when the next record would grow the file past maxBytes or
+    when interval seconds have passed since the last rollover. Rotated files are
+    named api.log.1.gz, api.log.2.gz, ... and compressed by the rotator, which
+    runs inside emit(); behind a LogPipeline that is the listener thread, so
+    request threads never wait for the compression.
+    """
+
+    def __init__(self, filename, max_bytes, backup_count, interval=0, compress=True):
+        """
+        @param filename: Path of the active log file
+        @param max_bytes: Size in bytes after which the file is rotated (0 disables size rotation)
+        @param backup_count: Number of rotated files to keep
+        @param interval: Seconds after which the file is rotated regardless of size (0 disables time rotation)
+        @param compress: Whether rotated files are gzipped
+        """
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.interval = interval
+        self._rollover_at = time.time() + interval if interval > 0 else None
+        if compress:
+            self.namer = self._gz_name
+            self.rotator = self._gzip_rotate
+
+    @staticmethod
+    def _gz_name(name):
+        """
+        Returns the name of a compressed rotated file.
+        
+        @param name: Default rotated file name (e.g. logs/api.log.1)
+        @return: Name with a .gz suffix
+        """
+        return name + '.gz'
+
+    @staticmethod
+    def _gzip_rotate(source, dest):
+        """
+        Compresses the closed log file into its rotated name and removes the original.
+        
+        @param source: Path of the log file that was just closed
+        @param dest: Path of the compressed rotated file
+        @return: None
+        """
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        """
+        Checks whether the file must be rotated before the record is written.
+        
+        @param record: LogRecord about to be emitted
+        @return: True if the size or the age limit was reached
+        """
+        if self._rollover_at is not None and time.time() >= self._rollover_at:
+            # Nothing to rotate yet: restart the interval instead of producing empty archives
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                return True
+            self._rollover_at = time.time() + self.interval
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        """
+        Rotates the files and schedules the next time-based rollover.
+        
+        @return: None
+        """
+        super().doRollover()
+        if self.interval > 0:
+            self._rollover_at = time.time() + self.interval
+
+class SamplingFilter(logging.Filter):
+    """
+    Filter that lets through a fixed fraction of records.
+    
+    Used on the access logger, where one line per request dominates the log
+    volume under load. Warnings and errors always pass.
+    """
+
+    def __init__(self, rate):
+        """
+        @param rate: Fraction of INFO and lower records to keep, from 0.0 to 1.0
+        """
+        super().__init__()
+        self.rate = rate
+        # Own generator so sampling does not consume the global random sequence
+        self._random = random.Random()
+        self.dropped = 0
+
+    def filter(self, record):
+        """
+        @param record: LogRecord to check
+        @return: True if the record should be logged
+        """
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        if self._random.random() < self.rate:
+            return True
+        self.dropped += 1
+        return False
+
+class ExcludeLoggerFilter(logging.Filter):
+    """
+    Filter that rejects the records of one logger and its children, e.g. to keep access lines out of the main log.
+    """
+
+    def filter(self, record):
+        """
+        @param record: LogRecord to check
+        @return: True if the record does not come from the excluded logger
+        """
+        return not super().filter(record)
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller: records are dropped and counted when the queue is full.
+    """
+
+    def __init__(self, log_queue):
+        """
+        @param log_queue: Bounded queue shared with the listener
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        """
+        @param record: Prepared LogRecord
+        @return: None
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LogPipeline:
+    """
+    Asynchronous logging: loggers put records on a bounded queue and a
+    background QueueListener thread runs the real handlers.
+    
+    Request threads only format the record and enqueue it, so disk flushes,
+    rotation and compression never add to request latency. If the writer falls
+    behind and the queue fills up, new records are dropped and counted rather
+    than blocking the request.
+    """
+
+    def __init__(self, handlers, queue_size):
+        """
+        @param handlers: Handlers run on the listener thread (file, console, ...)
+        @param queue_size: Maximum number of records waiting to be written
+        """
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = _DroppingQueueHandler(self.queue)
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.samplers = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def install(self, logger, level):
+        """
+        Routes a logger through the queue and starts the listener thread.
+        
+        @param logger: Logger receiving the queue handler (usually the root logger)
+        @param level: Level set on the logger
+        @return: None
+        """
+        logger.setLevel(level)
+        logger.addHandler(self.handler)
+        with self._lock:
+            if not self._started:
+                self.listener.start()
+                self._started = True
+
+    def sample(self, logger_name, rate):
+        """
+        Keeps only a fraction of the INFO records of one logger. Does nothing if the rate is 1.0 or higher.
+        
+        @param logger_name: Name of the logger to sample
+        @param rate: Fraction of records to keep
+        @return: None
+        """
+        if rate >= 1.0:
+            return
+        sampler = SamplingFilter(rate)
+        logging.getLogger(logger_name).addFilter(sampler)
+        self.samplers[logger_name] = sampler
+
+    def stop(self):
+        """
+        Writes the records still in the queue and stops the listener thread.
+        
+        @return: None
+        """
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+    def stats(self):
+        """
+        Returns queue statistics for monitoring.
+        
+        @return: Dictionary with the queue depth, its capacity and dropped record counts
+        """
+        return {
+            'queued': self.queue.qsize(),
+            'queue_size': self.queue.maxsize,
+            'dropped': self.handler.dropped,
+            'sampled_out': {name: sampler.dropped for name, sampler in self.samplers.items()}
+        }
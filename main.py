@@ -1,34 +1,48 @@
 from flask import Flask
 import logging
-from logging.handlers import RotatingFileHandler
 import os
-from constants import API_HOST, API_PORT, API_DEBUG, LOG_FILE, LOG_MAX_SIZE, LOG_BACKUP_COUNT, DEFAULT_USERS
-from db_utils import (
-    get_users_from_db, get_staff_from_db, get_ticket_statuses_from_db,
-    get_problem_categories_from_db, get_tickets_from_db, get_comments_from_db, get_logs_from_db
-)
+import atexit
+import time
+import psycopg2
+from constants import (API_HOST, API_PORT, API_DEBUG, LOG_FILE, LOG_MAX_SIZE, LOG_BACKUP_COUNT, LOG_ROTATE_INTERVAL,
+                       LOG_COMPRESS_ROTATED, LOG_QUEUE_SIZE, ACCESS_LOG_FILE, ACCESS_LOG_SAMPLE_RATE, DATA_SYNC_MODE, DATA_BACKEND)
+from db_utils import load_all_tables, close_pool, fetch_staff_logins
+from log_pipeline import LogPipeline, CompressingRotatingFileHandler, ExcludeLoggerFilter, ACCESS_LOGGER
+from access_log import install_access_log
+from response_compression import install_compression
+from auth import get_session_stats, get_credential_cache_stats, invalidate_credentials
+from data_store import DataStore
+from data_sync import DeltaSyncer
+from change_listener import ChangeListener
+from data_backend import MemoryBackend, SqlBackend
+from view_refresher import ReportViewRefresher
+from response_cache import ResponseCache
 from api_endpoints import create_endpoints
 
 def setup_logging():
     """
     Configures the logging system for the application.
+    Records from every module go through a queue to a background thread that
+    writes them to the console and to the rotating, compressed log file.
     
-    @return: Configured logger instance
+    @return: Tuple (configured logger instance, LogPipeline)
     """
     # REMOVED: logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
 
     if not os.path.exists('logs'):
         os.makedirs('logs')
 
-    # Rotating file handler
-    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_SIZE, backupCount=LOG_BACKUP_COUNT)
+    # Rotating file handler: rotates by size and age, gzips rotated files
+    file_handler = CompressingRotatingFileHandler(
+        LOG_FILE, max_bytes=LOG_MAX_SIZE, backup_count=LOG_BACKUP_COUNT,
+        interval=LOG_ROTATE_INTERVAL, compress=LOG_COMPRESS_ROTATED
+    )
     file_handler.setFormatter(logging.Formatter(
         '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
     ))
     file_handler.setLevel(logging.INFO)
-    logger.addHandler(file_handler) # Add handler to the root logger
+    file_handler.addFilter(ExcludeLoggerFilter(ACCESS_LOGGER))
 
     # Console handler
     console_handler = logging.StreamHandler()
@@ -36,50 +50,67 @@ def setup_logging():
     console_handler.setFormatter(logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     ))
-    logger.addHandler(console_handler) 
+    console_handler.addFilter(ExcludeLoggerFilter(ACCESS_LOGGER))
+
+    # Access log: bare JSON lines, one per request, with the same rotation budget
+    access_handler = CompressingRotatingFileHandler(
+        ACCESS_LOG_FILE, max_bytes=LOG_MAX_SIZE, backup_count=LOG_BACKUP_COUNT,
+        interval=LOG_ROTATE_INTERVAL, compress=LOG_COMPRESS_ROTATED
+    )
+    access_handler.setFormatter(logging.Formatter('%(message)s'))
+    access_handler.setLevel(logging.INFO)
+    access_handler.addFilter(logging.Filter(ACCESS_LOGGER))
+
+    # All handlers run on the pipeline thread; the root logger only enqueues records
+    pipeline = LogPipeline([file_handler, console_handler, access_handler], queue_size=LOG_QUEUE_SIZE)
+    pipeline.install(logging.getLogger(), logging.INFO)
+    pipeline.sample(ACCESS_LOGGER, ACCESS_LOG_SAMPLE_RATE)
+    atexit.register(pipeline.stop)
     
-    return logger
+    return logger, pipeline
 
 def load_database_data(logger):
     """
     Loads all necessary data from the database at application startup.
+    All tables are read concurrently from a single consistent database snapshot.
     
     @param logger: Logger instance for logging operations
-    @return: Tuple containing all loaded data: (TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEGORIES, TEST_TICKETS, TEST_COMMENTS, TEST_LOGS)
+    @return: DataStore holding all loaded tables and their lookup indexes
     """
     logger.info("Loading data from the database...")
-    TEST_USERS = get_users_from_db()
-    TEST_STAFF = get_staff_from_db() 
-    TICKET_STATUSES = get_ticket_statuses_from_db()
-    PROBLEM_CATEGORIES = get_problem_categories_from_db()
-    TEST_TICKETS = get_tickets_from_db()
-    TEST_COMMENTS = get_comments_from_db()
-    TEST_LOGS = get_logs_from_db()
-
-    if not all([TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEGORIES, TEST_TICKETS, TEST_COMMENTS, TEST_LOGS]):
+    started = time.perf_counter()
+    data, timings = load_all_tables()
+    for table, elapsed in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        logger.info(f"  Loaded {table}: {len(data[table])} rows in {elapsed:.3f}s")
+
+    store = DataStore.from_tables(data)
+    if not store.is_complete():
         logger.critical("Critical error: Could not load data from the database.")
         exit(1)
 
-    logger.info(f"Data loaded: {len(TEST_USERS)} users, {len(TEST_STAFF)} staff, {len(TEST_TICKETS)} tickets.")
-    return TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEGORIES, TEST_TICKETS, TEST_COMMENTS, TEST_LOGS
+    counts = store.counts()
+    logger.info(f"Data loaded in {time.perf_counter() - started:.3f}s: {counts['users']} users, {counts['staff']} staff, {counts['tickets']} tickets.")
+    return store
 
-def print_user_credentials(logger):
+def print_user_logins(logger):
     """
-    Prints all available user credentials from the DEFAULT_USERS dictionary.
+    Prints the active logins from the StaffCredentials table. Access codes are never logged.
     
     @param logger: Logger instance for logging operations
     @return: None
     """
+    try:
+        logins = fetch_staff_logins()
+    except psycopg2.Error as e:
+        logger.warning(f"Could not list available users: {e}")
+        return
     logger.info("Available users (for authentication):")
-    
-    # Dynamically print all available users and their credentials from DEFAULT_USERS
-    for username, user_info in DEFAULT_USERS.items():
-        logger.info(f"  Login: {username}")
+    for user_info in logins:
+        logger.info(f"  Login: {user_info['login']}")
         logger.info(f"    Role: {user_info['role']}")
         logger.info(f"    Name: {user_info['name']}")
         logger.info(f"    Staff ID: {user_info['staff_id']}")
         logger.info(f"    Departments: {', '.join(user_info['departments'])}")
-        logger.info(f"    Password: {user_info['code']}")
         logger.info("    ---")
 
 def main():
@@ -89,28 +120,59 @@ def main():
     
     @return: None (runs the Flask application)
     """
-    logger = setup_logging()
+    logger, log_pipeline = setup_logging()
     
     app = Flask(__name__)
+    install_access_log(app)
+    install_compression(app)
+    atexit.register(close_pool)
+
+    refresher = None
+    monitors = {'sessions': get_session_stats, 'credential_cache': get_credential_cache_stats, 'logging': log_pipeline.stats}
+    if DATA_BACKEND == 'sql':
+        # Endpoints query PostgreSQL directly; only the reporting views need refreshing
+        refresher = ReportViewRefresher()
+        backend = SqlBackend(views=refresher)
+        monitors['report_views'] = refresher.stats
+        logger.info("Using the SQL data backend")
+    else:
+        # --- Load Data from Database at Startup ---
+        store = load_database_data(logger)
+        backend = MemoryBackend(store)
+        syncer = DeltaSyncer(store)
+        if DATA_SYNC_MODE == 'notify':
+            # Credential changes are pushed through the same channel and drop cached logins
+            credential_handlers = {'staffcredentials': invalidate_credentials, 'staffdepartmentgrants': invalidate_credentials}
+            refresher = ChangeListener(store, catch_up=syncer.sync_once, handlers=credential_handlers)
+            monitors['data_listener'] = refresher.stats
+        elif DATA_SYNC_MODE == 'poll':
+            refresher = syncer
+        monitors['data_sync'] = syncer.stats
 
-    # --- Load Data from Database at Startup ---
-    TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEGORIES, TEST_TICKETS, TEST_COMMENTS, TEST_LOGS = load_database_data(logger)
+    response_cache = ResponseCache()
+    monitors['response_cache'] = response_cache.stats
 
     # --- Register API Endpoints ---
-    create_endpoints(app, TEST_USERS, TEST_STAFF, TICKET_STATUSES, PROBLEM_CATEGORIES, TEST_TICKETS, TEST_COMMENTS, TEST_LOGS)
+    create_endpoints(app, backend, monitors=monitors, response_cache=response_cache)
 
     if __name__ == '__main__':
         logger.info("=" * 50)
         logger.info("HelpDesk API Server Started")
         
-        print_user_credentials(logger)
+        print_user_logins(logger)
         
-        logger.info("Test data loaded from DB:")
-        logger.info(f"  Users: {len(TEST_USERS)}")
-        logger.info(f"  Staff: {len(TEST_STAFF)}")
-        logger.info(f"  Tickets: {len(TEST_TICKETS)}")
-        logger.info(f"  Comments: {len(TEST_COMMENTS)}")
-        logger.info(f"  Logs: {len(TEST_LOGS)}")
+        counts = backend.counts()
+        logger.info(f"Test data in DB ({backend.name} backend):")
+        logger.info(f"  Users: {counts['users']}")
+        logger.info(f"  Staff: {counts['staff']}")
+        logger.info(f"  Tickets: {counts['tickets']}")
+        logger.info(f"  Comments: {counts['comments']}")
+        logger.info(f"  Logs: {counts['logs']}")
+
+        # With the debug reloader the parent process only watches files; refresh data in the serving child
+        if refresher is not None and (not API_DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+            refresher.start()
+            atexit.register(refresher.stop)
 
         logger.info(f"Server running on http://{API_HOST}:{API_PORT}")
         app.run(host=API_HOST, port=API_PORT, debug=API_DEBUG)
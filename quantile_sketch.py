@@ -0,0 +1,120 @@
+import math
+from constants import QUANTILE_SKETCH_ACCURACY
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees (DDSketch).
+    
+    Positive values are counted in logarithmic buckets: bucket k holds values
+    in (gamma^(k-1), gamma^k] with gamma = (1 + a) / (1 - a), so every quantile
+    is returned within relative accuracy a of the true value. The number of
+    buckets depends on the range of the values, not on how many were added,
+    which keeps memory and quantile queries independent of the ticket count.
+    Counts can also be removed again (count=-1), so a sketch follows updates
+    of the values it summarizes. Values at or below zero share one bucket.
+    Buckets can also be counted elsewhere (e.g. GROUP BY in SQL, see
+    bucket_key()) and loaded with add_bucket(), giving the same quantiles.
+    """
+
+    def __init__(self, relative_accuracy=QUANTILE_SKETCH_ACCURACY):
+        """
+        @param relative_accuracy: Maximum relative error of the returned quantiles, e.g. 0.01
+        """
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = {}
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+
+    @property
+    def log_gamma(self):
+        """
+        @return: Natural logarithm of gamma; value v > 0 falls into bucket ceil(ln(v) / log_gamma)
+        """
+        return self._log_gamma
+
+    def bucket_key(self, value):
+        """
+        @param value: Value to place
+        @return: Index of the bucket holding the value, or None for the bucket of values at or below zero
+        """
+        return math.ceil(math.log(value) / self._log_gamma) if value > 0 else None
+
+    def add(self, value, count=1):
+        """
+        Adds a value, or removes a previously added value with a negative count.
+        
+        @param value: Value to add (e.g. a duration in hours)
+        @param count: Number of occurrences; negative to remove
+        @return: None
+        """
+        self.add_bucket(self.bucket_key(value), count, value * count)
+
+    def add_bucket(self, key, count, total):
+        """
+        Adds (or with a negative count removes) values counted into one bucket.
+        
+        @param key: Bucket index from bucket_key(), or None for values at or below zero
+        @param count: Number of values
+        @param total: Sum of the values
+        @return: None
+        """
+        self.count += count
+        self.sum += total
+        if key is None:
+            self._zero_count += count
+            return
+        remaining = self._buckets.get(key, 0) + count
+        if remaining > 0:
+            self._buckets[key] = remaining
+        else:
+            self._buckets.pop(key, None)
+
+    def merge(self, other):
+        """
+        Adds the counts of another sketch with the same accuracy to this one.
+        
+        @param other: DDSketch to merge
+        @return: None
+        """
+        for key, count in other._buckets.items():
+            self._buckets[key] = self._buckets.get(key, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+
+    def mean(self):
+        """
+        Returns the exact mean of the added values (the sum is tracked alongside the buckets).
+        
+        @return: Mean, or None if the sketch is empty
+        """
+        return self.sum / self.count if self.count > 0 else None
+
+    def quantile(self, q):
+        """
+        Returns an estimate of the q-quantile of the added values.
+        
+        @param q: Quantile between 0 and 1, e.g. 0.9
+        @return: Estimated value, or None if the sketch is empty
+        """
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if seen > rank:
+                # Midpoint of the bucket in relative terms: within relative_accuracy of every value in it
+                return 2 * self._gamma ** key / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+    def __len__(self):
+        """
+        @return: Number of non-empty buckets (the memory the sketch holds)
+        """
+        return len(self._buckets)
@@ -0,0 +1,152 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from constants import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_DEFAULT_TTL, RESPONSE_CACHE_TTLS
+
+logger = logging.getLogger(__name__)
+
+# Estimated bookkeeping bytes per entry (key string, tuple, dictionary slot) added to the body size
+_ENTRY_OVERHEAD = 200
+
+def variant_key(key, encoding):
+    """
+    Returns the cache key of a response representation for one negotiated content coding.
+    
+    @param key: Request key
+    @param encoding: Negotiated content coding, or None
+    @return: Cache key
+    """
+    return f"{key}.{encoding}" if encoding else key
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized endpoint responses.
+    
+    Entries are keyed by the request key computed in require_auth (user, path,
+    parameters, data version and day) and hold the response body bytes, so a
+    hit skips both the aggregation and the JSON encoding. Compressed variants
+    are stored next to the identity body under their own key (see
+    variant_key), so a hit also skips the compression. Each endpoint has its
+    own TTL (RESPONSE_CACHE_TTLS, 0 disables caching). The cache is bounded by
+    the total size of the stored bodies; the least recently used entries are
+    evicted first. When the data version changes every entry is dropped, so
+    TTLs only bound staleness where no version is tracked (SQL backend).
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MAX_BYTES, default_ttl=RESPONSE_CACHE_DEFAULT_TTL, ttls=None):
+        """
+        @param max_bytes: Maximum total size of the cached entries in bytes
+        @param default_ttl: Seconds an entry is kept for endpoints without their own TTL
+        @param ttls: Dictionary mapping endpoint name to its TTL in seconds
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = RESPONSE_CACHE_TTLS if ttls is None else ttls
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'expired': 0, 'invalidated': 0}
+
+    def ttl_for(self, endpoint):
+        """
+        Returns the TTL of an endpoint.
+        
+        @param endpoint: Flask endpoint name
+        @return: TTL in seconds; 0 means responses of the endpoint are not cached
+        """
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def _check_version(self, version):
+        """
+        Drops every entry if the data version changed. Must be called with the lock held.
+        
+        @param version: Current data version, or None if not tracked
+        @return: None
+        """
+        if version == self._version:
+            return
+        if self._entries:
+            self._stats['invalidated'] += len(self._entries)
+            logger.debug(f"Response cache cleared after data version change to {version}")
+        self._entries.clear()
+        self._bytes = 0
+        self._version = version
+
+    def _drop(self, key):
+        """
+        Removes one entry. Must be called with the lock held.
+        
+        @param key: Request key
+        @return: None
+        """
+        entry = self._entries.pop(key)
+        self._bytes -= entry[3]
+
+    def get(self, key, version):
+        """
+        Looks up a cached response.
+        
+        @param key: Request key
+        @param version: Current data version, or None if not tracked
+        @return: Tuple (body bytes, mimetype, content coding or None), or None on a miss
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._drop(key)
+                self._stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0], entry[1], entry[4]
+
+    def put(self, key, version, body, mimetype, ttl, encoding=None):
+        """
+        Stores a response body, evicting least recently used entries while over the size limit.
+        Bodies larger than the whole cache are not stored.
+        
+        @param key: Request key
+        @param version: Data version the response was computed for, or None if not tracked
+        @param body: Serialized response body (bytes)
+        @param mimetype: Response mimetype
+        @param ttl: Seconds the entry is kept
+        @param encoding: Content coding of the body (e.g. 'gzip'), or None for the identity encoding
+        @return: None
+        """
+        size = len(body) + len(key) + _ENTRY_OVERHEAD
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            # Computed for data that changed meanwhile: get() has already moved on to the new version
+            if version != self._version:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, mimetype, time.monotonic() + ttl, size, encoding)
+            self._bytes += size
+            self._stats['stored'] += 1
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._stats['evicted'] += 1
+
+    def stats(self):
+        """
+        Returns cache statistics for monitoring.
+        
+        @return: Dictionary with the number of entries, their size in bytes and hit/miss/eviction counters
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'data_version': self._version,
+                **self._stats
+            }
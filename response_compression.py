@@ -0,0 +1,208 @@
+import time
+import zlib
+from flask import request
+from access_log import add_timing
+from json_stream import JSON_MIMETYPE, NDJSON_MIMETYPE
+from constants import COMPRESSION_MIN_SIZE, COMPRESSION_ENCODINGS, COMPRESSION_LEVELS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Response mimetypes worth compressing
+COMPRESSIBLE_MIMETYPES = (JSON_MIMETYPE, NDJSON_MIMETYPE)
+
+class _GzipEncoder:
+    """
+    Incremental gzip encoder on top of zlib.
+    """
+
+    def __init__(self, level):
+        """
+        @param level: Compression level 1-9
+        """
+        # wbits 31: deflate stream with gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        """
+        @param data: Bytes to add to the stream
+        @return: Compressed bytes available so far (may be empty)
+        """
+        return self._compressor.compress(data)
+
+    def flush(self):
+        """
+        @return: Compressed bytes for everything added so far, decodable by the client without the rest of the stream
+        """
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        """
+        @return: Remaining compressed bytes and the stream trailer
+        """
+        return self._compressor.flush()
+
+class _BrotliEncoder:
+    """
+    Incremental brotli encoder (requires the brotli package).
+    """
+
+    def __init__(self, level):
+        """
+        @param level: Compression quality 0-11
+        """
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        """
+        @param data: Bytes to add to the stream
+        @return: Compressed bytes available so far (may be empty)
+        """
+        return self._compressor.process(data)
+
+    def flush(self):
+        """
+        @return: Compressed bytes for everything added so far
+        """
+        return self._compressor.flush()
+
+    def finish(self):
+        """
+        @return: Remaining compressed bytes and the end of the stream
+        """
+        return self._compressor.finish()
+
+class _ZstdEncoder:
+    """
+    Incremental zstd encoder (requires the zstandard package).
+    """
+
+    def __init__(self, level):
+        """
+        @param level: Compression level 1-22
+        """
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        """
+        @param data: Bytes to add to the stream
+        @return: Compressed bytes available so far (may be empty)
+        """
+        return self._compressor.compress(data)
+
+    def flush(self):
+        """
+        @return: Compressed bytes for everything added so far
+        """
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        """
+        @return: Remaining compressed bytes and the end of the frame
+        """
+        return self._compressor.flush()
+
+_ENCODERS = {'gzip': _GzipEncoder}
+if brotli is not None:
+    _ENCODERS['br'] = _BrotliEncoder
+if zstandard is not None:
+    _ENCODERS['zstd'] = _ZstdEncoder
+
+# Content codings that can be produced, in order of preference
+AVAILABLE_ENCODINGS = [name for name in COMPRESSION_ENCODINGS if name in _ENCODERS]
+
+def negotiate_encoding():
+    """
+    Picks the content coding for the current request from its Accept-Encoding header.
+    
+    @return: 'gzip', 'br' or 'zstd', or None if the response should not be compressed
+    """
+    return request.accept_encodings.best_match(AVAILABLE_ENCODINGS)
+
+def _encoder(encoding):
+    """
+    @param encoding: Content coding name
+    @return: New incremental encoder for the coding
+    """
+    return _ENCODERS[encoding](COMPRESSION_LEVELS.get(encoding, 6))
+
+def compress_body(body, encoding):
+    """
+    Compresses a complete response body.
+    
+    @param body: Body bytes
+    @param encoding: Content coding name
+    @return: Compressed bytes
+    """
+    encoder = _encoder(encoding)
+    return encoder.compress(body) + encoder.finish()
+
+def _compress_stream(source, chunks, encoding):
+    """
+    Compresses the chunks of a streamed response as they are produced.
+    Every chunk is flushed, so NDJSON clients can decode lines as they arrive.
+    
+    @param source: Original response iterable, closed when the stream ends
+    @param chunks: Iterator of encoded body chunks (bytes)
+    @param encoding: Content coding name
+    @return: Generator of compressed chunks
+    """
+    encoder = _encoder(encoding)
+    try:
+        for chunk in chunks:
+            data = encoder.compress(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        # Ends the request context kept by stream_with_context
+        if hasattr(source, 'close'):
+            source.close()
+
+def compress_response(response, encoding):
+    """
+    Compresses a response with the negotiated content coding if it is worth it.
+    
+    Only JSON and NDJSON bodies are compressed; buffered bodies below
+    COMPRESSION_MIN_SIZE are left as is, streamed bodies are compressed chunk by
+    chunk. Responses that already have a Content-Encoding are not touched.
+    
+    @param response: Flask response
+    @param encoding: Negotiated content coding, or None
+    @return: The same response
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough \
+            or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, response.iter_encoded(), encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        started = time.perf_counter()
+        response.set_data(compress_body(body, encoding))
+        add_timing('compress', time.perf_counter() - started)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def install_compression(app):
+    """
+    Registers an after_request hook compressing the responses of an application.
+    Responses compressed earlier (e.g. served from the response cache) are left as is.
+    
+    @param app: Flask application
+    @return: None
+    """
+    app.after_request(lambda response: compress_response(response, negotiate_encoding()))
@@ -0,0 +1,171 @@
+import logging
+import threading
+from collections import Counter
+from data_store import RELOADED
+
+logger = logging.getLogger(__name__)
+
+# Ticket statuses counted as active (new, in progress, waiting) and as resolved (resolved, closed)
+ACTIVE_STATUSES = (1, 2, 3)
+RESOLVED_STATUSES = (4, 5)
+
+def _ticket_counts(ticket):
+    """
+    Returns the counter contribution of a single ticket.
+    
+    @param ticket: Ticket dictionary
+    @return: Counter with 'assigned', 'active' and 'resolved' keys
+    """
+    status_id = ticket.get('status_id')
+    return Counter({
+        'assigned': 1,
+        'active': 1 if status_id in ACTIVE_STATUSES else 0,
+        'resolved': 1 if status_id in RESOLVED_STATUSES else 0
+    })
+
+def _as_dict(counts):
+    """
+    Converts a counter to the plain dictionary returned to callers.
+    
+    @param counts: Counter or None
+    @return: Dictionary with 'assigned', 'active' and 'resolved' counts
+    """
+    counts = counts or Counter()
+    return {'assigned': counts['assigned'], 'active': counts['active'], 'resolved': counts['resolved']}
+
+class TicketAggregates:
+    """
+    Ticket counters per staff member, department and category.
+    
+    Assigned, active and resolved counts are built once from the store and
+    then kept up to date through the DataStore listener hook: a changed
+    ticket subtracts its old contribution and adds the new one, so a status
+    change or reassignment costs O(1). Departments are resolved through the
+    assignee's staff record; a change to the staff table or a full reload
+    rebuilds every counter.
+    """
+
+    def __init__(self, store):
+        """
+        @param store: DataStore whose tickets are aggregated
+        """
+        self.store = store
+        self._lock = threading.Lock()
+        self._rebuild()
+        store.add_listener(self._on_change)
+
+    def _rebuild(self):
+        """
+        Recomputes every counter from the tickets and staff held by the store.
+        
+        @return: None
+        """
+        with self._lock:
+            self._departments_by_staff = {s['staff_id']: s.get('department') for s in self.store.staff}
+            self._by_staff = {}
+            self._by_department = {}
+            self._by_staff_category = {}
+            self._by_department_category = {}
+            for ticket in self.store.tickets:
+                self._add(ticket, 1)
+        logger.debug(f"Ticket aggregates rebuilt for {len(self._by_staff)} staff members")
+
+    def _add(self, ticket, sign):
+        """
+        Adds (sign=1) or subtracts (sign=-1) a ticket's contribution. Must be called with the lock held.
+        
+        @param ticket: Ticket dictionary
+        @param sign: 1 or -1
+        @return: None
+        """
+        staff_id = ticket.get('assigned_staff_id')
+        if staff_id is None:
+            return
+        counts = _ticket_counts(ticket)
+        department = self._departments_by_staff.get(staff_id)
+        category_id = ticket.get('category_id')
+        targets = [
+            (self._by_staff, staff_id),
+            (self._by_staff_category.setdefault(staff_id, {}), category_id)
+        ]
+        if department is not None:
+            targets += [
+                (self._by_department, department),
+                (self._by_department_category.setdefault(department, {}), category_id)
+            ]
+        for counters, key in targets:
+            counter = counters.setdefault(key, Counter())
+            if sign > 0:
+                counter.update(counts)
+            else:
+                counter.subtract(counts)
+                if counter['assigned'] <= 0:
+                    del counters[key]
+
+    def _on_change(self, table, changes):
+        """
+        DataStore listener keeping the counters in step with ticket and staff changes.
+        
+        @param table: Name of the changed table, or RELOADED
+        @param changes: List of (old_row, new_row) tuples
+        @return: None
+        """
+        if table in (RELOADED, 'staff'):
+            self._rebuild()
+            return
+        if table != 'tickets':
+            return
+        with self._lock:
+            for old, new in changes:
+                if old is not None:
+                    self._add(old, -1)
+                if new is not None:
+                    self._add(new, 1)
+
+    def for_staff(self, staff_id):
+        """
+        Returns the ticket counts of one staff member.
+        
+        @param staff_id: The ID of the staff member
+        @return: Dictionary with 'assigned', 'active' and 'resolved' counts
+        """
+        with self._lock:
+            return _as_dict(self._by_staff.get(staff_id))
+
+    def for_departments(self, departments):
+        """
+        Returns the combined ticket counts of the given departments.
+        
+        @param departments: List of department names
+        @return: Dictionary with 'assigned', 'active' and 'resolved' counts
+        """
+        total = Counter()
+        with self._lock:
+            for department in set(departments):
+                total.update(self._by_department.get(department) or Counter())
+        return _as_dict(total)
+
+    def categories_for_staff(self, staff_id):
+        """
+        Returns the ticket counts of one staff member per category.
+        
+        @param staff_id: The ID of the staff member
+        @return: Dictionary mapping category ID to a counts dictionary
+        """
+        with self._lock:
+            categories = self._by_staff_category.get(staff_id) or {}
+            return {category_id: _as_dict(counts) for category_id, counts in categories.items()}
+
+    def categories_for_departments(self, departments):
+        """
+        Returns the combined ticket counts of the given departments per category.
+        
+        @param departments: List of department names
+        @return: Dictionary mapping category ID to a counts dictionary
+        """
+        totals = {}
+        with self._lock:
+            for department in set(departments):
+                for category_id, counts in (self._by_department_category.get(department) or {}).items():
+                    totals.setdefault(category_id, Counter()).update(counts)
+        return {category_id: _as_dict(counts) for category_id, counts in totals.items()}
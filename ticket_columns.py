@@ -0,0 +1,240 @@
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+from data_store import RELOADED
+
+logger = logging.getLogger(__name__)
+
+# Naive epoch: tickets carry naive timestamps, so day boundaries of the epoch
+# seconds below line up with the calendar dates of the stored values
+_EPOCH = datetime(1970, 1, 1)
+
+# Value stored for a missing foreign key (e.g. an unassigned ticket)
+NO_ID = -1
+
+# Column name -> NumPy dtype of the columnar ticket table
+COLUMNS = {
+    'ticket_id': np.int64,
+    'staff_id': np.int32,
+    'status_id': np.int16,
+    'category_id': np.int32,
+    'created': np.float64,
+    'closed': np.float64,
+    'alive': np.bool_
+}
+
+def to_epoch(value):
+    """
+    Converts a naive datetime to seconds since the naive epoch.
+    
+    @param value: datetime or None
+    @return: Float seconds, or NaN if the value is missing
+    """
+    return (value - _EPOCH).total_seconds() if value is not None else np.nan
+
+def _epoch_column(values):
+    """
+    Converts a sequence of naive datetimes to an epoch-seconds column.
+    
+    @param values: List of datetime objects or None
+    @return: float64 NumPy array with NaN for missing values
+    """
+    stamps = np.array(values, dtype='datetime64[us]')
+    return (stamps - np.datetime64(0, 'us')) / np.timedelta64(1, 's')
+
+def _id_column(values):
+    """
+    Converts a sequence of optional integer IDs to an integer column.
+    
+    @param values: List of integers or None
+    @return: int64 NumPy array with NO_ID for missing values
+    """
+    return np.fromiter((NO_ID if v is None else v for v in values), dtype=np.int64, count=len(values))
+
+class TicketView:
+    """
+    Consistent, read-only view of the ticket columns at one point in time.
+    
+    Every attribute named in COLUMNS is a NumPy array of equal length. Methods
+    return boolean masks or aggregate over a mask, so endpoint statistics are
+    computed with vectorized operations instead of Python loops over dicts.
+    """
+
+    def __init__(self, size, arrays):
+        """
+        @param size: Number of used rows
+        @param arrays: Dictionary mapping column name to its backing array
+        """
+        self.size = size
+        for name, array in arrays.items():
+            setattr(self, name, array[:size])
+
+    def for_staff(self, staff_ids):
+        """
+        Selects live tickets assigned to any of the given staff members.
+        
+        @param staff_ids: Iterable of staff IDs
+        @return: Boolean mask
+        """
+        return self.alive & np.isin(self.staff_id, np.fromiter(staff_ids, dtype=np.int64))
+
+    def resolution_hours(self, mask):
+        """
+        Returns created-to-closed durations of the masked tickets that have both timestamps.
+        
+        @param mask: Boolean mask of tickets
+        @return: float64 array of durations in hours
+        """
+        durations = self.closed[mask] - self.created[mask]
+        return durations[~np.isnan(durations)] / 3600.0
+
+    def bucket_counts(self, column, mask, edges):
+        """
+        Histograms a timestamp column into consecutive buckets in one pass.
+        
+        @param column: 'created' or 'closed'
+        @param mask: Boolean mask of tickets
+        @param edges: Ascending float64 array of n + 1 bucket boundaries in epoch seconds
+        @return: int64 array of length n; timestamps outside [edges[0], edges[-1]) are not counted
+        """
+        stamps = getattr(self, column)[mask]
+        stamps = stamps[~np.isnan(stamps)]
+        buckets = len(edges) - 1
+        positions = np.searchsorted(edges, stamps, side='right') - 1
+        positions = positions[(positions >= 0) & (positions < buckets)]
+        return np.bincount(positions, minlength=buckets)
+
+    def staff_day_counts(self, column, staff_ids, start, days):
+        """
+        Counts a timestamp column per staff member and day in one pass.
+        
+        @param column: 'created' or 'closed'
+        @param staff_ids: Ascending int64 array of staff IDs, one matrix row each
+        @param start: Start of the first day in epoch seconds
+        @param days: Number of days
+        @return: int64 matrix of shape (len(staff_ids), days); tickets of other staff or outside the days are not counted
+        """
+        if not len(staff_ids):
+            return np.zeros((0, days), dtype=np.int64)
+        day = np.floor((getattr(self, column) - start) / 86400.0)
+        rows = np.minimum(np.searchsorted(staff_ids, self.staff_id), len(staff_ids) - 1)
+        # NaN days (missing timestamps) fail both comparisons
+        mask = self.alive & (staff_ids[rows] == self.staff_id) & (day >= 0) & (day < days)
+        cells = rows[mask] * days + day[mask].astype(np.int64)
+        return np.bincount(cells, minlength=len(staff_ids) * days).reshape(len(staff_ids), days)
+
+class TicketColumns:
+    """
+    Compact columnar copy of the ticket table for analytics endpoints.
+    
+    Keeps IDs, status, category, assignee and epoch timestamps in NumPy arrays
+    (about 35 bytes per ticket) in the order tickets were loaded. The table
+    registers itself as a DataStore listener: single-row changes are written in
+    place and new tickets appended into spare capacity, while a full reload of
+    the store rebuilds the arrays.
+    """
+
+    def __init__(self, store):
+        """
+        @param store: DataStore whose tickets are mirrored
+        """
+        self.store = store
+        self._lock = threading.Lock()
+        self._rebuild(store.tickets)
+        store.add_listener(self._on_change)
+
+    def _rebuild(self, tickets):
+        """
+        Builds the columns from a list of ticket dictionaries.
+        
+        @param tickets: List of ticket dictionaries
+        @return: None
+        """
+        size = len(tickets)
+        capacity = max(16, size + size // 4)
+        arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        if size:
+            arrays['ticket_id'][:size] = [t['ticket_id'] for t in tickets]
+            arrays['staff_id'][:size] = _id_column([t.get('assigned_staff_id') for t in tickets])
+            arrays['status_id'][:size] = _id_column([t.get('status_id') for t in tickets])
+            arrays['category_id'][:size] = _id_column([t.get('category_id') for t in tickets])
+            arrays['created'][:size] = _epoch_column([t.get('created_at') for t in tickets])
+            arrays['closed'][:size] = _epoch_column([t.get('closed_at') for t in tickets])
+            arrays['alive'][:size] = True
+        positions = {t['ticket_id']: i for i, t in enumerate(tickets)}
+        with self._lock:
+            self._state = (size, arrays)
+            self._positions = positions
+        logger.debug(f"Ticket columns rebuilt for {size} tickets")
+
+    def _write_row(self, arrays, position, ticket):
+        """
+        Writes one ticket into the given row of the arrays.
+        
+        @param arrays: Dictionary mapping column name to its backing array
+        @param position: Row to write
+        @param ticket: Ticket dictionary
+        @return: None
+        """
+        arrays['ticket_id'][position] = ticket['ticket_id']
+        for column, key in (('staff_id', 'assigned_staff_id'), ('status_id', 'status_id'), ('category_id', 'category_id')):
+            value = ticket.get(key)
+            arrays[column][position] = NO_ID if value is None else value
+        arrays['created'][position] = to_epoch(ticket.get('created_at'))
+        arrays['closed'][position] = to_epoch(ticket.get('closed_at'))
+        arrays['alive'][position] = True
+
+    def _on_change(self, table, changes):
+        """
+        DataStore listener applying ticket changes to the columns.
+        
+        @param table: Name of the changed table, or RELOADED
+        @param changes: List of (old_row, new_row) tuples
+        @return: None
+        """
+        if table == RELOADED:
+            self._rebuild(self.store.tickets)
+            return
+        if table != 'tickets':
+            return
+        with self._lock:
+            size, arrays = self._state
+            for old, new in changes:
+                if new is None:
+                    position = self._positions.pop(old['ticket_id'], None)
+                    if position is not None:
+                        arrays['alive'][position] = False
+                    continue
+                position = self._positions.get(new['ticket_id'])
+                if position is None:
+                    if size == len(arrays['ticket_id']):
+                        # Grow into new arrays so readers holding the old ones stay consistent
+                        capacity = size * 2
+                        grown = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+                        for name in COLUMNS:
+                            grown[name][:size] = arrays[name][:size]
+                        arrays = grown
+                    position = size
+                    size += 1
+                    self._positions[new['ticket_id']] = position
+                self._write_row(arrays, position, new)
+            self._state = (size, arrays)
+
+    def view(self):
+        """
+        Returns a consistent view of the current columns.
+        
+        @return: TicketView instance
+        """
+        size, arrays = self._state
+        return TicketView(size, arrays)
+
+    def memory_bytes(self):
+        """
+        Returns the memory held by the column arrays, including spare capacity.
+        
+        @return: Size in bytes
+        """
+        _, arrays = self._state
+        return sum(array.nbytes for array in arrays.values())
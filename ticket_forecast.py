@@ -0,0 +1,181 @@
+import logging
+import threading
+from datetime import timedelta
+import numpy as np
+from constants import FORECAST_HORIZON_DAYS, FORECAST_SMOOTHING, FORECAST_GROWTH_ALERT
+
+logger = logging.getLogger(__name__)
+
+# Length of the seasonal cycle in days
+SEASON_DAYS = 7
+
+# Difference of two trend slopes (tickets per day, per day) still treated as no change
+STABLE_SLOPE = 0.01
+
+def holt_winters(series, horizon, alpha, beta, gamma, season=SEASON_DAYS):
+    """
+    Forecasts many daily series at once with additive Holt-Winters exponential smoothing.
+    
+    Level, trend and seasonal components are updated day by day for all rows
+    together, so the cost is one vectorized step per day regardless of the
+    number of series. The first season initializes level and seasonality, the
+    second one the trend.
+    
+    @param series: float64 matrix of shape (rows, days) with days >= 2 * season
+    @param horizon: Number of days to forecast after the last day
+    @param alpha: Smoothing factor of the level
+    @param beta: Smoothing factor of the trend
+    @param gamma: Smoothing factor of the seasonality
+    @param season: Length of the seasonal cycle in days
+    @return: float64 matrix of shape (rows, horizon); values may be negative
+    """
+    days = series.shape[1]
+    level = series[:, :season].mean(axis=1)
+    trend = (series[:, season:2 * season].mean(axis=1) - level) / season
+    seasonal = series[:, :season] - level[:, None]
+    for t in range(season, days):
+        previous_level = level
+        phase = t % season
+        level = alpha * (series[:, t] - seasonal[:, phase]) + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+        seasonal[:, phase] = gamma * (series[:, t] - level) + (1 - gamma) * seasonal[:, phase]
+    steps = np.arange(1, horizon + 1)
+    return level[:, None] + trend[:, None] * steps + seasonal[:, (days - 1 + steps) % season]
+
+def trend_slopes(series):
+    """
+    Fits a least-squares line to every row of a matrix.
+    
+    @param series: float64 matrix of shape (rows, days)
+    @return: float64 array of slopes per day, one per row
+    """
+    x = np.arange(series.shape[1]) - (series.shape[1] - 1) / 2.0
+    return (series - series.mean(axis=1, keepdims=True)) @ x / (x @ x)
+
+class TicketForecasts:
+    """
+    Ticket forecasts of every staff member and department fitted at one point in time.
+    
+    Daily arrival (created) and resolution (closed) counts of all staff
+    members are stacked with the department sums into one matrix and fitted in
+    a single vectorized pass: Holt-Winters smoothing with weekly seasonality
+    forecasts the next days, and a regression line gives the trend. Every
+    stored quantity is linear in the input counts, so the forecast of several
+    departments is the sum of their rows and summary() is a lookup.
+    """
+
+    def __init__(self, first_day, staff_ids, departments, created, closed):
+        """
+        @param first_day: date of the first column of the count matrices
+        @param staff_ids: List of staff IDs, one row each
+        @param departments: List of the staff members' departments (None if unknown), aligned with staff_ids
+        @param created: Matrix of tickets created per staff member and day
+        @param closed: Matrix of tickets closed per staff member and day
+        """
+        self.first_day = first_day
+        self.days = created.shape[1]
+        names = sorted({d for d in departments if d is not None})
+        self._rows = {('staff', staff_id): i for i, staff_id in enumerate(staff_ids)}
+        self._rows.update({('department', name): len(staff_ids) + i for i, name in enumerate(names)})
+        # Department rows are the sums of their staff rows
+        membership = np.array([[d == name for d in departments] for name in names], dtype=np.float64)
+        membership = membership.reshape(len(names), len(staff_ids))
+        series = np.vstack([created, membership @ created, closed, membership @ closed]).astype(np.float64)
+        entities = len(self._rows)
+        forecast = holt_winters(series, FORECAST_HORIZON_DAYS, **FORECAST_SMOOTHING)
+        slopes = trend_slopes(series)
+        recent = series[:, -FORECAST_HORIZON_DAYS:].sum(axis=1)
+        # Rows 0..entities-1 hold arrivals, the rest resolutions of the same entities
+        self._created = forecast[:entities]
+        self._closed = forecast[entities:]
+        self._created_slope = slopes[:entities]
+        self._closed_slope = slopes[entities:]
+        self._created_recent = recent[:entities]
+        logger.debug(f"Ticket forecasts fitted for {entities} staff members and departments over {self.days} days")
+
+    def summary(self, staff_id=None, departments=None):
+        """
+        Returns the forecast of one staff member or of the given departments together.
+        
+        @param staff_id: The ID of the staff member, or None to use departments
+        @param departments: List of department names, used if staff_id is None
+        @return: Dictionary with 'daily' (list of forecast days with date, tickets_created and
+                 tickets_resolved), 'expected_tickets', 'expected_resolved', 'created_recent'
+                 (tickets created in the last FORECAST_HORIZON_DAYS days), 'created_slope' and
+                 'resolved_slope' (trend of the daily counts in tickets per day)
+        """
+        keys = [('staff', staff_id)] if staff_id is not None else [('department', d) for d in set(departments)]
+        rows = [self._rows[key] for key in keys if key in self._rows]
+        created = np.maximum(self._created[rows].sum(axis=0), 0)
+        closed = np.maximum(self._closed[rows].sum(axis=0), 0)
+        start = self.first_day + timedelta(days=self.days)
+        return {
+            'daily': [{
+                'date': start + timedelta(days=i),
+                'tickets_created': round(float(created[i]), 1),
+                'tickets_resolved': round(float(closed[i]), 1)
+            } for i in range(len(created))],
+            'expected_tickets': float(created.sum()),
+            'expected_resolved': float(closed.sum()),
+            'created_recent': float(self._created_recent[rows].sum()),
+            'created_slope': float(self._created_slope[rows].sum()),
+            'resolved_slope': float(self._closed_slope[rows].sum())
+        }
+
+class ForecastCache:
+    """
+    Holds the TicketForecasts of the latest data version, fitting them again
+    only when the version changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._forecasts = None
+
+    def get(self, version, fit):
+        """
+        Returns the forecasts for a data version, fitting them on first use.
+        
+        @param version: Hashable value that changes whenever the underlying data changes
+        @param fit: Function without arguments returning a new TicketForecasts
+        @return: TicketForecasts instance
+        """
+        with self._lock:
+            if self._forecasts is None or self._version != version:
+                self._forecasts = fit()
+                self._version = version
+            return self._forecasts
+
+def risk_factors(forecast):
+    """
+    Derives the risk factors reported by /api/v1/forecast from a forecast summary.
+    
+    @param forecast: Dictionary from TicketForecasts.summary()
+    @return: List of risk factor descriptions (possibly empty)
+    """
+    risks = []
+    recent = forecast['created_recent']
+    if recent and forecast['expected_tickets'] > recent * (1 + FORECAST_GROWTH_ALERT):
+        risks.append('Growing ticket volume')
+    if forecast['expected_tickets'] > forecast['expected_resolved']:
+        risks.append('Backlog growth')
+    daily = [day['tickets_created'] for day in forecast['daily']]
+    # A single day expected at least 50% above the daily average
+    if daily and max(daily) > 1.5 * (sum(daily) / len(daily)):
+        risks.append('Seasonal load')
+    return risks
+
+def resolution_trend(forecast):
+    """
+    Compares the trend lines of resolved and created tickets of a forecast summary.
+    
+    @param forecast: Dictionary from TicketForecasts.summary()
+    @return: 'improvement' if resolutions grow faster than arrivals, 'decline' if slower, otherwise 'stable'
+    """
+    gap = forecast['resolved_slope'] - forecast['created_slope']
+    if gap > STABLE_SLOPE:
+        return 'improvement'
+    if gap < -STABLE_SLOPE:
+        return 'decline'
+    return 'stable'
@@ -0,0 +1,119 @@
+import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
+from data_store import RELOADED
+from ticket_columns import to_epoch
+
+logger = logging.getLogger(__name__)
+
+def ticket_key(ticket):
+    """
+    Returns the sort key of a ticket in the keyset order (created_at, ticket_id).
+    
+    @param ticket: Ticket dictionary
+    @return: Tuple (created_at as epoch seconds, ticket ID); a missing created_at sorts first
+    """
+    return created_key(ticket.get('created_at')), ticket['ticket_id']
+
+def created_key(value):
+    """
+    Converts a created_at bound to the first component of a ticket key.
+    
+    @param value: datetime or None
+    @return: Epoch seconds, or -inf if the value is missing
+    """
+    return to_epoch(value) if value is not None else float('-inf')
+
+class StaffTicketIndex:
+    """
+    Per-staff list of ticket keys sorted by (created_at, ticket_id).
+    
+    Serves keyset pagination and created_at range filters of the ticket list
+    with bisect instead of sorting or scanning every ticket of a staff member.
+    Lists are copy-on-write: a change builds a new list for the affected staff
+    member, so readers iterate over a stable list without holding the lock.
+    Kept up to date through the DataStore listener hook.
+    """
+
+    def __init__(self, store):
+        """
+        @param store: DataStore whose tickets are indexed
+        """
+        self.store = store
+        self._lock = threading.Lock()
+        self._rebuild()
+        store.add_listener(self._on_change)
+
+    def _rebuild(self):
+        """
+        Builds the sorted key lists from every ticket in the store.
+        
+        @return: None
+        """
+        keys = {}
+        for ticket in self.store.tickets:
+            staff_id = ticket.get('assigned_staff_id')
+            if staff_id is not None:
+                keys.setdefault(staff_id, []).append(ticket_key(ticket))
+        for staff_keys in keys.values():
+            staff_keys.sort()
+        with self._lock:
+            self._keys = keys
+        logger.debug(f"Staff ticket index rebuilt for {len(keys)} staff members")
+
+    def _on_change(self, table, changes):
+        """
+        DataStore listener moving changed tickets between the sorted lists.
+        
+        @param table: Name of the changed table, or RELOADED
+        @param changes: List of (old_row, new_row) tuples
+        @return: None
+        """
+        if table == RELOADED:
+            self._rebuild()
+            return
+        if table != 'tickets':
+            return
+        with self._lock:
+            updated = {}
+            for old, new in changes:
+                for row, add in ((old, False), (new, True)):
+                    staff_id = row.get('assigned_staff_id') if row is not None else None
+                    if staff_id is None:
+                        continue
+                    if staff_id not in updated:
+                        updated[staff_id] = list(self._keys.get(staff_id, ()))
+                    staff_keys = updated[staff_id]
+                    key = ticket_key(row)
+                    if add:
+                        insort(staff_keys, key)
+                    else:
+                        position = bisect_left(staff_keys, key)
+                        if position < len(staff_keys) and staff_keys[position] == key:
+                            del staff_keys[position]
+            for staff_id, staff_keys in updated.items():
+                if staff_keys:
+                    self._keys[staff_id] = staff_keys
+                else:
+                    self._keys.pop(staff_id, None)
+
+    def keys_for(self, staff_id, after=None, created_from=None, created_to=None):
+        """
+        Returns the sorted keys of a staff member's tickets and the range matching the bounds.
+        
+        @param staff_id: The ID of the staff member
+        @param after: Key (created_at epoch, ticket ID) of the last ticket already returned, or None
+        @param created_from: Inclusive lower created_at bound (datetime) or None
+        @param created_to: Exclusive upper created_at bound (datetime) or None
+        @return: Tuple (sorted key list, start position, end position)
+        """
+        staff_keys = self._keys.get(staff_id, [])
+        start = 0
+        if after is not None:
+            start = bisect_right(staff_keys, after)
+        if created_from is not None:
+            start = max(start, bisect_left(staff_keys, (created_key(created_from),)))
+        end = len(staff_keys)
+        if created_to is not None:
+            end = bisect_left(staff_keys, (created_key(created_to),))
+        return staff_keys, start, end
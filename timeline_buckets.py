@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+# Supported bucket sizes of /api/v1/timeline, named like the PostgreSQL date_trunc fields
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+# strftime format of the bucket labels per granularity (weeks are labelled with their Monday)
+_LABEL_FORMATS = {
+    'hour': '%Y-%m-%dT%H:00',
+    'day': '%Y-%m-%d',
+    'week': '%Y-%m-%d',
+    'month': '%Y-%m'
+}
+
+def truncate(moment, granularity):
+    """
+    Returns the start of the bucket containing a moment, like PostgreSQL date_trunc().
+    
+    @param moment: Naive datetime
+    @param granularity: One of GRANULARITIES
+    @return: datetime of the bucket start (weeks start on Monday)
+    """
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = datetime(moment.year, moment.month, moment.day)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_start(start, granularity):
+    """
+    Returns the start of the bucket following the one starting at start.
+    
+    @param start: Bucket start returned by truncate()
+    @param granularity: One of GRANULARITIES
+    @return: datetime
+    """
+    if granularity == 'hour':
+        return start + timedelta(hours=1)
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=1)
+
+def bucket_edges(start, end, granularity, max_buckets):
+    """
+    Returns the boundaries of the whole buckets covering the period [start, end).
+    
+    @param start: Inclusive start of the period (datetime)
+    @param end: Exclusive end of the period (datetime), after start
+    @param granularity: One of GRANULARITIES
+    @param max_buckets: Largest accepted number of buckets
+    @return: List of n + 1 ascending datetimes for n buckets; bucket i is [edges[i], edges[i + 1])
+    @raise ValueError: If the period needs more than max_buckets buckets
+    """
+    edges = [truncate(start, granularity)]
+    while edges[-1] < end:
+        if len(edges) > max_buckets:
+            raise ValueError(f"Period too long: at most {max_buckets} buckets of one {granularity}")
+        edges.append(next_start(edges[-1], granularity))
+    return edges
+
+def bucket_label(start, granularity):
+    """
+    @param start: Bucket start
+    @param granularity: One of GRANULARITIES
+    @return: Label of the bucket, e.g. 2025-04-15 for a day or 2025-04 for a month
+    """
+    return start.strftime(_LABEL_FORMATS[granularity])
@@ -0,0 +1,134 @@
+import threading
+import logging
+import time
+import psycopg2
+from constants import REPORT_VIEW_REFRESH_INTERVAL, REPORT_VIEW_MAX_AGE, REPORT_VIEW_REFRESH_TIMEOUT_MS
+from db_utils import db_connection
+
+logger = logging.getLogger(__name__)
+
+# Materialized views defined in create_support_db.sql (section 6)
+REPORT_VIEWS = ('mv_ticket_daily_stats', 'mv_ticket_resolution_stats')
+
+class ReportViewRefresher:
+    """
+    Background scheduler that keeps the reporting materialized views up to date.
+    
+    Every interval each view is rebuilt with REFRESH MATERIALIZED VIEW
+    CONCURRENTLY, so readers are never blocked while it runs. The first
+    refresh happens as soon as the thread starts, because the age of the
+    data left in the views by an earlier run is unknown. is_fresh() tells
+    the SQL backend whether the views may be used instead of the raw tables.
+    """
+
+    def __init__(self, interval=REPORT_VIEW_REFRESH_INTERVAL, max_age=REPORT_VIEW_MAX_AGE):
+        """
+        @param interval: Seconds between refresh runs
+        @param max_age: Seconds after the start of the last successful refresh during which the views count as fresh
+        """
+        self.interval = interval
+        self.max_age = max_age
+        self._refreshed_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {
+            'refreshes': 0,
+            'failures': 0,
+            'last_refresh_at': None,
+            'last_refresh_duration': None,
+            'last_error': None
+        }
+
+    def refresh_once(self):
+        """
+        Refreshes every reporting view, one transaction per view.
+        
+        @return: None
+        @raise psycopg2.Error: If a refresh fails
+        """
+        started = time.perf_counter()
+        # Rows committed after this point may be missing from the views
+        snapshot_at = time.monotonic()
+        for view in REPORT_VIEWS:
+            with db_connection(statement_timeout_ms=REPORT_VIEW_REFRESH_TIMEOUT_MS) as conn:
+                cur = conn.cursor()
+                cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+                cur.close()
+                conn.commit()
+        duration = time.perf_counter() - started
+        self._refreshed_at = snapshot_at
+        self._stats['refreshes'] += 1
+        self._stats['last_refresh_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self._stats['last_refresh_duration'] = round(duration, 4)
+        self._stats['last_error'] = None
+        logger.info(f"Reporting views refreshed in {duration:.3f}s")
+
+    def is_fresh(self):
+        """
+        Checks whether the views were refreshed recently enough to answer queries.
+        
+        @return: True if the last successful refresh started less than max_age seconds ago
+        """
+        return self._refreshed_at is not None and time.monotonic() - self._refreshed_at <= self.max_age
+
+    def refreshed_at(self):
+        """
+        Identifies the data currently held by the views.
+        
+        @return: time.monotonic() value at the start of the last successful refresh, or None
+        """
+        return self._refreshed_at
+
+    def _run(self):
+        """
+        Thread body: refreshes the views now and then every interval until stop() is called.
+        
+        @return: None
+        """
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_once()
+            except psycopg2.Error as e:
+                self._stats['failures'] += 1
+                self._stats['last_error'] = str(e)
+                logger.error(f"Reporting view refresh failed: {e}")
+            except Exception as e:
+                self._stats['failures'] += 1
+                self._stats['last_error'] = str(e)
+                logger.exception(f"Unexpected error during reporting view refresh: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """
+        Starts the background refresher thread. Does nothing if the interval is 0.
+        
+        @return: None
+        """
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='report-views', daemon=True)
+        self._thread.start()
+        logger.info(f"Reporting view refresh started with a {self.interval}s interval")
+
+    def stop(self):
+        """
+        Stops the background refresher thread.
+        
+        @return: None
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        """
+        Returns refresh statistics for monitoring.
+        
+        @return: Dictionary with refresh counters, the view age in seconds and whether the views are in use
+        """
+        snapshot = dict(self._stats)
+        snapshot['interval'] = self.interval
+        snapshot['fresh'] = self.is_fresh()
+        snapshot['age_seconds'] = round(time.monotonic() - self._refreshed_at, 1) if self._refreshed_at is not None else None
+        return snapshot